@@ -0,0 +1,117 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def run_replicas(num_replicas: int, shard_pairs: list[tuple], dims: tuple, batch_size: int, steps: int,
+                 results: dict) -> None:
+    """
+    Trains on the synthetic shards with a mirrored strategy over ``num_replicas`` logical CPU
+    devices (or the local GPUs, if there are as many) in a fresh process and records the throughput.
+    """
+    import tensorflow as tf
+    import CreatingModel.Model as ml
+    import CreatingModel.TrainingModel as tm
+
+    if len(tf.config.list_physical_devices("GPU")) < num_replicas:
+        tf.config.set_visible_devices([], "GPU")
+        tm.configure_logical_devices(num_replicas)
+    strategy = tm.create_distribution_strategy("mirrored")
+    global_batch_size = batch_size * strategy.num_replicas_in_sync
+
+    with strategy.scope():
+        model = ml.create_image_translation_model(*dims)
+        model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+
+    mean, std = np.full(3, 0.5), np.full(3, 0.25)
+    dataset = tm.create_distributed_dataset(strategy, shard_pairs, *dims, global_batch_size, shuffle_buffer=64,
+                                            cycle_length=2, mean=mean, std=std)
+
+    # The first epoch traces and compiles the replicated train step.
+    model.fit(dataset, epochs=1, steps_per_epoch=2, verbose=0)
+
+    start_time = time.perf_counter()
+    model.fit(dataset, epochs=1, steps_per_epoch=steps, verbose=0)
+    elapsed = time.perf_counter() - start_time
+
+    results[num_replicas] = {
+        "replicas": strategy.num_replicas_in_sync,
+        "global_batch_size": global_batch_size,
+        "examples_per_sec": steps * global_batch_size / elapsed,
+    }
+
+
+def create_shards(folder: str, dims: tuple, num_shards: int, examples_per_shard: int) -> list[tuple]:
+    """
+    Writes random uint8 training shards in the layout of ConvertingData.preprocess_dataset.
+    """
+    rng = np.random.default_rng(0)
+    shard_pairs = []
+
+    for i in range(num_shards):
+        train_file = os.path.join(folder, f"trainData_synthetic_{i:06d}.npy")
+        test_file = os.path.join(folder, f"testData_synthetic_{i:06d}.npy")
+        np.save(train_file, rng.integers(0, 256, (examples_per_shard, 2, *dims), dtype=np.uint8))
+        np.save(test_file, rng.integers(0, 256, (examples_per_shard, *dims), dtype=np.uint8))
+        shard_pairs.append((train_file, test_file))
+
+    return shard_pairs
+
+
+def run_benchmark(replica_counts: list[int], dims: tuple, batch_size: int, steps: int) -> dict:
+    """
+    Measures training throughput for every replica count with a fixed batch size per replica.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Manager().dict()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shard_pairs = create_shards(temp_dir, dims, num_shards=max(replica_counts) * 2,
+                                    examples_per_shard=batch_size * 4)
+
+        for num_replicas in replica_counts:
+            process = context.Process(target=run_replicas, args=(num_replicas, shard_pairs, dims, batch_size, steps,
+                                                                 results))
+            process.start()
+            process.join()
+            print(f"{num_replicas} replicas: {results.get(num_replicas)}")
+
+    baseline = results[min(replica_counts)]["examples_per_sec"]
+    return {
+        "dims": list(dims),
+        "batch_size_per_replica": batch_size,
+        "cpu_count": os.cpu_count(),
+        "replicas": {
+            num_replicas: {**results[num_replicas],
+                           "speedup": results[num_replicas]["examples_per_sec"] / baseline,
+                           "efficiency": results[num_replicas]["examples_per_sec"] / baseline
+                           * min(replica_counts) / num_replicas}
+            for num_replicas in replica_counts
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure training examples/sec against the number of replicas.")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--height", type=int, default=64)
+    parser.add_argument("--width", type=int, default=96)
+    parser.add_argument("--batch-size", type=int, default=4, help="Batch size per replica.")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--output", default="distribution_benchmark.json")
+    args = parser.parse_args()
+
+    report = run_benchmark(sorted(args.replicas), (args.height, args.width, 3), args.batch_size, args.steps)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
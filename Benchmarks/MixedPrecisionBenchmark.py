@@ -0,0 +1,106 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+
+def run_precision(policy: str, model_path: str, dims: tuple, inputs_path: str, outputs_path: str,
+                  batch_size: int, results: dict) -> None:
+    """
+    Runs the model under one dtype policy in a fresh process and records throughput and peak memory.
+    """
+    import tensorflow as tf
+    import CreatingModel.Model as ml
+    import ImageOperations.GenerateFrames as gen
+
+    tf.keras.mixed_precision.set_global_policy("float32")
+    if model_path:
+        model = gen.load_inference_model(model_path, policy if policy != "float32" else "")
+    else:
+        tf.keras.utils.set_random_seed(0)
+        reference_model = ml.create_image_translation_model(*dims)
+        tf.keras.mixed_precision.set_global_policy(policy)
+        model = ml.create_image_translation_model(*dims)
+        model.set_weights(reference_model.get_weights())
+
+    first_frames, second_frames = np.load(inputs_path)
+    gen.predict_batch(model, first_frames[:batch_size], second_frames[:batch_size])
+
+    start_time = time.perf_counter()
+    predictions = [gen.predict_batch(model, first_frames[i:i + batch_size], second_frames[i:i + batch_size])
+                   for i in range(0, len(first_frames), batch_size)]
+    elapsed = time.perf_counter() - start_time
+
+    np.save(outputs_path, np.concatenate(predictions))
+
+    if tf.config.list_physical_devices("GPU"):
+        peak_memory_mb = tf.config.experimental.get_memory_info("GPU:0")["peak"] / 2 ** 20
+    else:
+        peak_memory_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    results[policy] = {"frames_per_sec": len(first_frames) / elapsed, "peak_memory_mb": peak_memory_mb}
+
+
+def psnr(reference: np.ndarray, image: np.ndarray) -> float:
+    """
+    Computes the PSNR between two batches of frames with values in [-1, 1].
+    """
+    mse = np.mean((reference.astype(np.float64) - image.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(2.0 ** 2 / mse)
+
+
+def run_benchmark(model_path: str, dims: tuple, num_frames: int, batch_size: int, policy: str) -> dict:
+    """
+    Compares a reduced precision policy with float32 on the same weights and inputs.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Manager().dict()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs_path = os.path.join(temp_dir, "inputs.npy")
+        rng = np.random.default_rng(0)
+        np.save(inputs_path, rng.normal(0, 1, (2, num_frames, *dims)).astype(np.float32))
+
+        for run_policy in ("float32", policy):
+            process = context.Process(target=run_precision, args=(
+                run_policy, model_path, dims, inputs_path, os.path.join(temp_dir, f"{run_policy}.npy"), batch_size,
+                results))
+            process.start()
+            process.join()
+
+        reference = np.load(os.path.join(temp_dir, "float32.npy"))
+        reduced = np.load(os.path.join(temp_dir, f"{policy}.npy"))
+
+    baseline, candidate = results["float32"], results[policy]
+    return {
+        "policy": policy,
+        "float32": baseline,
+        policy: candidate,
+        "memory_reduction": 1 - candidate["peak_memory_mb"] / baseline["peak_memory_mb"],
+        "throughput_gain": candidate["frames_per_sec"] / baseline["frames_per_sec"],
+        "psnr_vs_float32_db": psnr(reference, reduced),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory, throughput and PSNR of mixed precision inference.")
+    parser.add_argument("--model", default="", help="Trained model path, random weights if omitted. "
+                                                    "--height and --width must match the model.")
+    parser.add_argument("--height", type=int, default=270)
+    parser.add_argument("--width", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--policy", default="mixed_float16", choices=["mixed_float16", "mixed_bfloat16"])
+    args = parser.parse_args()
+
+    report = run_benchmark(args.model, (args.height, args.width, 3), args.frames, args.batch_size, args.policy)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import CreatingModel.Model as ml
+import CreatingModel.TrainingModel as tm
+import FolderOperations.FrameStore as fs
+import FolderOperations.SeparateData as ttd
+import ImageOperations.ConvertingData as cd
+import ImageOperations.GenerateFrames as gen
+import ImageOperations.ScaleDownImages as sd
+import VideoOperations.ExtractingFrames as ef
+import VideoOperations.InterpolatedImages as ii
+import utilities.utils as utils
+import setup
+
+def create_synthetic_video(video_path: str, num_frames: int, width: int, height: int, frame_rate: int = 24,
+                           scene_length: int = 24, seed: int = 0) -> None:
+    """
+    Writes a deterministic video with moving shapes and noise, with a hard scene cut every
+    ``scene_length`` frames.
+    """
+    rng = np.random.default_rng(seed)
+    video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"XVID"), frame_rate, (width, height))
+
+    gradient = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+    for i in range(num_frames):
+        scene = i // scene_length
+        scene_rng = np.random.default_rng(seed * 1000 + scene)
+        low, high = scene_rng.uniform(0, 255, 3), scene_rng.uniform(0, 255, 3)
+
+        frame = np.broadcast_to(low + (high - low) * gradient, (height, width, 3)).copy()
+        frame += rng.normal(0, 6, frame.shape)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+        progress = (i % scene_length) / scene_length
+        center = (int(width * (0.15 + 0.7 * progress)), int(height * (0.3 + 0.4 * np.sin(np.pi * progress))))
+        color = tuple(int(c) for c in scene_rng.uniform(0, 255, 3))
+        cv2.circle(frame, center, max(2, height // 8), color, -1)
+        cv2.rectangle(frame, (int(width * (0.8 - 0.5 * progress)), height // 10),
+                      (int(width * (0.95 - 0.5 * progress)), height // 3), color[::-1], -1)
+
+        video_writer.write(frame)
+
+    video_writer.release()
+
+
+def count_images(folder: str) -> int:
+    """
+    Counts the frames in the frame stores of every video in a folder.
+    """
+    return sum(len(fs.open_frame_store(folder, video)) for video in fs.list_videos(folder))
+
+
+def stage_save_video_frames(paths: dict, values: dict) -> int:
+    for video in sorted(os.listdir(paths['vid_dir'])):
+        ef.save_video_frames(os.path.join(paths['vid_dir'], video), paths['frames_dir'])
+
+    return count_images(paths['frames_dir'])
+
+
+def stage_resize_images_in_subfolders(paths: dict, values: dict) -> int:
+    sd.resize_images_in_subfolders(paths['frames_dir'], paths['scale_down_frames_dir'], values['scale_down_factor'],
+                                   values['resize_backend'], values['resize_workers'])
+
+    return count_images(paths['scale_down_frames_dir'])
+
+
+def count_triplets(paths: dict) -> int:
+    return sum(len(ttd.load_triplets(os.path.join(paths['triplets'], f))) for f in os.listdir(paths['triplets']))
+
+
+def stage_process_image_directories(paths: dict, values: dict) -> int:
+    ttd.process_image_directories(paths['scale_down_frames_dir'], paths['triplets'])
+
+    return count_images(paths['scale_down_frames_dir'])
+
+
+def stage_compute_dataset_mean_std(paths: dict, values: dict) -> int:
+    image_paths = {video: ttd.gather_image_paths(os.path.join(paths['scale_down_frames_dir'], video))
+                   for video in fs.list_videos(paths['scale_down_frames_dir'])}
+
+    # Stored like the data flow does, since the training and generation stages load it.
+    ttd.save_mean_std(image_paths)
+
+    return sum(len(video_paths) for video_paths in image_paths.values())
+
+
+def stage_preprocess_video_frames(paths: dict, values: dict) -> int:
+    cd.preprocess_video_frames(paths['scale_down_frames_dir'], paths['triplets'], paths['input_training_dataset'],
+                               paths['output_training_dataset'], values['batch_size'])
+
+    return 3 * count_triplets(paths)
+
+
+def stage_training_epoch(paths: dict, values: dict) -> tuple:
+    """
+    Times one epoch of model.fit over the training shards. Building the model and the dataset and
+    saving the model for the generation stage are not timed.
+    """
+    params = setup.get_model_params()
+    img_height, img_width, num_channels = tm.load_dataset_dimensions()
+    tm.configure_precision(params['mixed_precision'])
+    mean, std = utils.load_mean_std_file()
+
+    model = ml.create_image_translation_model(img_height, img_width, num_channels)
+    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+
+    train_shards, _ = tm.split_validation_shards(tm.list_training_shards(), params['validation_split'])
+    steps = max(1, tm.count_examples(train_shards) // params['batch_size'])
+    dataset = tm.create_training_dataset(train_shards, img_height, img_width, num_channels, params['batch_size'],
+                                         params['shuffle_buffer'], params['shard_cycle_length'], mean, std)
+
+    start_time = time.perf_counter()
+    model.fit(dataset, epochs=1, steps_per_epoch=steps, verbose=0)
+    elapsed = time.perf_counter() - start_time
+
+    tm.export_model(model, img_height, img_width, num_channels)
+
+    return steps * params['batch_size'], elapsed
+
+
+def stage_generate_video_frames(paths: dict, values: dict) -> int:
+    frames_before = count_images(paths['scale_down_frames_dir'])
+    gen.generate_video_frames(paths['scale_down_frames_dir'], utils.load_latest_model(),
+                              paths['intermediate_frames_dir'])
+
+    return count_images(paths['scale_down_frames_dir']) - frames_before
+
+
+def stage_create_video_from_images(paths: dict, values: dict) -> int:
+    ii.enhance_videos_frame_rate(paths['scale_down_frames_dir'], paths['enhanced_videos'])
+
+    frames = 0
+    for video in os.listdir(paths['enhanced_videos']):
+        video_capture = cv2.VideoCapture(os.path.join(paths['enhanced_videos'], video))
+        frames += int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_capture.release()
+
+    return frames
+
+
+STAGE_FUNCTIONS = {
+    "save_video_frames": stage_save_video_frames,
+    "resize_images_in_subfolders": stage_resize_images_in_subfolders,
+    "process_image_directories": stage_process_image_directories,
+    "compute_dataset_mean_std": stage_compute_dataset_mean_std,
+    "preprocess_video_frames": stage_preprocess_video_frames,
+    "training_epoch": stage_training_epoch,
+    "generate_video_frames": stage_generate_video_frames,
+    "create_video_from_images": stage_create_video_from_images,
+}
+STAGES = tuple(STAGE_FUNCTIONS)
+
+
+def run_stage(stage: str, config_path: str, results: dict) -> None:
+    """
+    Runs one stage in a fresh process against the benchmark workspace and records its throughput
+    and the peak resident memory of the process. The baseline is the memory held by the imported
+    modules before the stage starts. Stages that time only part of their work return the frames
+    together with the seconds they measured.
+    """
+    # Spawned processes inherit the spawn start method; restore the platform default so worker pools
+    # inside the stage start the same way they do when the pipeline runs from main.py.
+    multiprocessing.set_start_method(None, force=True)
+    os.environ[setup.CONFIG_ENV] = config_path
+    paths, values = setup.get_paths(), setup.get_values()
+    baseline_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start_time = time.perf_counter()
+    frames = STAGE_FUNCTIONS[stage](paths, values)
+    elapsed = time.perf_counter() - start_time
+    if isinstance(frames, tuple):
+        frames, elapsed = frames
+
+    results[stage] = {
+        "seconds": elapsed,
+        "frames": frames,
+        "frames_per_sec": frames / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baseline_rss_mb": baseline_rss_mb,
+    }
+
+
+def create_workspace(workspace_dir: str, num_videos: int, num_frames: int, width: int, height: int) -> str:
+    """
+    Creates a pipeline workspace with its own configuration and synthetic videos.
+
+    :return: Path to the configuration file of the workspace.
+    """
+    config = setup.load_config()
+    config.update({"absolute_path": workspace_dir, "num_epochs_model": 1})
+
+    config_path = os.path.join(workspace_dir, "setup.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f, indent=2)
+
+    setup.setup(config_path)
+    vid_dir = setup.get_paths(config_path)['vid_dir']
+    for i in range(num_videos):
+        create_synthetic_video(os.path.join(vid_dir, f"synthetic_{width}x{height}_{i}.avi"), num_frames, width, height,
+                               seed=i)
+
+    return config_path
+
+
+def run_benchmark(resolutions: list[tuple], num_videos: int, num_frames: int, stages: list[str]) -> dict:
+    """
+    Runs the selected stages in order on synthetic videos at every resolution.
+    """
+    context = multiprocessing.get_context("spawn")
+    report = {"commit": git_commit(), "videos": num_videos, "frames_per_video": num_frames, "resolutions": {}}
+
+    for width, height in resolutions:
+        results = context.Manager().dict()
+
+        with tempfile.TemporaryDirectory() as workspace_dir:
+            config_path = create_workspace(workspace_dir, num_videos, num_frames, width, height)
+
+            for stage in stages:
+                process = context.Process(target=run_stage, args=(stage, config_path, results))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    # Later stages depend on the output of this one, so their timings would be meaningless.
+                    raise RuntimeError(f"Stage {stage} failed at {width}x{height} with exit code "
+                                       f"{process.exitcode}, see the traceback above.")
+                print(f"{width}x{height} {stage}: {results.get(stage)}")
+
+        report["resolutions"][f"{width}x{height}"] = {stage: results.get(stage) for stage in stages}
+
+    return report
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(setup.__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def parse_resolution(resolution: str) -> tuple:
+    width, height = resolution.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on synthetic videos.")
+    parser.add_argument("--resolutions", nargs="+", default=["320x180", "640x360", "1280x720"])
+    parser.add_argument("--videos", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=96)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--output", default="pipeline_benchmark.json")
+    args = parser.parse_args()
+
+    report = run_benchmark([parse_resolution(r) for r in args.resolutions], args.videos, args.frames, args.stages)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
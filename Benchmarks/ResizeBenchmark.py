@@ -0,0 +1,97 @@
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import ImageOperations.ScaleDownImages as sd
+
+
+def create_test_frames(folder: str, num_frames: int, width: int, height: int) -> None:
+    """
+    Writes deterministic test frames with gradients, moving shapes and noise.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(0)
+
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    for i in range(num_frames):
+        frame = np.broadcast_to(gradient, (height, width, 3)).copy()
+        frame += rng.normal(0, 8, frame.shape)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+        center = (int(width * (0.2 + 0.6 * i / max(num_frames - 1, 1))), height // 2)
+        cv2.circle(frame, center, height // 6, (40, 200, 90), -1)
+        cv2.rectangle(frame, (width // 10, height // 10), (width // 4, height // 3), (220, 30, 30), -1)
+
+        cv2.imwrite(os.path.join(folder, f"frame_bench_{i:06d}.jpg"), frame)
+
+
+def psnr(reference: np.ndarray, image: np.ndarray) -> float:
+    """
+    Computes the peak signal-to-noise ratio between two uint8 images.
+    """
+    mse = np.mean((reference.astype(np.float64) - image.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def mean_psnr(reference_folder: str, folder: str) -> float:
+    """
+    Average PSNR of every image in a folder against the image of the same name in the reference folder.
+    """
+    scores = [psnr(cv2.imread(os.path.join(reference_folder, name)), cv2.imread(os.path.join(folder, name)))
+              for name in sorted(os.listdir(reference_folder))]
+    return float(np.mean(scores))
+
+
+def run_benchmark(num_frames: int, width: int, height: int, scale_factor: float, num_workers: int) -> list[dict]:
+    """
+    Times every resize backend on the same frames and compares its output to the TensorFlow path.
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_folder = os.path.join(temp_dir, "input")
+        create_test_frames(input_folder, num_frames, width, height)
+
+        reference_folder = os.path.join(temp_dir, "tensorflow_1")
+
+        for backend in sd.RESIZE_BACKENDS:
+            for workers in sorted({1, num_workers}):
+                output_folder = os.path.join(temp_dir, f"{backend}_{workers}")
+
+                start_time = time.perf_counter()
+                sd.batch_resize_images(input_folder, output_folder, scale_factor, backend, workers)
+                elapsed = time.perf_counter() - start_time
+
+                results.append({
+                    "backend": backend,
+                    "workers": workers,
+                    "frames_per_sec": num_frames / elapsed,
+                    "psnr_vs_tensorflow": mean_psnr(reference_folder, output_folder),
+                })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the throughput and output PSNR of the resize backends.")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--scale-factor", type=float, default=0.25)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.frames, args.width, args.height, args.scale_factor, args.workers)
+
+    print(f"{'backend':<16}{'workers':>8}{'frames/sec':>14}{'PSNR vs TF (dB)':>18}")
+    for result in results:
+        print(f"{result['backend']:<16}{result['workers']:>8}{result['frames_per_sec']:>14.1f}"
+              f"{result['psnr_vs_tensorflow']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def run_loader(loader: str, model_path: str, serving_path: str, inputs_path: str, batch_size: int,
+               results: dict) -> None:
+    """
+    Loads the model with one loader in a fresh process and records startup time and per-frame latency.
+    """
+    start_time = time.perf_counter()
+
+    import CreatingModel.ExportModel as em
+    import ImageOperations.GenerateFrames as gen
+
+    if loader == "serving":
+        model = em.ServingModel(serving_path)
+    else:
+        model = gen.load_inference_model(model_path, prefer_serving_model=False)
+
+    first_frames, second_frames = np.load(inputs_path)
+    gen.predict_batch(model, first_frames[:batch_size], second_frames[:batch_size])
+    startup = time.perf_counter() - start_time
+
+    single_latencies = []
+    for first_frame, second_frame in zip(first_frames, second_frames):
+        pair_start = time.perf_counter()
+        gen.predict_batch(model, first_frame[np.newaxis], second_frame[np.newaxis])
+        single_latencies.append(time.perf_counter() - pair_start)
+
+    batch_start = time.perf_counter()
+    for i in range(0, len(first_frames), batch_size):
+        gen.predict_batch(model, first_frames[i:i + batch_size], second_frames[i:i + batch_size])
+    batched_elapsed = time.perf_counter() - batch_start
+
+    results[loader] = {
+        "startup_sec": startup,
+        "frame_latency_ms_p50": float(np.percentile(single_latencies, 50)) * 1000,
+        "frame_latency_ms_p95": float(np.percentile(single_latencies, 95)) * 1000,
+        "batched_ms_per_frame": batched_elapsed / len(first_frames) * 1000,
+    }
+
+
+def export_random_model(model_path: str, serving_path: str, dims: tuple) -> None:
+    """
+    Saves a randomly initialized model and its serving artifact, for benchmarking without a trained model.
+    """
+    import CreatingModel.ExportModel as em
+    import CreatingModel.Model as ml
+
+    model = ml.create_image_translation_model(*dims)
+    model.save(model_path, save_format="tf")
+    em.export_serving_model(model, serving_path, *dims)
+
+
+def run_benchmark(model_path: str, serving_path: str, dims: tuple, num_frames: int, batch_size: int) -> dict:
+    """
+    Compares loading the Keras SavedModel with loading the XLA-compiled serving artifact.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Manager().dict()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs_path = os.path.join(temp_dir, "inputs.npy")
+        rng = np.random.default_rng(0)
+        np.save(inputs_path, rng.normal(0, 1, (2, num_frames, *dims)).astype(np.float32))
+
+        for loader in ("keras", "serving"):
+            process = context.Process(target=run_loader, args=(loader, model_path, serving_path, inputs_path,
+                                                                 batch_size, results))
+            process.start()
+            process.join()
+
+    baseline, candidate = results["keras"], results["serving"]
+    return {
+        "keras": baseline,
+        "serving": candidate,
+        "startup_speedup": baseline["startup_sec"] / candidate["startup_sec"],
+        "frame_latency_speedup": baseline["frame_latency_ms_p50"] / candidate["frame_latency_ms_p50"],
+        "batched_speedup": baseline["batched_ms_per_frame"] / candidate["batched_ms_per_frame"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare startup and per-frame latency of the Keras model "
+                                                 "and the exported serving artifact.")
+    parser.add_argument("--model", default="", help="Trained model path with an exported serving artifact, "
+                                                    "random weights if omitted. --height and --width must "
+                                                    "match the model.")
+    parser.add_argument("--height", type=int, default=270)
+    parser.add_argument("--width", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    dims = (args.height, args.width, 3)
+    if args.model:
+        import CreatingModel.ExportModel as em
+        report = run_benchmark(args.model, em.serving_model_path(args.model), dims, args.frames, args.batch_size)
+    else:
+        with tempfile.TemporaryDirectory() as model_dir:
+            model_path, serving_path = os.path.join(model_dir, "model"), os.path.join(model_dir, "serving")
+            export_random_model(model_path, serving_path, dims)
+            report = run_benchmark(model_path, serving_path, dims, args.frames, args.batch_size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
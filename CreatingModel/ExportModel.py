@@ -0,0 +1,84 @@
+import argparse
+import os
+
+import numpy as np
+import tensorflow as tf
+
+import utilities.utils as utils
+import setup
+
+
+def export_serving_model(model: tf.keras.models.Model, export_dir: str, img_height: int, img_width: int,
+                         num_channels: int) -> None:
+    """
+    Exports a frozen, XLA-compiled serving signature of the model.
+
+    The signature takes batches of frame pairs with fixed spatial dimensions, so the graph is traced
+    once at export time instead of on every reload.
+
+    :param model: Trained image translation model.
+    :param export_dir: Directory the SavedModel is written to.
+    :param img_height: Height of the frames the model was trained on.
+    :param img_width: Width of the frames the model was trained on.
+    :param num_channels: Number of channels of the frames.
+    """
+    input_dtype = model.inputs[0].dtype
+    frame_shape = [None, img_height, img_width, num_channels]
+
+    @tf.function(jit_compile=True, input_signature=[
+        tf.TensorSpec(frame_shape, input_dtype, name="first_frame"),
+        tf.TensorSpec(frame_shape, input_dtype, name="second_frame"),
+    ])
+    def serve(first_frame, second_frame):
+        return {"predicted_frame": tf.cast(model([first_frame, second_frame], training=False), tf.float32)}
+
+    module = tf.Module()
+    module.model = model
+    module.serve = serve
+
+    tf.saved_model.save(module, export_dir, signatures={"serving_default": serve})
+    print(f"Serving model exported to {export_dir}")
+
+
+def serving_model_path(model_path: str) -> str:
+    """
+    Returns where the serving artifact of a trained model is stored.
+    """
+    paths = setup.get_paths()
+    return os.path.join(paths['serving_models'], os.path.basename(os.path.normpath(model_path)))
+
+
+class ServingModel:
+    """
+    Loads an exported serving artifact and exposes the ``inputs`` and ``predict_on_batch``
+    members the frame generation code uses, so it can stand in for the Keras model.
+    """
+
+    def __init__(self, export_dir: str):
+        self._loaded = tf.saved_model.load(export_dir)
+        self._serve = self._loaded.signatures["serving_default"]
+
+        input_signature = self._serve.structured_input_signature[1]
+        self.inputs = [input_signature["first_frame"], input_signature["second_frame"]]
+
+    def predict_on_batch(self, inputs: list) -> np.ndarray:
+        first_frames, second_frames = inputs
+        outputs = self._serve(first_frame=tf.convert_to_tensor(first_frames, self.inputs[0].dtype),
+                              second_frame=tf.convert_to_tensor(second_frames, self.inputs[1].dtype))
+        return outputs["predicted_frame"].numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the serving artifact of an already trained model.")
+    parser.add_argument("--model", default="", help="Model path, defaults to the latest trained model.")
+    args = parser.parse_args()
+
+    model_path = args.model or utils.load_latest_model()
+    model = tf.keras.models.load_model(model_path)
+    _, img_height, img_width, num_channels = model.inputs[0].shape
+
+    export_serving_model(model, serving_model_path(model_path), img_height, img_width, num_channels)
+
+
+if __name__ == "__main__":
+    main()
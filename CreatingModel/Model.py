@@ -7,9 +7,14 @@ from tensorflow.keras import layers, models
 def create_image_translation_model(img_height: int, img_width: int, num_channels: int) -> tf.keras.models.Model:
     """
     Builds an image translation model with ConvLSTM layers for spatiotemporal processing.
+
+    The layers follow the global Keras dtype policy. Under a mixed precision policy the inputs
+    use the reduced compute dtype while the output layers stay in float32.
     """
-    input1 = layers.Input(shape=(img_height, img_width, num_channels))
-    input2 = layers.Input(shape=(img_height, img_width, num_channels))
+    input_dtype = tf.keras.mixed_precision.global_policy().compute_dtype
+
+    input1 = layers.Input(shape=(img_height, img_width, num_channels), dtype=input_dtype)
+    input2 = layers.Input(shape=(img_height, img_width, num_channels), dtype=input_dtype)
 
     merged_input = layers.Concatenate()([input1, input2])
 
@@ -34,7 +39,8 @@ def create_image_translation_model(img_height: int, img_width: int, num_channels
     x = layers.Conv2DTranspose(128, (3, 3), strides=2, activation='tanh', padding='same')(x)
     x = layers.Conv2DTranspose(64, (3, 3), strides=2, activation='tanh', padding='same')(x)
 
-    output = layers.Conv2DTranspose(num_channels, (3, 3), activation='tanh', padding='same')(x)
-    output = layers.Cropping2D(cropping=((output.shape[1] - img_height, 0), (output.shape[2] - img_width, 0)))(output)
+    output = layers.Conv2DTranspose(num_channels, (3, 3), activation='tanh', padding='same', dtype='float32')(x)
+    output = layers.Cropping2D(cropping=((output.shape[1] - img_height, 0), (output.shape[2] - img_width, 0)),
+                               dtype='float32')(output)
 
     return models.Model(inputs=[input1, input2], outputs=output)
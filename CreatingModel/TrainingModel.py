@@ -1,13 +1,18 @@
+import argparse
+import hashlib
 import os
-import gc
 import pickle
-import shutil
+import tempfile
+import time
 import numpy as np
 import tensorflow as tf
 from sklearn.utils import shuffle
-from tensorflow.keras import backend as K
 
+import CreatingModel.ExportModel as em
 import CreatingModel.Model as ml
+import ImageOperations.ConvertingData as cd
+import utilities.profiling as profiling
+import utilities.telemetry as telemetry
 import utilities.utils as utils
 import setup
 
@@ -19,6 +24,71 @@ def configure_gpu_memory():
         tf.config.experimental.set_memory_growth(physical_devices[0], True)
 
 
+def configure_precision(policy_name: str) -> None:
+    """
+    Sets the global Keras dtype policy, e.g. "mixed_float16" or "mixed_bfloat16".
+    An empty name keeps full float32 precision.
+    """
+    tf.keras.mixed_precision.set_global_policy(policy_name or "float32")
+
+
+DISTRIBUTION_STRATEGIES = ("", "mirrored", "multi_worker_mirrored")
+
+
+def configure_logical_devices(num_devices: int) -> None:
+    """
+    Splits the CPU into ``num_devices`` logical devices, so data-parallel training can run on a
+    machine without GPUs. Has no effect once TensorFlow has initialized its devices.
+    """
+    if num_devices <= 1:
+        return
+
+    cpus = tf.config.list_physical_devices('CPU')
+    try:
+        tf.config.set_logical_device_configuration(cpus[0], [tf.config.LogicalDeviceConfiguration()] * num_devices)
+    except RuntimeError:
+        print(f"Warning: TensorFlow devices are already initialized, not splitting the CPU into {num_devices} "
+              f"logical devices.")
+
+
+def create_distribution_strategy(name: str) -> tf.distribute.Strategy:
+    """
+    Creates the tf.distribute strategy named by ``distribution_strategy`` in setup.json.
+
+    :param name: "" for the default single-device strategy, "mirrored" to replicate the model on
+        every local GPU (or every logical CPU device if there is no GPU), or "multi_worker_mirrored"
+        to replicate it across the hosts described by the TF_CONFIG environment variable.
+    """
+    if name not in DISTRIBUTION_STRATEGIES:
+        raise ValueError(f"Unknown distribution strategy '{name}', expected one of {DISTRIBUTION_STRATEGIES}.")
+
+    if name == "mirrored":
+        devices = None
+        if not tf.config.list_physical_devices('GPU'):
+            devices = [device.name for device in tf.config.list_logical_devices('CPU')]
+        return tf.distribute.MirroredStrategy(devices)
+
+    if name == "multi_worker_mirrored":
+        return tf.distribute.MultiWorkerMirroredStrategy()
+
+    return tf.distribute.get_strategy()
+
+
+def is_chief(strategy: tf.distribute.Strategy) -> bool:
+    """
+    Checks whether this process is the chief of a multi-worker cluster, the worker that keeps the
+    saved model. Processes outside a cluster are always the chief.
+    """
+    resolver = getattr(strategy, "cluster_resolver", None)
+    if resolver is None or not resolver.task_type:
+        return True
+
+    if resolver.task_type == "chief":
+        return True
+
+    return resolver.task_type == "worker" and resolver.task_id == 0 and "chief" not in resolver.cluster_spec().as_dict()
+
+
 def check_dataset_dimensions() -> bool:
     """
     Checks if all dataset images have the same dimensions.
@@ -54,63 +124,416 @@ def load_dataset_dimensions() -> tuple:
         return pickle.load(f)
 
 
+def list_training_shards() -> list[tuple]:
+    """
+    Returns the (input, output) shard file pairs of every video in the training dataset.
+    """
+    paths = setup.get_paths()
+    shard_pairs = []
+
+    for dataset in sorted(os.listdir(paths['input_training_dataset'])):
+        input_path = os.path.join(paths['input_training_dataset'], dataset)
+        output_path = os.path.join(paths['output_training_dataset'], dataset)
+
+        train_files = sorted(
+            [os.path.join(input_path, f) for f in os.listdir(input_path) if f.endswith(".npy")]
+        )
+
+        test_files = sorted(
+            [os.path.join(output_path, f) for f in os.listdir(output_path) if f.endswith(".npy")]
+        )
+
+        shard_pairs.extend(zip(train_files, test_files))
+
+    return shard_pairs
+
+
+def shard_examples(train_file, test_file):
+    """
+    Yields raw uint8 ((first_frame, second_frame), target_frame) examples from one pair of
+    memory-mapped shard files.
+    """
+    if isinstance(train_file, bytes):
+        train_file, test_file = train_file.decode(), test_file.decode()
+
+    train_data = cd.load_shard(train_file)
+    test_data = cd.load_shard(test_file)
+
+    for i in range(min(len(train_data), len(test_data))):
+        yield (train_data[i, 0], train_data[i, 1]), test_data[i]
+
+
+def count_examples(shard_pairs: list[tuple]) -> int:
+    """Returns the number of training examples in the given shards."""
+    return sum(min(len(cd.load_shard(train_file)), len(cd.load_shard(test_file)))
+               for train_file, test_file in shard_pairs)
+
+
+def create_training_dataset(shard_pairs: list[tuple], img_height: int, img_width: int, num_channels: int,
+                            batch_size: int, shuffle_buffer: int, cycle_length: int, mean: np.ndarray,
+                            std: np.ndarray, seed: int = 42, num_pipelines: int = 1,
+                            pipeline_index: int = 0, deterministic: bool = False) -> tf.data.Dataset:
+    """
+    Builds a streaming tf.data pipeline over the given shards.
+
+    Shards are read in a shuffled order and interleaved ``cycle_length`` at a time, examples are
+    shuffled through a buffer shared by all shards, and batches are normalized and prefetched.
+    Frames stay uint8 until they are batched, so peak memory is bounded by the shuffle buffer.
+
+    :param num_pipelines: Number of input pipelines the data is split between in distributed training.
+    :param pipeline_index: Input pipeline this dataset feeds. Every pipeline reads its own subset
+        of the shard files, or of the examples if there are fewer shard files than pipelines.
+    :param deterministic: Interleave the shards in a fixed order, so the same seed always yields the
+        same batches and training can resume in the middle of an epoch.
+    """
+    frame_spec = tf.TensorSpec(shape=(img_height, img_width, num_channels), dtype=tf.uint8)
+    output_signature = ((frame_spec, frame_spec), frame_spec)
+
+    mean = tf.constant(mean, dtype=tf.float32)
+    std = tf.constant(std, dtype=tf.float32)
+
+    def normalize(frames):
+        return (tf.cast(frames, tf.float32) / 255.0 - mean) / std
+
+    train_files, test_files = zip(*shard_pairs)
+    dataset = tf.data.Dataset.from_tensor_slices((list(train_files), list(test_files)))
+    # Examples are only split between pipelines if there are too few shard files, which needs every
+    # pipeline to interleave them in the same order.
+    split_examples = len(shard_pairs) < num_pipelines
+    if num_pipelines > 1 and not split_examples:
+        dataset = dataset.shard(num_pipelines, pipeline_index)
+    dataset = dataset.shuffle(len(shard_pairs), seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.interleave(
+        lambda train_file, test_file: tf.data.Dataset.from_generator(
+            shard_examples, args=(train_file, test_file), output_signature=output_signature),
+        cycle_length=cycle_length, num_parallel_calls=tf.data.AUTOTUNE, deterministic=deterministic or split_examples
+    )
+    if num_pipelines > 1 and split_examples:
+        dataset = dataset.shard(num_pipelines, pipeline_index)
+
+    dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(lambda inputs, target: ((normalize(inputs[0]), normalize(inputs[1])), normalize(target)),
+                          num_parallel_calls=tf.data.AUTOTUNE)
+
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def create_distributed_dataset(strategy: tf.distribute.Strategy, shard_pairs: list[tuple], img_height: int,
+                               img_width: int, num_channels: int, global_batch_size: int, shuffle_buffer: int,
+                               cycle_length: int, mean: np.ndarray, std: np.ndarray, seed: int = 42,
+                               skip_steps: int = 0) -> tf.distribute.DistributedDataset:
+    """
+    Builds one input pipeline per worker with create_training_dataset, batched per replica so
+    every step consumes ``global_batch_size`` examples across all replicas.
+
+    The pipelines repeat, so all replicas run the same number of steps even when the shards do not
+    divide evenly between workers; fit is given the number of steps per epoch instead.
+
+    :param skip_steps: Steps of the epoch already trained, skipped when resuming.
+    """
+    def dataset_fn(input_context: tf.distribute.InputContext) -> tf.data.Dataset:
+        dataset = create_training_dataset(shard_pairs, img_height, img_width, num_channels,
+                                          input_context.get_per_replica_batch_size(global_batch_size),
+                                          shuffle_buffer, cycle_length, mean, std, seed,
+                                          input_context.num_input_pipelines, input_context.input_pipeline_id,
+                                          deterministic=True)
+        replicas_per_pipeline = input_context.num_replicas_in_sync // input_context.num_input_pipelines
+        return dataset.repeat().skip(skip_steps * replicas_per_pipeline)
+
+    return strategy.distribute_datasets_from_function(dataset_fn)
+
+
+def split_validation_shards(shard_pairs: list[tuple], validation_split: float, seed: int = 42) -> tuple:
+    """
+    Holds out a fraction of the shards for validation.
+    """
+    shard_pairs = shuffle(shard_pairs, random_state=seed)
+    num_validation = int(round(len(shard_pairs) * validation_split)) if len(shard_pairs) > 1 else 0
+
+    return shard_pairs[num_validation:], shard_pairs[:num_validation]
+
+
+class ProfilingCallback(tf.keras.callbacks.Callback):
+    """
+    Reports the examples of every training batch to the profiler, so profiling can stop after a window.
+    """
+
+    def __init__(self, batch_size: int):
+        super().__init__()
+        self.batch_size = batch_size
+
+    def on_train_batch_end(self, batch, logs=None):
+        profiling.advance(self.batch_size)
+
+
+class CheckpointCallback(tf.keras.callbacks.Callback):
+    """
+    Counts the steps trained in the current epoch in the training checkpoint and saves it every
+    ``every_steps`` steps.
+    """
+
+    def __init__(self, checkpoint: tf.train.Checkpoint, manager: tf.train.CheckpointManager, every_steps: int,
+                 options: tf.train.CheckpointOptions = None):
+        super().__init__()
+        self.checkpoint = checkpoint
+        self.manager = manager
+        self.every_steps = every_steps
+        self.options = options
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.checkpoint.step.assign_add(1)
+        if self.every_steps > 0 and int(self.checkpoint.step) % self.every_steps == 0:
+            self.manager.save(options=self.options)
+
+
+def shards_fingerprint(shard_pairs: list[tuple]) -> str:
+    """
+    Returns a string identifying the training shards, so a checkpoint's position within an epoch is
+    only reused for the shards it was taken on.
+    """
+    digest = hashlib.sha1()
+    for train_file, test_file in shard_pairs:
+        for file in (train_file, test_file):
+            digest.update(f"{os.path.basename(file)}:{os.path.getsize(file)};".encode())
+
+    return digest.hexdigest()
+
+
+def create_training_checkpoint(model: tf.keras.models.Model, strategy: tf.distribute.Strategy = None,
+                               seed: int = 42) -> tf.train.Checkpoint:
+    """
+    Creates the training state saved in checkpoints: the model and optimizer, the epoch, the steps
+    trained in it, the seed of the epoch's data order, the random generator drawing those seeds and
+    the fingerprint of the shards the position refers to.
+
+    The optimizer variables are created up front in the model's strategy, so restoring fills them
+    instead of deferring. The other variables are plain host variables.
+    """
+    with (strategy or tf.distribute.get_strategy()).scope():
+        if hasattr(model.optimizer, "build"):
+            model.optimizer.build(model.trainable_variables)
+
+    return tf.train.Checkpoint(model=model, optimizer=model.optimizer,
+                               epoch=tf.Variable(0, dtype=tf.int64), step=tf.Variable(0, dtype=tf.int64),
+                               epoch_seed=tf.Variable(seed, dtype=tf.int64), rng=tf.random.Generator.from_seed(seed),
+                               shards=tf.Variable(""))
+
+
+def checkpoint_directory(strategy: tf.distribute.Strategy) -> str:
+    """
+    Returns the directory checkpoints are written to. Workers other than the chief write theirs to
+    a directory of their own, because saving is a collective operation.
+    """
+    checkpoints_dir = setup.get_paths()['checkpoints']
+    if is_chief(strategy):
+        return checkpoints_dir
+
+    resolver = strategy.cluster_resolver
+    return os.path.join(checkpoints_dir, "workers", f"{resolver.task_type}_{resolver.task_id}")
+
+
+def archive_checkpoints(checkpoints_dir: str) -> str:
+    """
+    Moves the checkpoints of an earlier run, including those of other workers, aside to
+    ``<checkpoints_dir>_<timestamp>`` so that training from scratch neither resumes from nor
+    deletes them.
+
+    :return: Path the checkpoints were moved to, empty if there were none.
+    """
+    if not os.path.isdir(checkpoints_dir) or not os.listdir(checkpoints_dir):
+        return ""
+
+    archive_dir = f"{os.path.normpath(checkpoints_dir)}_{time.strftime('%Y%m%d_%H%M%S')}"
+    os.rename(checkpoints_dir, archive_dir)
+    print(f"Training from scratch: moved the checkpoints of the previous run to {archive_dir}")
+
+    return archive_dir
+
+
+def export_model(model: tf.keras.models.Model, img_height: int, img_width: int, num_channels: int) -> str:
+    """
+    Saves the model to the models directory with an XLA-compiled serving artifact next to it.
+
+    :return: Path of the saved model.
+    """
+    model_path = os.path.join(setup.get_paths()['models'],
+                              f"image_translation_model_{img_height}_{img_width}_{num_channels}_"
+                              f"ver_{time.strftime('%Y%m%d_%H%M%S')}")
+
+    with telemetry.track_stage("export"):
+        model.save(model_path, save_format="tf")
+        em.export_serving_model(model, em.serving_model_path(model_path), img_height, img_width, num_channels)
+
+    return model_path
+
+
+def export_checkpoint(checkpoint_path: str = None) -> str:
+    """
+    Exports the model of a training checkpoint, by default the latest one, for example to try a
+    model while training is still running.
+
+    :return: Path of the saved model.
+    """
+    checkpoint_path = checkpoint_path or tf.train.latest_checkpoint(setup.get_paths()['checkpoints'])
+    if not checkpoint_path:
+        raise FileNotFoundError("No training checkpoint found.")
+
+    img_height, img_width, num_channels = load_dataset_dimensions()
+    configure_precision(setup.get_model_params()['mixed_precision'])
+
+    model = ml.create_image_translation_model(img_height, img_width, num_channels)
+    tf.train.Checkpoint(model=model).restore(checkpoint_path).expect_partial()
+    print(f"Exporting {checkpoint_path}")
+
+    return export_model(model, img_height, img_width, num_channels)
+
+
 def train_model(continue_training: bool = False) -> None:
     """
     Trains the image translation model and saves it to the specified directory.
+
+    Every shard of every video is streamed through a single tf.data pipeline and the model is
+    fitted over all of them. The training state is checkpointed every ``checkpoint_every_steps``
+    steps and at the end of every epoch, keeping the last ``checkpoints_to_keep`` checkpoints.
+    Continuing training restores the latest checkpoint and resumes at the exact step: each epoch
+    reads the shards in an order fixed by its seed, so the batches already trained are skipped.
+    Training from scratch moves the checkpoints of an earlier run aside instead of deleting them.
+
+    The model is saved with an XLA-compiled serving artifact once training finishes; in between,
+    ``python -m CreatingModel.TrainingModel --export`` exports the latest checkpoint.
+
+    With a ``distribution_strategy`` in setup.json the model is replicated on several devices or
+    hosts. ``batch_size_model`` is then the batch size of each replica, and every worker reads its
+    own subset of the shards. The saved model and checkpoints are the same as without a strategy.
     """
-    paths = setup.get_paths()
     params = setup.get_model_params()
 
+    configure_logical_devices(params['logical_cpu_devices'])
+    strategy = create_distribution_strategy(params['distribution_strategy'])
+    global_batch_size = params['batch_size'] * strategy.num_replicas_in_sync
+
     if not check_dataset_dimensions():
         return
 
     img_height, img_width, num_channels = load_dataset_dimensions()
+    configure_precision(params['mixed_precision'])
+
+    shard_pairs = list_training_shards()
+    if not shard_pairs:
+        raise FileNotFoundError("No .npy training shards found. "
+                                "Convert old .npz shards with `python -m ImageOperations.ConvertingData`.")
 
-    if not continue_training:
-        model = ml.create_image_translation_model(img_height, img_width, num_channels)
-        model.compile(optimizer='adam', loss='mse', metrics=['mae'])
-    else:
-        model_path = utils.load_latest_model()
-        model = tf.keras.models.load_model(model_path)
+    mean, std = utils.load_mean_std_file()
+
+    checkpoint_dir = checkpoint_directory(strategy)
+    latest_checkpoint = tf.train.latest_checkpoint(setup.get_paths()['checkpoints']) if continue_training else None
+    if not continue_training and is_chief(strategy):
+        archive_checkpoints(setup.get_paths()['checkpoints'])
+
+    with strategy.scope():
+        if continue_training and not latest_checkpoint:
+            model_path = utils.load_latest_model()
+            print(f"No training checkpoint found, continuing from {model_path}")
+            model = tf.keras.models.load_model(model_path)
+        else:
+            model = ml.create_image_translation_model(img_height, img_width, num_channels)
+            model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+
+    checkpoint = create_training_checkpoint(model, strategy)
+
+    manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=params['checkpoints_to_keep'])
+    options = tf.train.CheckpointOptions(experimental_enable_async_checkpoint=True) \
+        if params['checkpoint_async'] else None
 
     print(model.summary())
 
-    for dataset_idx, dataset in enumerate(os.listdir(paths['input_training_dataset'])):
-        input_path = os.path.join(paths['input_training_dataset'], dataset)
-        output_path = os.path.join(paths['output_training_dataset'], dataset)
+    train_shards, validation_shards = split_validation_shards(shard_pairs, params['validation_split'])
+    train_examples = count_examples(train_shards)
+    fingerprint = shards_fingerprint(train_shards)
 
-        train_files = sorted(
-            [os.path.join(input_path, f) for f in os.listdir(input_path) if f.endswith(".npz")]
-        )
+    if latest_checkpoint:
+        checkpoint.restore(latest_checkpoint)
+        print(f"Resuming from {latest_checkpoint} at epoch {int(checkpoint.epoch) + 1}, "
+              f"step {int(checkpoint.step)}.")
+        if checkpoint.shards.numpy().decode() != fingerprint:
+            print("Training shards changed since the checkpoint, restarting the epoch.")
+            checkpoint.step.assign(0)
+    checkpoint.shards.assign(fingerprint)
 
-        test_files = sorted(
-            [os.path.join(output_path, f) for f in os.listdir(output_path) if f.endswith(".npz")]
-        )
+    distributed = bool(params['distribution_strategy'])
+    if distributed:
+        print(f"Training on {strategy.num_replicas_in_sync} replicas, {global_batch_size} examples per step.")
+    steps_per_epoch = max(1, train_examples // global_batch_size)
+
+    validation_dataset, fit_params = None, {}
+    if validation_shards and distributed:
+        validation_dataset = create_distributed_dataset(strategy, validation_shards, img_height, img_width,
+                                                        num_channels, global_batch_size, params['shuffle_buffer'],
+                                                        params['shard_cycle_length'], mean, std)
+        fit_params['validation_steps'] = max(1, count_examples(validation_shards) // global_batch_size)
+    elif validation_shards:
+        validation_dataset = create_training_dataset(validation_shards, img_height, img_width, num_channels,
+                                                     params['batch_size'], params['shuffle_buffer'],
+                                                     params['shard_cycle_length'], mean, std)
+
+    callbacks = [ProfilingCallback(global_batch_size),
+                 CheckpointCallback(checkpoint, manager, params['checkpoint_every_steps'], options)]
 
-        for file_idx, (train_file, test_file) in enumerate(zip(train_files, test_files)):
-            train_data = np.load(train_file)["input"]
-            test_data = np.load(test_file)["output"]
+    with telemetry.track_stage("train", frames=train_examples * (params['num_epochs'] - int(checkpoint.epoch))):
+        for epoch in range(int(checkpoint.epoch), params['num_epochs']):
+            skip_steps = int(checkpoint.step)
+            if skip_steps == 0:
+                checkpoint.epoch_seed.assign(checkpoint.rng.uniform([], maxval=2 ** 31 - 1, dtype=tf.int64))
+            seed = int(checkpoint.epoch_seed)
 
-            X1, X2 = map(np.array, zip(*train_data))
-            Y = np.array(test_data)
+            if distributed:
+                train_dataset = create_distributed_dataset(strategy, train_shards, img_height, img_width,
+                                                           num_channels, global_batch_size, params['shuffle_buffer'],
+                                                           params['shard_cycle_length'], mean, std, seed, skip_steps)
+                fit_params['steps_per_epoch'] = max(1, steps_per_epoch - skip_steps)
+            else:
+                train_dataset = create_training_dataset(train_shards, img_height, img_width, num_channels,
+                                                        params['batch_size'], params['shuffle_buffer'],
+                                                        params['shard_cycle_length'], mean, std, seed,
+                                                        deterministic=True).skip(skip_steps)
 
-            min_size = min(len(X1), len(Y))
-            X1, X2, Y = X1[:min_size], X2[:min_size], Y[:min_size]
+            model.fit(train_dataset, initial_epoch=epoch, epochs=epoch + 1, validation_data=validation_dataset,
+                      callbacks=callbacks, **fit_params)
 
-            X1, X2, Y = shuffle(X1, X2, Y, random_state=42)
+            checkpoint.epoch.assign_add(1)
+            checkpoint.step.assign(0)
+            manager.save(options=options)
 
-            model.fit([X1, X2], Y, epochs=params['num_epochs'], batch_size=params['batch_size'],
-                      validation_split=params['validation_split'])
+    if hasattr(checkpoint, "sync"):
+        # Waits for a background save to finish before the model is exported.
+        checkpoint.sync()
+
+    if not is_chief(strategy):
+        # Saving is a collective operation, so every worker saves, but only the chief keeps the model.
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model.save(os.path.join(temp_dir, "model"), save_format="tf")
+        return
 
-            K.clear_session()
-            gc.collect()
+    export_model(model, img_height, img_width, num_channels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the image translation model. For multi-worker "
+                                                 "training, run this on every host with its own TF_CONFIG.")
+    parser.add_argument("--continue", dest="continue_training", action="store_true",
+                        help="Resume training from the latest checkpoint.")
+    parser.add_argument("--export", action="store_true",
+                        help="Export the model of the latest checkpoint instead of training.")
+    args = parser.parse_args()
+
+    if args.export:
+        export_checkpoint()
+        return
 
-            model.save(os.path.join(paths['models'],
-                                    f"image_translation_model_{img_height}_{img_width}_{num_channels}_ver_{dataset_idx}_{file_idx}"),
-                       save_format="tf")
+    train_model(args.continue_training)
 
-            prev_models_save_file = os.path.join(paths['models'],
-                                                 f"image_translation_model_{img_height}_{img_width}_{num_channels}_ver_{dataset_idx}_{file_idx - 1}")
 
-            if os.path.exists(prev_models_save_file):
-                shutil.rmtree(prev_models_save_file)
+if __name__ == '__main__':
+    main()
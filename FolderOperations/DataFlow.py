@@ -3,18 +3,117 @@ import shutil
 import VideoOperations.ExtractingFrames as ef
 import ImageOperations.ScaleDownImages as sd
 import ImageOperations.ConvertingData as cd
+import FolderOperations.DataManifest as dm
+import FolderOperations.FrameStore as fs
 import FolderOperations.MovingBackFiles as mf
 import FolderOperations.SeparateData as ttd
+import utilities.telemetry as telemetry
+import setup
 import os
 
 
+def remove_video_outputs(video_name: str, output_dirs: list[str]) -> None:
+    """
+    Deletes everything previously derived from a video so it can be processed from scratch.
+    """
+    for output_dir in output_dirs:
+        shutil.rmtree(os.path.join(output_dir, video_name), ignore_errors=True)
+        fs.open_frame_store(output_dir, video_name).remove()
+
+
+def resume_frame_index(video_frames_dir: str) -> int:
+    """
+    Returns the frame index to resume an interrupted extraction from: the first frame number
+    missing from the video's frame store. Segments extracted in parallel finish out of order, so
+    frames after the first gap are extracted again rather than trusted.
+    """
+    prefix = f"frame_{os.path.basename(os.path.normpath(video_frames_dir))}_"
+    frame_numbers = set()
+    for name in fs.frame_store_at(video_frames_dir).names():
+        stem = os.path.splitext(name)[0]
+        if stem.startswith(prefix) and stem[len(prefix):].isdigit():
+            frame_numbers.add(int(stem[len(prefix):]))
+
+    start_frame = 0
+    while start_frame in frame_numbers:
+        start_frame += 1
+
+    return start_frame
+
+
+def count_frames(folder: str) -> int:
+    """
+    Counts the frames in the frame store of a video, zero if it does not exist.
+    """
+    return len(fs.frame_store_at(folder))
+
+
+def restore_separated_frames(video_input_dir: str, video_output_dir: str, video_scale_down_dir: str) -> None:
+    """
+    Moves frames left in the input and output training folders by runs that physically separated
+    them back into the video's frame folder.
+    """
+    mf.merge_folders(video_input_dir, video_output_dir, video_scale_down_dir)
+    shutil.rmtree(video_input_dir, ignore_errors=True)
+    shutil.rmtree(video_output_dir, ignore_errors=True)
+
+
+def list_shards(video_name: str, dataset_dirs: list[str]) -> list[str]:
+    """
+    Lists the training shard files written for a video.
+    """
+    shards = []
+    for dataset_dir in dataset_dirs:
+        video_dataset_dir = os.path.join(dataset_dir, video_name)
+        if os.path.isdir(video_dataset_dir):
+            shards.extend(os.path.join(video_dataset_dir, f) for f in sorted(os.listdir(video_dataset_dir)))
+
+    return shards
+
+
+def extract_pending_videos(pending: dict, manifest: dict, manifest_path: str, frames_dir: str,
+                           extraction_workers: int, extraction_segment_frames: int) -> None:
+    """
+    Extracts the frames of every pending video whose extraction has not completed,
+    resuming interrupted extractions where they stopped.
+    """
+    to_extract = {name: path for name, path in pending.items() if not manifest["videos"][name]["stages"]["extracted"]}
+    start_frames = {path: resume_frame_index(os.path.join(frames_dir, name)) for name, path in to_extract.items()}
+
+    if extraction_workers > 1:
+        frame_counts = ef.save_videos_frames_parallel(list(to_extract.values()), frames_dir, extraction_workers,
+                                                      extraction_segment_frames, start_frames)
+    else:
+        frame_counts = {}
+        for video_name, video_path in to_extract.items():
+            frame_count, frames_per_sec = ef.save_video_segment(video_path, frames_dir, start_frames[video_path])
+            frame_counts[video_path] = frame_count
+            print(f"Extraction completed: {start_frames[video_path] + frame_count} frames saved in "
+                  f"'{os.path.join(frames_dir, video_name)}' ({frames_per_sec:.1f} frames/sec).")
+
+    for video_name, video_path in to_extract.items():
+        # Frames after a gap left by an interrupted run were extracted again.
+        fs.open_frame_store(frames_dir, video_name).compact()
+        total_frames = start_frames[video_path] + frame_counts.get(video_path, 0)
+        if total_frames > 0:
+            dm.mark_stage(manifest, manifest_path, video_name, "extracted", frame_count=total_frames)
+
+
 def start_data_flow(vid_dir: str, frames_dir: str, scale_down_frames_dir: str, input_frames_dir: str,
                     output_frames_dir: str, input_training_dataset_dir: str, output_training_dataset_dir: str,
-                    batch_size_percent: int, scale_factor: float, create_training_dataset: bool = False) -> bool:
-    video_paths = [os.path.join(vid_dir, file_name) for file_name in os.listdir(vid_dir)]
+                    batch_size_percent: int, scale_factor: float, create_training_dataset: bool = False,
+                    extraction_workers: int = 1, extraction_segment_frames: int = 0,
+                    resize_backend: str = "tensorflow", resize_workers: int = 1) -> bool:
     """
     Processes, formats and stores the data in it required location.
+
+    Progress is recorded per video and per stage in the manifest in the metadata directory, so only
+    new or changed videos are processed and an interrupted run resumes at the stage where it stopped.
+    Frames are never moved out of the scaled down folder: the training split is a triplet index per
+    video in the metadata directory that the dataset stage reads directly.
+    Every stage run is recorded as a telemetry event (see utilities/telemetry.py).
     """
+    video_paths = [os.path.join(vid_dir, file_name) for file_name in os.listdir(vid_dir)]
 
     if len(video_paths) == 0:
         print("No video files found!!")
@@ -22,24 +121,83 @@ def start_data_flow(vid_dir: str, frames_dir: str, scale_down_frames_dir: str, i
         print("Exiting...")
         return False
 
-    for video in video_paths:
-        ef.save_video_frames(video, frames_dir)
+    paths = setup.get_paths()
+    manifest_path = paths['manifest_file']
+    manifest = dm.load_manifest(manifest_path)
 
-    sd.resize_images_in_subfolders(frames_dir, scale_down_frames_dir, scale_factor)
+    output_dirs = [frames_dir, scale_down_frames_dir, input_frames_dir, output_frames_dir,
+                   input_training_dataset_dir, output_training_dataset_dir]
+    dataset_dirs = [input_training_dataset_dir, output_training_dataset_dir]
 
-    shutil.rmtree(frames_dir)
+    pending = {}
+    for video_path in video_paths:
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        known_video = video_name in manifest["videos"]
+        entry, reset = dm.get_video_entry(manifest, video_path, scale_factor)
 
-    ttd.process_image_directories(scale_down_frames_dir, input_frames_dir, output_frames_dir)
+        if reset:
+            if known_video:
+                print(f"{video_name} changed since the last run, processing it again.")
+            remove_video_outputs(video_name, output_dirs)
 
-    if create_training_dataset:
-        cd.preprocess_video_frames(input_frames_dir, output_frames_dir, input_training_dataset_dir,
-                                   output_training_dataset_dir, batch_size_percent)
-    else:
-        print("Skipping training dataset creation as per configuration.")
+        if dm.is_complete(entry, create_training_dataset):
+            print(f"{video_name} is up to date, skipping.")
+            continue
+
+        pending[video_name] = video_path
+
+    dm.save_manifest(manifest, manifest_path)
+
+    with telemetry.track_stage("extract") as record:
+        extract_pending_videos(pending, manifest, manifest_path, frames_dir, extraction_workers,
+                               extraction_segment_frames)
+        record.frames = sum(count_frames(os.path.join(frames_dir, name)) for name in pending)
+
+    for video_name in pending:
+        stages = manifest["videos"][video_name]["stages"]
+        if not stages["extracted"]:
+            print(f"Warning: No frames extracted from {video_name}. Skipping.")
+            continue
+
+        video_frames_dir = os.path.join(frames_dir, video_name)
+        video_scale_down_dir = os.path.join(scale_down_frames_dir, video_name)
+        video_input_dir = os.path.join(input_frames_dir, video_name)
+        video_output_dir = os.path.join(output_frames_dir, video_name)
+        video_triplets_file = ttd.triplets_file(paths['triplets'], video_name)
+
+        if os.path.isdir(video_input_dir) or os.path.isdir(video_output_dir):
+            restore_separated_frames(video_input_dir, video_output_dir, video_scale_down_dir)
+
+        if not stages["resized"]:
+            with telemetry.track_stage("resize", video_name, count_frames(video_frames_dir)):
+                sd.batch_resize_images(video_frames_dir, video_scale_down_dir, scale_factor, resize_backend,
+                                       resize_workers, skip_existing=True)
+            dm.mark_stage(manifest, manifest_path, video_name, "resized")
+            print(f"{video_name} resized.")
+
+        fs.frame_store_at(video_frames_dir).remove()
+
+        if not stages["separated"] or not os.path.isfile(video_triplets_file):
+            with telemetry.track_stage("separate", video_name, count_frames(video_scale_down_dir)):
+                num_triplets = ttd.index_video_frames(video_scale_down_dir, video_triplets_file)
+            dm.mark_stage(manifest, manifest_path, video_name, "separated")
+            print(f"Indexed {num_triplets} training triplets in {video_name}")
 
-    mf.merge_subdirectories(input_frames_dir, output_frames_dir, scale_down_frames_dir)
+        if create_training_dataset and not stages["dataset"]:
+            triplets = ttd.load_triplets(video_triplets_file)
+            with telemetry.track_stage("dataset", video_name, 3 * len(triplets)):
+                cd.preprocess_dataset(video_scale_down_dir, triplets,
+                                      os.path.join(input_training_dataset_dir, video_name),
+                                      os.path.join(output_training_dataset_dir, video_name), batch_size_percent)
+            dm.mark_stage(manifest, manifest_path, video_name, "dataset",
+                          shards=list_shards(video_name, dataset_dirs))
+        elif not create_training_dataset:
+            print(f"Skipping training dataset creation for {video_name} as per configuration.")
 
-    shutil.rmtree(input_frames_dir)
-    shutil.rmtree(output_frames_dir)
+    if pending or not os.path.isfile(paths['mean_std_file']):
+        image_paths = {folder: ttd.gather_image_paths(os.path.join(scale_down_frames_dir, folder))
+                       for folder in fs.list_videos(scale_down_frames_dir)}
+        with telemetry.track_stage("mean_std", frames=sum(len(folder_paths) for folder_paths in image_paths.values())):
+            ttd.save_mean_std(image_paths)
 
     return True
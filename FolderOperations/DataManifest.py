@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+
+STAGES = ("extracted", "resized", "separated", "dataset")
+
+
+def hash_video(video_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 content hash of a video file.
+
+    :param video_path: Path to the video file.
+    :param chunk_size: Number of bytes read at a time.
+    :return: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+
+    with open(video_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def stat_video(video_path: str) -> dict:
+    """
+    Returns the size and modification time of a video file, which decide whether it needs rehashing.
+    """
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(manifest_path: str) -> dict:
+    """
+    Loads the data flow manifest, or returns an empty one if it does not exist yet.
+
+    :param manifest_path: Path to the manifest JSON file.
+    :return: Manifest dictionary with a "videos" entry per processed video.
+    """
+    if not os.path.isfile(manifest_path):
+        return {"videos": {}}
+
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, manifest_path: str) -> None:
+    """
+    Atomically writes the manifest so that a crash never leaves a half-written file behind.
+
+    :param manifest: Manifest dictionary.
+    :param manifest_path: Path to the manifest JSON file.
+    """
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    temp_path = f"{manifest_path}.tmp"
+
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(temp_path, manifest_path)
+
+
+def new_video_entry(video_path: str, video_hash: str, scale_factor: float, video_stat: dict) -> dict:
+    """
+    Creates a manifest entry for a video that has not been processed yet.
+    """
+    return {
+        "file": os.path.basename(video_path),
+        "hash": video_hash,
+        **video_stat,
+        "scale_factor": scale_factor,
+        "frame_count": 0,
+        "stages": {stage: False for stage in STAGES},
+        "shards": [],
+    }
+
+
+def get_video_entry(manifest: dict, video_path: str, scale_factor: float) -> tuple:
+    """
+    Returns the manifest entry of a video, replacing it with a fresh one if the video is new,
+    its contents changed or it was processed with a different scale factor.
+
+    The video is only rehashed if its size or modification time differ from the entry.
+
+    :param manifest: Manifest dictionary.
+    :param video_path: Path to the video file.
+    :param scale_factor: Scale factor used for the current run.
+    :return: Tuple of (entry, reset) where reset is True if a fresh entry was created and any
+             outputs left over from earlier runs are stale.
+    """
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    video_stat = stat_video(video_path)
+    entry = manifest["videos"].get(video_name)
+
+    if entry is not None and all(entry.get(key) == value for key, value in video_stat.items()):
+        video_hash = entry["hash"]
+    else:
+        video_hash = hash_video(video_path)
+
+    if entry is not None and entry["hash"] == video_hash and entry["scale_factor"] == scale_factor:
+        entry.update(video_stat)
+        return entry, False
+
+    manifest["videos"][video_name] = new_video_entry(video_path, video_hash, scale_factor, video_stat)
+
+    return manifest["videos"][video_name], True
+
+
+def is_complete(entry: dict, create_training_dataset: bool) -> bool:
+    """
+    Checks whether every stage required for this run has been completed for a video.
+    """
+    required = [stage for stage in STAGES if create_training_dataset or stage != "dataset"]
+    return all(entry["stages"][stage] for stage in required)
+
+
+def mark_stage(manifest: dict, manifest_path: str, video_name: str, stage: str, **fields) -> None:
+    """
+    Marks a stage as completed for a video, records any extra fields and saves the manifest.
+
+    :param manifest: Manifest dictionary.
+    :param manifest_path: Path to the manifest JSON file.
+    :param video_name: Name of the video (file name without extension).
+    :param stage: One of STAGES.
+    :param fields: Additional entry fields to update, e.g. frame_count or shards.
+    """
+    entry = manifest["videos"][video_name]
+    entry["stages"][stage] = True
+    entry.update(fields)
+
+    save_manifest(manifest, manifest_path)
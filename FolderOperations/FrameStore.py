@@ -0,0 +1,422 @@
+import os
+import shutil
+import threading
+
+import cv2
+import numpy as np
+
+import setup
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FRAME_STORE_BACKENDS = ("jpeg_dir", "container")
+CONTAINER_EXTENSION = ".frames"
+INDEX_EXTENSION = ".idx"
+MEMBER_SEPARATOR = "::"
+
+_containers = {}
+_containers_lock = threading.Lock()
+
+
+class FrameStore:
+    """
+    Encoded frames of one video, addressed by their file names (``frame_<video>_<number>.jpg`` for
+    source frames, plus the position suffix for generated frames).
+
+    Every frame also has a reference string that identifies it across processes; read_frame resolves
+    a reference back to the encoded frame whichever backend stored it.
+    """
+
+    def names(self) -> list[str]:
+        """Returns the names of all frames in sorted order."""
+        raise NotImplementedError
+
+    def read(self, name: str) -> bytes:
+        """Returns the encoded frame stored under a name."""
+        raise NotImplementedError
+
+    def write(self, name: str, data: bytes) -> None:
+        """Stores an encoded frame under a name, replacing any frame with the same name."""
+        raise NotImplementedError
+
+    def reference(self, name: str) -> str:
+        """Returns the reference string of a frame."""
+        raise NotImplementedError
+
+    def fingerprint(self, name: str) -> str:
+        """Returns a string that changes whenever the frame stored under a name is replaced."""
+        raise NotImplementedError
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def remove(self) -> None:
+        """Deletes the store and all its frames."""
+        raise NotImplementedError
+
+    def compact(self) -> int:
+        """
+        Reclaims the space taken by frames that were replaced.
+
+        :return: Number of bytes reclaimed.
+        """
+        return 0
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def __contains__(self, name: str) -> bool:
+        return name in set(self.names())
+
+    def frame(self, index: int) -> bytes:
+        """Returns the encoded frame at a position of the sorted frame names."""
+        return self.read(self.names()[index])
+
+    def references(self) -> list[str]:
+        return [self.reference(name) for name in self.names()]
+
+    def read_image(self, name: str) -> np.ndarray:
+        """Decodes a frame to a BGR image as cv2.imread does."""
+        return decode_image(self.read(name))
+
+    def write_image(self, name: str, image: np.ndarray) -> None:
+        """Encodes a BGR image as JPEG and stores it."""
+        self.write(name, encode_image(image))
+
+    def move_into(self, destination: "FrameStore") -> None:
+        """Moves every frame of this store into another store and removes this one."""
+        for name in self.names():
+            destination.write(name, self.read(name))
+        self.remove()
+        destination.compact()
+
+
+class JpegDirectoryStore(FrameStore):
+    """
+    One JPEG file per frame in a directory named after the video.
+    """
+
+    def __init__(self, root_dir: str, video_name: str):
+        self.path = os.path.join(root_dir, video_name)
+
+    def names(self) -> list[str]:
+        if not os.path.isdir(self.path):
+            return []
+
+        return sorted(name for name in os.listdir(self.path) if name.endswith(".jpg"))
+
+    def read(self, name: str) -> bytes:
+        with open(os.path.join(self.path, name), "rb") as f:
+            return f.read()
+
+    def write(self, name: str, data: bytes) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+        # Written under a temporary name and renamed, so an interrupted write never leaves a
+        # truncated frame that resumed runs would keep.
+        temp_path = os.path.join(self.path, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(self.path, name))
+
+    def reference(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def fingerprint(self, name: str) -> str:
+        file_stat = os.stat(os.path.join(self.path, name))
+        return f"{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def remove(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self.path, name))
+
+    def move_into(self, destination: FrameStore) -> None:
+        if not isinstance(destination, JpegDirectoryStore):
+            super().move_into(destination)
+            return
+
+        os.makedirs(destination.path, exist_ok=True)
+        for name in self.names():
+            os.replace(os.path.join(self.path, name), os.path.join(destination.path, name))
+        self.remove()
+
+
+class ContainerStore(FrameStore):
+    """
+    All frames of a video appended to a single ``<video>.frames`` file, with an append-only
+    ``<video>.frames.idx`` text index of ``name offset length`` lines. A frame written again is
+    appended and the last index line of a name wins; compact rewrites the container without the
+    replaced copies once a stage is done writing.
+
+    Appends hold an exclusive lock on the container, so several processes can extract segments of
+    the same video into one store. Readers pick up index lines appended by other processes when
+    they look up a name they do not know yet.
+    """
+
+    def __init__(self, root_dir: str, video_name: str):
+        self.path = os.path.join(root_dir, video_name + CONTAINER_EXTENSION)
+        self.index_path = self.path + INDEX_EXTENSION
+        self._index = {}
+        self._index_position = 0
+        self._index_inode = None
+        self._sorted_names = None
+        self._lock = threading.Lock()
+
+    def _refresh_index(self) -> None:
+        """Reads index lines appended since the last refresh, skipping a trailing partial line."""
+        index_stat = os.stat(self.index_path) if os.path.isfile(self.index_path) else None
+        if index_stat is None or index_stat.st_ino != self._index_inode or index_stat.st_size < self._index_position:
+            # Removed, compacted or replaced by another process since the last refresh.
+            self._index.clear()
+            self._index_position = 0
+            self._sorted_names = None
+            if index_stat is None:
+                return
+            self._index_inode = index_stat.st_ino
+
+        data_size = os.path.getsize(self.path) if os.path.isfile(self.path) else 0
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._index_position += len(line)
+
+                name, offset, length = line.decode().rsplit(" ", 2)
+                offset, length = int(offset), int(length)
+                if offset + length > data_size:
+                    data_size = os.path.getsize(self.path)
+                if offset + length <= data_size:
+                    if name not in self._index:
+                        self._sorted_names = None
+                    self._index[name] = (offset, length)
+
+    def _names(self) -> list[str]:
+        """Returns the cached sorted names, refreshed first. Must be called with the lock held."""
+        self._refresh_index()
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._index)
+        return self._sorted_names
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._names())
+
+    def frame(self, index: int) -> bytes:
+        with self._lock:
+            name = self._names()[index]
+        return self.read(name)
+
+    def _lookup(self, name: str) -> tuple:
+        with self._lock:
+            if name not in self._index:
+                self._refresh_index()
+            return self._index[name]
+
+    def read(self, name: str) -> bytes:
+        offset, length = self._lookup(name)
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def write(self, name: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with self._lock, open(self.path, "ab") as container, open(self.index_path, "ab") as index:
+            if fcntl is not None:
+                fcntl.flock(container, fcntl.LOCK_EX)
+            try:
+                offset = container.seek(0, os.SEEK_END)
+                container.write(data)
+                container.flush()
+                index.write(f"{name} {offset} {len(data)}\n".encode())
+                index.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(container, fcntl.LOCK_UN)
+
+            if name not in self._index:
+                self._sorted_names = None
+            self._index[name] = (offset, len(data))
+
+    def reference(self, name: str) -> str:
+        return f"{self.path}{MEMBER_SEPARATOR}{name}"
+
+    def fingerprint(self, name: str) -> str:
+        offset, length = self._lookup(name)
+        return f"{offset}:{length}"
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def remove(self) -> None:
+        with self._lock:
+            for path in (self.path, self.index_path):
+                if os.path.isfile(path):
+                    os.remove(path)
+            self._index.clear()
+            self._index_position = 0
+            self._index_inode = None
+            self._sorted_names = None
+
+    def compact(self) -> int:
+        """
+        Rewrites the container with only the latest copy of every frame and replaces the container
+        and its index. Must not run while other processes read or write the store.
+        """
+        with self._lock:
+            if not os.path.isfile(self.path):
+                return 0
+
+            self._refresh_index()
+            container_size = os.path.getsize(self.path)
+            dead_bytes = container_size - sum(length for _, length in self._index.values())
+            if dead_bytes <= 0:
+                return 0
+
+            temp_path = self.path + ".compact.tmp"
+            temp_index_path = self.index_path + ".compact.tmp"
+            compacted = {}
+            with open(self.path, "rb") as source, open(temp_path, "wb") as container, \
+                    open(temp_index_path, "wb") as index:
+                for name in sorted(self._index, key=lambda n: self._index[n][0]):
+                    offset, length = self._index[name]
+                    source.seek(offset)
+                    compacted[name] = (container.tell(), length)
+                    container.write(source.read(length))
+                    index.write(f"{name} {compacted[name][0]} {length}\n".encode())
+
+            # The new inode of the index makes other processes drop their cached offsets.
+            os.replace(temp_path, self.path)
+            os.replace(temp_index_path, self.index_path)
+
+            self._index = compacted
+            self._index_position = os.path.getsize(self.index_path)
+            self._index_inode = os.stat(self.index_path).st_ino
+
+        return dead_bytes
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self._lookup(name)
+            return True
+        except KeyError:
+            return False
+
+
+def frame_store_backend(backend: str = None) -> str:
+    """
+    Returns the given backend, or the ``frame_store`` configured in setup.json.
+    """
+    backend = backend or setup.get_values()['frame_store']
+    if backend not in FRAME_STORE_BACKENDS:
+        raise ValueError(f"Unknown frame store '{backend}', expected one of {FRAME_STORE_BACKENDS}.")
+
+    return backend
+
+
+def _container(root_dir: str, video_name: str) -> ContainerStore:
+    """Returns the shared ContainerStore of a video, so its index is read only once per process."""
+    path = os.path.abspath(os.path.join(root_dir, video_name + CONTAINER_EXTENSION))
+
+    with _containers_lock:
+        if path not in _containers:
+            _containers[path] = ContainerStore(root_dir, video_name)
+        return _containers[path]
+
+
+def open_frame_store(root_dir: str, video_name: str, backend: str = None) -> FrameStore:
+    """
+    Opens the frame store of a video under a root directory such as ``frames_dir``.
+
+    :param root_dir: Directory holding the frame stores of all videos.
+    :param video_name: Name of the video.
+    :param backend: "jpeg_dir" or "container", defaults to ``frame_store`` in setup.json.
+    """
+    if frame_store_backend(backend) == "container":
+        return _container(root_dir, video_name)
+
+    return JpegDirectoryStore(root_dir, video_name)
+
+
+def frame_store_at(video_dir: str, backend: str = None) -> FrameStore:
+    """
+    Opens the frame store that the JPEG-directory layout would keep in ``video_dir``.
+    """
+    video_dir = os.path.normpath(video_dir)
+    return open_frame_store(os.path.dirname(video_dir), os.path.basename(video_dir), backend)
+
+
+def list_videos(root_dir: str, backend: str = None) -> list[str]:
+    """
+    Returns the names of the videos with a frame store under a root directory.
+    """
+    if not os.path.isdir(root_dir):
+        return []
+
+    if frame_store_backend(backend) == "container":
+        return sorted(name[:-len(CONTAINER_EXTENSION)] for name in os.listdir(root_dir)
+                      if name.endswith(CONTAINER_EXTENSION))
+
+    return sorted(name for name in os.listdir(root_dir) if os.path.isdir(os.path.join(root_dir, name)))
+
+
+def _parse_reference(reference: str) -> tuple:
+    container_path, name = reference.rsplit(MEMBER_SEPARATOR, 1)
+    root_dir, container_name = os.path.split(container_path)
+
+    return _container(root_dir, container_name[:-len(CONTAINER_EXTENSION)]), name
+
+
+def read_frame(reference: str) -> bytes:
+    """
+    Returns the encoded frame a reference points to.
+    """
+    if MEMBER_SEPARATOR in reference:
+        store, name = _parse_reference(reference)
+        return store.read(name)
+
+    with open(reference, "rb") as f:
+        return f.read()
+
+
+def frame_fingerprint(reference: str) -> str:
+    """
+    Returns a string that changes whenever the frame a reference points to is replaced.
+    """
+    if MEMBER_SEPARATOR in reference:
+        store, name = _parse_reference(reference)
+        return store.fingerprint(name)
+
+    file_stat = os.stat(reference)
+    return f"{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+
+def frame_name(reference: str) -> str:
+    """
+    Returns the name of the frame a reference points to.
+    """
+    return reference.rsplit(MEMBER_SEPARATOR, 1)[1] if MEMBER_SEPARATOR in reference else os.path.basename(reference)
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decodes an encoded frame to a BGR image, or None if it cannot be decoded."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def encode_image(image: np.ndarray) -> bytes:
+    """Encodes a BGR image as JPEG with the same settings as cv2.imwrite."""
+    success, encoded = cv2.imencode(".jpg", image)
+    if not success:
+        raise ValueError("Could not encode frame as JPEG.")
+
+    return encoded.tobytes()
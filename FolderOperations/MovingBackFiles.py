@@ -14,17 +14,30 @@ def merge_folders(source_dir1: str, source_dir2: str, destination_dir: str) -> N
     os.makedirs(destination_dir, exist_ok=True)
 
     for source_dir in (source_dir1, source_dir2):
-        if not os.path.isdir(source_dir):
-            print(f"Warning: Source directory '{source_dir}' does not exist or is not a directory.")
-            continue
+        move_files(source_dir, destination_dir)
 
-        for file_name in os.listdir(source_dir):
-            source_file = os.path.join(source_dir, file_name)
-            destination_file = os.path.join(destination_dir, file_name)
 
-            if os.path.isfile(source_file):
-                destination_file = get_unique_filename(destination_file)
-                shutil.move(source_file, destination_file)
+def move_files(source_dir: str, destination_dir: str) -> None:
+    """
+    Moves the files of a source directory into a destination directory.
+    If duplicate file names exist, they are renamed to avoid overwriting.
+
+    :param source_dir: Source directory.
+    :param destination_dir: Directory the files are moved into.
+    """
+    if not os.path.isdir(source_dir):
+        print(f"Warning: Source directory '{source_dir}' does not exist or is not a directory.")
+        return
+
+    os.makedirs(destination_dir, exist_ok=True)
+
+    for file_name in os.listdir(source_dir):
+        source_file = os.path.join(source_dir, file_name)
+        destination_file = os.path.join(destination_dir, file_name)
+
+        if os.path.isfile(source_file):
+            destination_file = get_unique_filename(destination_file)
+            shutil.move(source_file, destination_file)
 
 
 def get_unique_filename(file_path: str) -> str:
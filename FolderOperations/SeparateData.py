@@ -1,12 +1,15 @@
 import os
+import json
 import shutil
 import re
 import pickle
-import glob
 from typing import List
+import FolderOperations.FrameStore as fs
 import ImageOperations.ImageNormalization as im
 import setup
 
+FRAME_PATTERN = re.compile(r"frame_(.+)_(\d{6})\.(\w+)")
+
 
 def ensure_directory_exists(path: str) -> None:
     """
@@ -40,10 +43,8 @@ def distribute_images(source_folder: str, input_train_folder: str, output_train_
     ensure_directory_exists(input_train_folder)
     ensure_directory_exists(output_train_folder)
 
-    pattern = re.compile(r"frame_(.+)_(\d{6})\.(\w+)")
-
     for filename in os.listdir(source_folder):
-        match = pattern.match(filename)
+        match = FRAME_PATTERN.match(filename)
         if match:
             frame_number = int(match.group(2))
             target_folder = input_train_folder if frame_number % 2 == 0 else output_train_folder
@@ -52,40 +53,101 @@ def distribute_images(source_folder: str, input_train_folder: str, output_train_
 
 def gather_image_paths(directory: str) -> List[str]:
     """
-    Collects all image file paths from a given directory.
+    Collects the references of all frames in the frame store of a video (see FrameStore).
+    With the JPEG-directory store these are the image file paths.
     :param directory: Path of the directory to search for image files.
     :return: List of image file paths.
     """
-    return glob.glob(os.path.join(directory, '*.jpg'))
+    return fs.frame_store_at(directory).references()
 
 
-def process_image_directories(source_folder: str, input_train_folder: str, output_train_folder: str) -> None:
+def build_triplets(frame_files: List[str]) -> List[List[str]]:
     """
-    Separates all image directories into training and testing sets.
-    Processes each directory in the source folder and moves images accordingly.
+    Indexes the training examples of a video without moving any frame: every odd-numbered frame is
+    the target between the even-numbered frames before and after it.
 
-    :param source_folder: Directory containing multiple image directories.
-    :param input_train_folder: Directory for storing training image directories.
-    :param output_train_folder: Directory for storing test image directories.
-    :param output_pickle: Path to store the computed mean and standard deviation of the dataset.
+    :param frame_files: File names of the frames of a single video.
+    :return: List of [previous, target, next] file names in frame order.
+    """
+    frames = {}
+    for filename in frame_files:
+        match = FRAME_PATTERN.fullmatch(filename)
+        if match:
+            frames[int(match.group(2))] = filename
+
+    return [[frames[number - 1], frames[number], frames[number + 1]]
+            for number in sorted(frames)
+            if number % 2 == 1 and number - 1 in frames and number + 1 in frames]
+
+
+def save_triplets(triplets: List[List[str]], triplets_path: str) -> None:
+    """
+    Atomically writes the triplet index of a video as JSON.
+    """
+    os.makedirs(os.path.dirname(triplets_path), exist_ok=True)
+    temp_path = f"{triplets_path}.tmp"
+
+    with open(temp_path, "w") as f:
+        json.dump(triplets, f)
+
+    os.replace(temp_path, triplets_path)
+
+
+def load_triplets(triplets_path: str) -> List[List[str]]:
+    """
+    Reads the triplet index of a video.
+    """
+    with open(triplets_path, "r") as f:
+        return json.load(f)
+
+
+def triplets_file(triplets_dir: str, video_name: str) -> str:
+    """
+    Returns the path of the triplet index of a video.
+    """
+    return os.path.join(triplets_dir, f"{video_name}.json")
+
+
+def index_video_frames(video_folder: str, triplets_path: str) -> int:
+    """
+    Builds and stores the triplet index of the frames of a single video.
+
+    :param video_folder: Directory containing all frames of the video.
+    :param triplets_path: Path of the triplet index file.
+    :return: Number of triplets.
     """
-    all_image_paths = []
+    triplets = build_triplets(fs.frame_store_at(video_folder).names())
+    save_triplets(triplets, triplets_path)
 
-    for frame_folder in os.listdir(source_folder):
-        source_path = os.path.join(source_folder, frame_folder)
-        train_path = os.path.join(input_train_folder, frame_folder)
-        test_path = os.path.join(output_train_folder, frame_folder)
+    return len(triplets)
 
-        distribute_images(source_path, train_path, test_path)
 
-        all_image_paths.extend(gather_image_paths(train_path))
-        all_image_paths.extend(gather_image_paths(test_path))
+def process_image_directories(source_folder: str, triplets_dir: str) -> None:
+    """
+    Separates all image directories into training inputs and targets by writing a triplet index per
+    video to the triplets directory. The frames stay where they are.
+
+    :param source_folder: Directory containing multiple image directories.
+    :param triplets_dir: Directory for storing the triplet index of every video.
+    """
+    for frame_folder in fs.list_videos(source_folder):
+        num_triplets = index_video_frames(os.path.join(source_folder, frame_folder),
+                                          triplets_file(triplets_dir, frame_folder))
 
-        print(f"Files separated in {frame_folder}")
+        print(f"Indexed {num_triplets} training triplets in {frame_folder}")
 
-    mean, std = im.compute_dataset_mean_std(all_image_paths)
 
+def save_mean_std(video_image_paths: dict) -> None:
+    """
+    Merges the cached per-video statistics into the dataset mean and standard deviation and stores them.
+
+    :param video_image_paths: Mapping of video name to the file paths of its frames.
+    """
     paths = setup.get_paths()
+    values = setup.get_values()
+
+    mean, std = im.compute_videos_mean_std(video_image_paths, paths['stats_cache'], values['stats_workers'],
+                                           values['stats_sample_frames'])
 
     with open(paths['mean_std_file'], 'wb') as f:
         pickle.dump((mean, std), f)
@@ -0,0 +1,311 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import time
+
+import cv2
+import tensorflow as tf
+
+import FolderOperations.FrameStore as fs
+import ImageOperations.GenerateFrames as gen
+from utilities.jobqueue import FileJobQueue
+import utilities.telemetry as telemetry
+import utilities.utils as utils
+import setup
+
+
+def split_frame_range(num_frames: int, num_chunks: int) -> list[tuple]:
+    """
+    Splits the frames of a video into chunks that share their boundary frame, so every pair of
+    consecutive frames belongs to exactly one chunk.
+
+    :param num_frames: Number of source frames of the video.
+    :param num_chunks: Requested number of chunks, reduced if the video has fewer pairs.
+    :return: (first, last) frame index of every chunk, both inclusive.
+    """
+    num_pairs = num_frames - 1
+    if num_pairs <= 0:
+        return []
+
+    num_chunks = max(1, min(num_chunks, num_pairs))
+    bounds = [k * num_pairs // num_chunks for k in range(num_chunks + 1)]
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def chunk_output_path(output_dir: str, video_name: str, chunk: int) -> str:
+    """Returns the directory the generated frames of a chunk are written to."""
+    return os.path.join(output_dir, f"{video_name}.chunk{chunk:03d}")
+
+
+def worker_cpu_sets(num_workers: int) -> list[list[int]]:
+    """
+    Splits the CPUs available to this process evenly between workers. With fewer CPUs than
+    workers, workers share CPUs.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+
+    if len(cpus) < num_workers:
+        return [[cpus[k % len(cpus)]] for k in range(num_workers)]
+
+    per_worker = len(cpus) // num_workers
+    return [cpus[k * per_worker:(k + 1) * per_worker] for k in range(num_workers)]
+
+
+def pin_worker_threads(num_threads: int, cpus: list[int] = None) -> None:
+    """
+    Restricts a worker process to a set of CPUs and sizes the TensorFlow and OpenCV thread pools to
+    match, so workers sharing a machine do not oversubscribe it. Must run before TensorFlow
+    executes its first operation in the process.
+
+    :param num_threads: Threads per pool, 0 for one per CPU of the worker.
+    :param cpus: CPUs the worker may run on, all CPUs if not given. Only applied on Linux.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    num_threads = num_threads or len(cpus or []) or os.cpu_count() or 1
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(num_threads)
+    cv2.setNumThreads(num_threads)
+
+
+# Settings that change the frames a chunk generates.
+OUTPUT_SETTINGS = ("interpolator", "prefer_serving_model", "tiled_inference", "tile_overlap", "interpolation_factor",
+                   "target_fps", "pair_detection", "static_pair_threshold", "scene_cut_threshold")
+
+
+def chunk_fingerprint(input_store: fs.FrameStore, frame_files: list[str]) -> str:
+    """
+    Fingerprints the source frames of a chunk by their names and the contents of its boundary
+    frames, without reading every frame.
+    """
+    digest = hashlib.sha1()
+    for frame_file in frame_files:
+        digest.update(fs.frame_name(frame_file).encode())
+    for frame_file in (frame_files[0], frame_files[-1]):
+        digest.update(fs.read_frame(frame_file))
+
+    return digest.hexdigest()
+
+
+def queue_video_chunks(job_queue: FileJobQueue, input_dir: str, video_name: str, output_dir: str,
+                       model_path: str, num_chunks: int) -> list[str]:
+    """
+    Adds one generation job per chunk of a video to the queue. Jobs record the model, the output
+    settings and a fingerprint of their source frames, so chunks left done by an interrupted run
+    are only reused if none of them changed.
+
+    :return: Ids of the jobs of the video.
+    """
+    input_store = fs.open_frame_store(input_dir, video_name)
+    frame_files, _ = gen.source_frames(input_store)
+    inference_params = setup.get_inference_params()
+    settings = {name: inference_params[name] for name in OUTPUT_SETTINGS}
+    job_ids = []
+
+    for chunk, (first, last) in enumerate(split_frame_range(len(frame_files), num_chunks)):
+        job_id = f"{video_name}.chunk{chunk:03d}"
+        output_path = chunk_output_path(output_dir, video_name, chunk)
+        queued = job_queue.submit(job_id, {
+            "video": video_name,
+            "input_dir": input_dir,
+            "output_path": output_path,
+            "model_path": model_path,
+            "num_frames": len(frame_files),
+            "first": first,
+            "last": last,
+            "settings": settings,
+            "input_fingerprint": chunk_fingerprint(input_store, frame_files[first:last + 1]),
+        })
+        if queued:
+            # Frames left by an earlier attempt may come from other inputs or settings.
+            fs.frame_store_at(output_path).remove()
+        job_ids.append(job_id)
+
+    return job_ids
+
+
+def generate_chunk(interpolator, job_id: str, job: dict, inference_params: dict, mean, std) -> int:
+    """
+    Generates the frames of the pairs in one chunk of a video.
+
+    :return: Number of frames generated.
+    """
+    frame_files, stems = gen.source_frames(fs.open_frame_store(job['input_dir'], job['video']))
+    if len(frame_files) != job['num_frames']:
+        raise ValueError(f"{job['video']} has {len(frame_files)} source frames, the job was queued "
+                         f"for {job['num_frames']}.")
+
+    with telemetry.track_stage("generate", job_id) as record:
+        record.frames, occupancy = gen.interpolate_video(interpolator, job['video'],
+                                                         frame_files[job['first']:job['last'] + 1], stems,
+                                                         job['output_path'], inference_params, mean, std)
+        record.details.update(occupancy)
+
+    return record.frames
+
+
+def run_worker(queue_dir: str, num_threads: int = 0, cpus: list[int] = None) -> int:
+    """
+    Generates chunks from the job queue until no job is pending. Every worker process loads its
+    own interpolator the first time it claims a job.
+
+    :param queue_dir: Directory of the job queue, shared by all workers.
+    :param num_threads: Threads per TensorFlow and OpenCV pool, see pin_worker_threads.
+    :param cpus: CPUs the worker may run on.
+    :return: Number of jobs completed.
+    """
+    pin_worker_threads(num_threads, cpus)
+
+    inference_params = setup.get_inference_params()
+    job_queue = FileJobQueue(queue_dir, inference_params['job_lease_seconds'])
+    interpolators = {}
+    mean, std = None, None
+    completed = 0
+
+    while (job := job_queue.claim()) is not None:
+        job_id, payload = job
+        try:
+            if payload['model_path'] not in interpolators:
+                mean, std = utils.load_mean_std_file()
+                interpolators[payload['model_path']] = gen.load_interpolator(payload['model_path'], mean, std)
+
+            with job_queue.keep_alive(job_id):
+                generate_chunk(interpolators[payload['model_path']], job_id, payload, inference_params, mean, std)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            job_queue.fail(job_id, f"{type(e).__name__}: {e}")
+            continue
+
+        job_queue.complete(job_id)
+        completed += 1
+
+    return completed
+
+
+def run_local_workers(queue_dir: str, num_workers: int, num_threads: int = 0) -> None:
+    """
+    Runs workers in separate processes on this machine, each pinned to its share of the CPUs,
+    until no job is pending.
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(queue_dir, num_threads, cpus))
+                 for cpus in worker_cpu_sets(num_workers)]
+
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def wait_for_jobs(job_queue: FileJobQueue, num_workers: int, num_threads: int = 0,
+                  poll_seconds: float = 1.0) -> None:
+    """
+    Works on the queue with local workers until every job is done or failed. Jobs still running on
+    other machines are waited for, and requeued jobs of crashed workers are picked up again.
+    """
+    while True:
+        counts = job_queue.counts()
+        if counts['pending']:
+            run_local_workers(job_queue.queue_dir, num_workers, num_threads)
+        elif counts['running']:
+            time.sleep(poll_seconds)
+            job_queue.requeue_expired()
+        else:
+            return
+
+
+def stitch_video_chunks(input_store: fs.FrameStore, chunk_stores: list[fs.FrameStore], frame_files: list[str],
+                        fractions: list[float]) -> int:
+    """
+    Checks that the chunks of a video together hold every generated frame exactly once and moves
+    them into the store of the video.
+
+    :return: Number of frames stitched.
+    """
+    chunk_names = set()
+    for chunk_store in chunk_stores:
+        names = set(chunk_store.names())
+        duplicates = chunk_names & names
+        if duplicates:
+            raise ValueError(f"Frames generated by more than one chunk: {sorted(duplicates)[:5]}")
+        chunk_names |= names
+
+    existing = {os.path.splitext(name)[0] for name in chunk_names | set(input_store.names())}
+    missing = gen.first_incomplete_pair(frame_files, existing, fractions)
+    if missing < len(frame_files) - 1:
+        raise ValueError(f"Generated frames after {fs.frame_name(frame_files[missing])} are missing.")
+
+    for chunk_store in chunk_stores:
+        chunk_store.move_into(input_store)
+
+    return len(chunk_names)
+
+
+def generate_video_frames_chunked(input_dir: str, model_path: str, output_dir: str) -> None:
+    """
+    Generates frames like generate_video_frames, with every video split into ``generation_chunks``
+    chunks of consecutive frames (see setup.json) that are generated by as many worker processes.
+
+    Chunks overlap by one frame, the last frame of a chunk being the first of the next, so every
+    frame pair is interpolated by exactly one chunk. The chunks are coordinated through a job queue
+    in ``metadata/generation_jobs``; further workers on machines sharing the data directory can be
+    started with ``python -m ImageOperations.ChunkedGeneration``. Once every chunk is done, the
+    generated frames are checked for gaps and duplicates and moved next to the source frames.
+
+    :param input_dir: Directory containing input video frames.
+    :param model_path: Path to the trained model, unused by the optical flow interpolators.
+    :param output_dir: Directory to save generated frames.
+    """
+    inference_params = setup.get_inference_params()
+    num_chunks = inference_params['chunks']
+    job_queue = FileJobQueue(setup.get_paths()['generation_jobs'], inference_params['job_lease_seconds'])
+
+    videos = {}
+    for video_name in fs.list_videos(input_dir):
+        videos[video_name] = queue_video_chunks(job_queue, input_dir, video_name, output_dir, model_path,
+                                                num_chunks)
+
+    wait_for_jobs(job_queue, num_chunks, inference_params['worker_threads'])
+
+    failed = job_queue.jobs("failed")
+    if failed:
+        raise RuntimeError(f"Generation jobs failed: {', '.join(failed)}. See {job_queue.queue_dir}/failed.")
+
+    for video_name, job_ids in videos.items():
+        if not job_ids:
+            continue
+
+        input_store = fs.open_frame_store(input_dir, video_name)
+        frame_files, _ = gen.source_frames(input_store)
+        levels = gen.video_interpolation_levels(video_name, inference_params['interpolation_factor'],
+                                                inference_params['target_fps'])
+        fractions = [k / 2 ** levels for k in range(1, 2 ** levels)]
+        chunk_stores = [fs.frame_store_at(job_queue.read("done", job_id)['output_path']) for job_id in job_ids]
+
+        with telemetry.track_stage("stitch", video_name) as record:
+            record.frames = stitch_video_chunks(input_store, chunk_stores, frame_files, fractions)
+
+    job_queue.clear()
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate queued video chunks until no job is pending.")
+    parser.add_argument("--queue-dir", default=None, help="Job queue directory, defaults to the configured one.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes on this machine.")
+    parser.add_argument("--threads", type=int, default=0, help="Threads per worker, 0 for its share of the CPUs.")
+    args = parser.parse_args()
+
+    job_queue = FileJobQueue(args.queue_dir or setup.get_paths()['generation_jobs'])
+    run_local_workers(job_queue.queue_dir, args.workers, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,50 @@
 import os
 import pickle
-import cv2
 import numpy as np
 import tensorflow as tf
 from sklearn.utils import shuffle
 
 import setup
+import FolderOperations.FrameStore as fs
+import FolderOperations.SeparateData as ttd
 from ImageOperations.ImageNormalization import normalize_image
+import utilities.profiling as profiling
 import utilities.utils as utils
 
 
 def load_image(image_path: str, img_height: int, img_width: int, num_channels: int) -> np.ndarray:
     """
-    Load and decode an image from a file.
+    Load and decode an image from a file or frame store reference.
     """
-    image = tf.io.read_file(image_path)
+    image = fs.read_frame(image_path)
     image = tf.image.decode_jpeg(image, channels=num_channels)
     image = tf.image.resize(image, [img_height, img_width])
     return (image / 255.0).numpy()
 
 
+def load_image_uint8(image_path: str, img_height: int, img_width: int, num_channels: int) -> np.ndarray:
+    """
+    Load and decode an image from a file or frame store reference as raw uint8 pixels, resizing only
+    if its size differs.
+    """
+    image = fs.read_frame(image_path)
+    image = tf.image.decode_jpeg(image, channels=num_channels)
+
+    if tuple(image.shape[:2]) != (img_height, img_width):
+        image = tf.image.resize(image, [img_height, img_width])
+        image = tf.cast(tf.round(tf.clip_by_value(image, 0, 255)), tf.uint8)
+
+    return image.numpy()
+
+
+def load_image_shape(image_path: str) -> tuple:
+    """
+    Read the (height, width, channels) of a JPEG image from its header without decoding the pixels.
+    """
+    image = fs.read_frame(image_path)
+    return tuple(int(dim) for dim in tf.image.extract_jpeg_shape(image).numpy())
+
+
 def preprocess_image(image: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.array:
     """
     Normalize an image using mean and standard deviation.
@@ -30,10 +55,10 @@ def preprocess_image(image: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np
 def load_and_preprocess_image(image_path: str, img_height: int, img_width: int, num_channels: int, mean: np.ndarray,
                               std: np.ndarray) -> np.ndarray:
     """
-    Load, normalize, and preprocess an image.
+    Load, normalize, and preprocess an image as float32.
     """
     image = load_image(image_path, img_height, img_width, num_channels)
-    return preprocess_image(image, mean, std)
+    return preprocess_image(image, mean, std).astype(np.float32)
 
 
 def save_preprocessed_data(folder: str, filename: str, data_key: str, data: np.ndarray) -> None:
@@ -44,24 +69,50 @@ def save_preprocessed_data(folder: str, filename: str, data_key: str, data: np.n
     np.savez_compressed(os.path.join(folder, filename), **{data_key: data})
 
 
-def preprocess_dataset(input_folder: str, output_folder: str, processed_input_folder: str, processed_output_folder: str,
-                       batch_size_percent: int = 1) -> None:
+def save_shard(folder: str, filename: str, data: np.ndarray) -> None:
     """
-    Preprocess images from input and output folders and store them in batches.
+    Save a shard of raw uint8 frames as an uncompressed .npy file that can be memory-mapped.
     """
-    base_folder = os.path.basename(input_folder)
+    os.makedirs(folder, exist_ok=True)
+    np.save(os.path.join(folder, filename), data)
+
 
-    input_paths = sorted([os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith(".jpg")])
-    output_paths = sorted([os.path.join(output_folder, f) for f in os.listdir(output_folder) if f.endswith(".jpg")])
+def load_shard(shard_path: str) -> np.ndarray:
+    """
+    Open a .npy shard memory-mapped, without reading it into RAM.
+    """
+    return np.load(shard_path, mmap_mode='r')
 
-    paired_input_paths = [[input_paths[i], input_paths[i + 1]] for i in range(len(input_paths) - 1)]
-    min_length = min(len(paired_input_paths), len(output_paths))
-    paired_input_paths, output_paths = shuffle(paired_input_paths[:min_length], output_paths[:min_length],
-                                               random_state=42)
+
+def normalize_shard(data: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """
+    Normalize raw uint8 frames from a shard using mean and standard deviation.
+    """
+    return normalize_image(data.astype(np.float32) / 255.0, mean.astype(np.float32), std.astype(np.float32))
+
+
+def preprocess_dataset(frames_folder: str, triplets: list[list[str]], processed_input_folder: str,
+                       processed_output_folder: str, batch_size_percent: int = 1) -> None:
+    """
+    Store the raw uint8 frames of a video's (previous, target, next) triplets in batches of .npy shards,
+    reading them directly from the video's frame store.
+    Normalization is applied when the shards are read for training.
+
+    :param frames_folder: Directory containing all frames of the video.
+    :param triplets: [previous, target, next] frame file names, see SeparateData.build_triplets.
+    """
+    base_folder = os.path.basename(frames_folder)
+
+    if not triplets:
+        print(f"No training triplets in {base_folder}, skipping.")
+        return
+
+    triplets = shuffle(triplets, random_state=42)
 
     paths = setup.get_paths()
 
-    dim_image = cv2.imread(paired_input_paths[0][0]).shape
+    frame_store = fs.frame_store_at(frames_folder)
+    dim_image = frame_store.read_image(triplets[0][0]).shape
     img_height, img_width, num_channels = dim_image
 
     dim_path = os.path.join(paths['dataset_dimensions'], f"dims_{base_folder}.pkl")
@@ -69,39 +120,69 @@ def preprocess_dataset(input_folder: str, output_folder: str, processed_input_fo
     with open(dim_path, "wb") as f:
         pickle.dump((img_height, img_width, num_channels), f)
 
-    mean, std = utils.load_mean_std_file()
-
-    batch_size = max(1, (len(paired_input_paths) * batch_size_percent) // 100)
+    batch_size = max(1, (len(triplets) * batch_size_percent) // 100)
 
-    for i in range(0, len(paired_input_paths), batch_size):
-        input_chunk = paired_input_paths[i:i + batch_size]
-        output_chunk = output_paths[i:i + batch_size]
+    def load(frame_file):
+        return load_image_uint8(frame_store.reference(frame_file), img_height, img_width, num_channels)
 
-        input_data = np.array([
-            [load_and_preprocess_image(img1, img_height, img_width, num_channels, mean, std),
-             load_and_preprocess_image(img2, img_height, img_width, num_channels, mean, std)]
-            for img1, img2 in input_chunk
-        ])
+    for i in range(0, len(triplets), batch_size):
+        chunk = triplets[i:i + batch_size]
 
-        output_data = np.array([
-            load_and_preprocess_image(img, img_height, img_width, num_channels, mean, std) for img in output_chunk
-        ])
+        input_data = np.array([[load(previous), load(following)] for previous, _, following in chunk],
+                              dtype=np.uint8)
+        output_data = np.array([load(target) for _, target, _ in chunk], dtype=np.uint8)
 
-        save_preprocessed_data(processed_input_folder, f"trainData_{base_folder}_{i:06d}.npz", "input", input_data)
-        save_preprocessed_data(processed_output_folder, f"testData_{base_folder}_{i:06d}.npz", "output", output_data)
+        save_shard(processed_input_folder, f"trainData_{base_folder}_{i:06d}.npy", input_data)
+        save_shard(processed_output_folder, f"testData_{base_folder}_{i:06d}.npy", output_data)
+        profiling.advance(len(chunk))
 
-    print(f"Processed files from {base_folder} to npz.")
+    print(f"Processed files from {base_folder} to npy.")
 
 
-def preprocess_video_frames(input_train_folder: str, output_train_folder: str, processed_input_folder: str,
+def preprocess_video_frames(frames_folder: str, triplets_folder: str, processed_input_folder: str,
                             processed_output_folder: str, batch_size_percent: int = 1) -> None:
     """
-    Preprocess frames from multiple video directories.
+    Preprocess frames from multiple video directories using their triplet indexes.
     """
-    for folder in os.listdir(input_train_folder):
-        input_path = os.path.join(input_train_folder, folder)
-        output_path = os.path.join(output_train_folder, folder)
+    for folder in fs.list_videos(frames_folder):
+        triplets = ttd.load_triplets(ttd.triplets_file(triplets_folder, folder))
         processed_input_path = os.path.join(processed_input_folder, folder)
         processed_output_path = os.path.join(processed_output_folder, folder)
 
-        preprocess_dataset(input_path, output_path, processed_input_path, processed_output_path, batch_size_percent)
+        preprocess_dataset(os.path.join(frames_folder, folder), triplets, processed_input_path,
+                           processed_output_path, batch_size_percent)
+
+
+def convert_npz_shard(npz_path: str, data_key: str, mean: np.ndarray, std: np.ndarray) -> str:
+    """
+    Convert a normalized float .npz shard to a raw uint8 .npy shard next to it and remove the .npz file.
+    """
+    data = np.load(npz_path)[data_key]
+    pixels = np.clip(np.round((data * std + mean) * 255.0), 0, 255).astype(np.uint8)
+
+    npy_path = os.path.splitext(npz_path)[0] + ".npy"
+    np.save(npy_path, pixels)
+    os.remove(npz_path)
+
+    return npy_path
+
+
+def convert_npz_dataset(processed_folder: str, data_key: str) -> None:
+    """
+    Convert every .npz shard of every video in a processed dataset folder to the .npy shard format.
+    """
+    mean, std = utils.load_mean_std_file()
+
+    for folder in os.listdir(processed_folder):
+        folder_path = os.path.join(processed_folder, folder)
+        for file in sorted(os.listdir(folder_path)):
+            if file.endswith(".npz"):
+                convert_npz_shard(os.path.join(folder_path, file), data_key, mean, std)
+
+        print(f"Converted npz shards of {folder} to npy.")
+
+
+if __name__ == '__main__':
+    paths = setup.get_paths()
+    convert_npz_dataset(paths['input_training_dataset'], "input")
+    convert_npz_dataset(paths['output_training_dataset'], "output")
@@ -0,0 +1,160 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import tensorflow as tf
+
+from FolderOperations.FrameStore import FrameStore
+
+
+class QueueOccupancy:
+    """
+    Samples how many items wait in a bounded queue each time the next item is taken from or put
+    into it.
+
+    A reader queue that is mostly full means the stage after it is the bottleneck, a mostly empty
+    one that the reader is; a writer queue that is mostly full means encoding and writing are.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples = 0
+        self.total = 0
+        self.full = 0
+
+    def sample(self, size: int) -> None:
+        self.samples += 1
+        self.total += size
+        self.full += size >= self.capacity
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+    @property
+    def full_fraction(self) -> float:
+        return self.full / self.samples if self.samples else 0.0
+
+    def summary(self) -> str:
+        return f"{self.mean:.1f}/{self.capacity} ({self.full_fraction:.0%} full)"
+
+
+class FrameReader:
+    """
+    Decodes frames ahead of the inference stage on a thread pool. At most ``queue_size`` frames are
+    decoded ahead, and frames are returned in the order of ``frame_files`` whichever thread finished first.
+    """
+
+    def __init__(self, frame_files: Iterable[str], loader: Callable[[str], np.ndarray], num_workers: int = 2,
+                 queue_size: int = 16):
+        """
+        :param frame_files: References of the frames to read, in order.
+        :param loader: Function decoding and preprocessing one frame.
+        :param num_workers: Number of decoding threads.
+        :param queue_size: Maximum number of frames decoded ahead.
+        """
+        self.frame_files = frame_files
+        self.loader = loader
+        self.num_workers = max(1, num_workers)
+        self.occupancy = QueueOccupancy(max(1, queue_size))
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        frame_files = iter(self.frame_files)
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            pending = deque(executor.submit(self.loader, frame_file)
+                            for _, frame_file in zip(range(self.occupancy.capacity), frame_files))
+
+            try:
+                while pending:
+                    self.occupancy.sample(sum(future.done() for future in pending))
+                    frame = pending.popleft().result()
+
+                    next_file = next(frame_files, None)
+                    if next_file is not None:
+                        pending.append(executor.submit(self.loader, next_file))
+
+                    yield frame
+            finally:
+                # Frames decoded ahead are not needed when the reader is closed early.
+                for future in pending:
+                    future.cancel()
+
+
+def encode_jpeg(frame: np.ndarray) -> bytes:
+    """Encodes an RGB uint8 frame as JPEG."""
+    return tf.image.encode_jpeg(frame).numpy()
+
+
+class FrameWriter:
+    """
+    Encodes frames on a thread pool and writes them to a frame store from one writer thread.
+
+    Frames are written in the order they were submitted, so a container store gets the same
+    layout on every run. Once ``queue_size`` frames wait to be written, submit blocks until the
+    writer catches up.
+    """
+
+    def __init__(self, frame_store: FrameStore, num_workers: int = 2, queue_size: int = 16):
+        """
+        :param frame_store: Store the frames are written to.
+        :param num_workers: Number of encoding threads.
+        :param queue_size: Maximum number of frames waiting to be encoded or written.
+        """
+        self.frame_store = frame_store
+        self.occupancy = QueueOccupancy(max(1, queue_size))
+        self._encoder = ThreadPoolExecutor(max_workers=max(1, num_workers))
+        self._queue = queue.Queue(maxsize=self.occupancy.capacity)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_frames, daemon=True)
+        self._thread.start()
+
+    def _write_frames(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            name, encoded = item
+            try:
+                self.frame_store.write(name, encoded.result())
+            except BaseException as e:
+                self._error = self._error or e
+
+    def submit(self, name: str, frame: np.ndarray) -> None:
+        """Queues an RGB uint8 frame to be encoded as JPEG and written."""
+        self._put(name, self._encoder.submit(encode_jpeg, frame))
+
+    def submit_encoded(self, name: str, data: bytes) -> None:
+        """Queues an already encoded frame to be written."""
+        self._put(name, self._encoder.submit(lambda: data))
+
+    def _put(self, name: str, encoded) -> None:
+        if self._error is not None:
+            raise self._error
+
+        self.occupancy.sample(self._queue.qsize())
+        self._queue.put((name, encoded))
+
+    def close(self) -> None:
+        """Waits until every queued frame is written and raises the first write error, if any."""
+        self._queue.put(None)
+        self._thread.join()
+        self._encoder.shutdown()
+
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.close()
+        except BaseException:
+            # A write error must not replace the exception that ended the block.
+            if exc_type is None:
+                raise
@@ -1,32 +1,121 @@
 import os
-import glob
 import shutil
 
-import cv2
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras import backend as K
-import gc
 
+import CreatingModel.ExportModel as em
+import CreatingModel.Model as ml
 import ImageOperations.ConvertingData as cd
+from ImageOperations.FramePipeline import FrameReader, FrameWriter
 import ImageOperations.ImageNormalization as im
-import FolderOperations.MovingBackFiles as mf
+from ImageOperations.Interpolators import Interpolator, OpticalFlowInterpolator
+import ImageOperations.PairDetection as pd
+import ImageOperations.TiledInference as ti
+import FolderOperations.FrameStore as fs
+import VideoOperations.FrameTimeline as tl
+import VideoOperations.InterpolatedImages as ii
+import utilities.profiling as profiling
+import utilities.telemetry as telemetry
 import utilities.utils as utils
+import setup
 
 
 def calculate_frames_mean_std(input_dir: str) -> tuple:
     """Calculates mean and standard deviation of the given frames"""
-    all_image_paths = []
+    video_image_paths = {}
 
-    for frame_folder in os.listdir(input_dir):
-        source_path = os.path.join(input_dir, frame_folder)
-        all_image_paths.extend(glob.glob(os.path.join(source_path, '*.jpg')))
+    for frame_folder in fs.list_videos(input_dir):
+        video_image_paths[frame_folder] = fs.open_frame_store(input_dir, frame_folder).references()
 
-    mean, std = im.compute_dataset_mean_std(all_image_paths)
+    paths = setup.get_paths()
+    values = setup.get_values()
+
+    mean, std = im.compute_videos_mean_std(video_image_paths, paths['stats_cache'], values['stats_workers'],
+                                           values['stats_sample_frames'])
 
     return mean, std
 
 
+def load_inference_model(model_path: str, mixed_precision: str = "",
+                         prefer_serving_model: bool = True) -> tf.keras.models.Model:
+    """
+    Loads a trained model for inference.
+
+    The XLA-compiled serving artifact exported after training is used when it exists and matches
+    the requested precision, which skips rebuilding and retracing the Keras model.
+
+    If a mixed precision policy is given and the model was saved in another precision, its weights
+    are copied into a model rebuilt under that policy, so inference runs in reduced precision end to end.
+    """
+    serving_path = em.serving_model_path(model_path)
+    if prefer_serving_model and os.path.isdir(serving_path):
+        serving_model = em.ServingModel(serving_path)
+        expected_dtype = tf.keras.mixed_precision.Policy(mixed_precision or "float32").compute_dtype
+        if serving_model.inputs[0].dtype.name == expected_dtype:
+            print(f"Using serving model {serving_path}")
+            return serving_model
+
+    model = tf.keras.models.load_model(model_path)
+
+    if not mixed_precision:
+        return model
+
+    tf.keras.mixed_precision.set_global_policy(mixed_precision)
+    if tf.as_dtype(model.inputs[0].dtype).name == tf.keras.mixed_precision.global_policy().compute_dtype:
+        return model
+
+    _, img_height, img_width, num_channels = model.inputs[0].shape
+    reduced_model = ml.create_image_translation_model(img_height, img_width, num_channels)
+    reduced_model.set_weights(model.get_weights())
+
+    return reduced_model
+
+
+def predict_batch(model: tf.keras.models.Model, first_frames: np.ndarray, second_frames: np.ndarray) -> np.ndarray:
+    """
+    Runs a batch of frame pairs through the model, cast to the model's input dtype, and returns float32 output.
+    """
+    input_dtype = model.inputs[0].dtype
+    predictions = model.predict_on_batch([tf.cast(first_frames, input_dtype), tf.cast(second_frames, input_dtype)])
+
+    return np.asarray(predictions, dtype=np.float32)
+
+
+def predict_frames(model: tf.keras.models.Model, first_frames: np.ndarray, second_frames: np.ndarray,
+                   tile_overlap: int = None, tile_batch_size: int = 16) -> np.ndarray:
+    """
+    Runs a batch of frame pairs through the model. If a tile overlap is given and the frames do not
+    match the trained resolution, they are processed as overlapping tiles of the trained size.
+    """
+    _, tile_height, tile_width, _ = model.inputs[0].shape
+
+    if tile_overlap is None or tuple(first_frames.shape[1:3]) == (tile_height, tile_width):
+        return predict_batch(model, first_frames, second_frames)
+
+    return ti.predict_tiled(lambda first_tiles, second_tiles: predict_batch(model, first_tiles, second_tiles),
+                            first_frames, second_frames, tile_height, tile_width, tile_overlap, tile_batch_size)
+
+
+def denormalize_frames(frames: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """
+    Converts normalized model outputs back to uint8 RGB frames.
+    """
+    return (im.denormalize_image(frames, mean, std) * 255).astype(np.uint8)
+
+
+def process_frame_batch(model: tf.keras.models.Model, first_frames: np.ndarray, second_frames: np.ndarray,
+                        mean: np.ndarray, std: np.ndarray, tile_overlap: int = None,
+                        tile_batch_size: int = 16) -> np.ndarray:
+    """
+    Generates predicted frames for a batch of frame pairs and denormalizes them.
+    Frames of the trained resolution are predicted in a single forward pass, others are tiled.
+    """
+    predictions = predict_frames(model, first_frames, second_frames, tile_overlap, tile_batch_size)
+
+    return denormalize_frames(predictions, mean, std)
+
+
 def process_frame_pair(model: tf.keras.models.Model, first_frame: np.ndarray, second_frame: np.ndarray,
                        mean: np.ndarray, std: np.ndarray) -> np.ndarray:
     """
@@ -35,59 +124,278 @@ def process_frame_pair(model: tf.keras.models.Model, first_frame: np.ndarray, se
     first_frame = first_frame.reshape(1, *first_frame.shape)
     second_frame = second_frame.reshape(1, *second_frame.shape)
 
-    prediction = model.predict([first_frame, second_frame])[0]
-    prediction_denormalized = im.denormalize_image(prediction, mean, std)
-    np.clip(prediction_denormalized, 0, 1, out=prediction_denormalized)
+    return process_frame_batch(model, first_frame, second_frame, mean, std)[0]
+
+
+class KerasInterpolator(Interpolator):
+    """
+    Interpolator running the trained image translation model, tiled if the frames do not match
+    the trained resolution.
+    """
+
+    def __init__(self, model: tf.keras.models.Model, tile_overlap: int = None, tile_batch_size: int = 16):
+        self.model = model
+        self.tile_overlap = tile_overlap
+        self.tile_batch_size = tile_batch_size
+
+    def interpolate(self, first_frames: np.ndarray, second_frames: np.ndarray) -> np.ndarray:
+        return predict_frames(self.model, first_frames, second_frames, self.tile_overlap, self.tile_batch_size)
+
+
+def load_interpolator(model_path: str, mean: np.ndarray, std: np.ndarray) -> Interpolator:
+    """
+    Creates the interpolator selected by ``interpolator`` in setup.json: "keras" for the trained
+    model, or "dis" / "farneback" for OpenCV optical flow, which needs no model.
+    """
+    inference_params = setup.get_inference_params()
+    backend = inference_params['interpolator']
+
+    if backend != "keras":
+        print(f"Using {backend} optical flow interpolation.")
+        return OpticalFlowInterpolator(mean, std, backend)
+
+    model = load_inference_model(model_path, setup.get_model_params()['mixed_precision'],
+                                 inference_params['prefer_serving_model'])
+    tile_overlap = inference_params['tile_overlap'] if inference_params['tiled_inference'] else None
+
+    return KerasInterpolator(model, tile_overlap, inference_params['tile_batch_size'])
+
+
+def interpolate_pairs(interpolator: Interpolator, first_frames: np.ndarray, second_frames: np.ndarray,
+                      levels: int) -> dict:
+    """
+    Generates the intermediate frames of a batch of pairs by recursive bisection.
+
+    Each level generates the midpoints between the frames of the previous level. The normalized
+    midpoints are kept in memory and fed back as inputs, so no midpoint is computed or decoded
+    twice, and all midpoints of a level are passed to the interpolator in one call.
+
+    :param levels: Number of bisection levels, 1 for the single midpoint, 2 for quarters, ...
+    :return: Dictionary mapping every position between 0 and 1 to the normalized frames of the batch.
+    """
+    frames = {0.0: first_frames, 1.0: second_frames}
+
+    for level in tl.bisection_levels(levels):
+        lefts = np.concatenate([frames[left] for left, _, _ in level])
+        rights = np.concatenate([frames[right] for _, right, _ in level])
+        predictions = interpolator.interpolate(lefts, rights)
+
+        for index, (_, _, middle) in enumerate(level):
+            frames[middle] = predictions[index * len(first_frames):(index + 1) * len(first_frames)]
+
+    return frames
+
+
+def save_generated_frames(predicted_frames: np.ndarray, frame_names: list[str], frame_writer: FrameWriter,
+                          fraction: float = 0.5) -> None:
+    """
+    Queues a batch of generated frames for writing, each named after the first frame of its pair and
+    its position within the pair (``_5`` for the midpoint, ``_25`` for a quarter, ...).
+    """
+    suffix = tl.position_suffix(fraction)
 
-    return (prediction_denormalized * 255).astype(np.uint8)
+    for predicted_frame, frame_name in zip(predicted_frames, frame_names):
+        frame_writer.submit(f"{frame_name}_{suffix}.jpg", predicted_frame)
+
+
+def save_interpolated_batch(interpolator: Interpolator, first_frames: list, second_frames: list,
+                            frame_names: list[str], levels: int, mean: np.ndarray, std: np.ndarray,
+                            frame_writer: FrameWriter) -> None:
+    """
+    Interpolates a batch of frame pairs and queues every generated frame for writing.
+    """
+    interpolated = interpolate_pairs(interpolator, np.stack(first_frames), np.stack(second_frames), levels)
+
+    for fraction, predictions in interpolated.items():
+        if 0 < fraction < 1:
+            save_generated_frames(denormalize_frames(predictions, mean, std), frame_names, frame_writer, fraction)
+
+
+def copy_source_frame(frame_file: str, frame_name: str, fractions: list[float], frame_writer: FrameWriter) -> None:
+    """
+    Fills every generated position of a pair with a copy of its first frame, used for static pairs
+    and for pairs that cross a scene cut.
+    """
+    frame_data = fs.read_frame(frame_file)
+
+    for fraction in fractions:
+        frame_writer.submit_encoded(f"{frame_name}_{tl.position_suffix(fraction)}.jpg", frame_data)
+
+
+def first_incomplete_pair(frame_files: list[str], existing_stems: set, fractions: list[float]) -> int:
+    """
+    Returns the index of the first frame pair that is missing any of its generated frames, so an
+    interrupted generation resumes there.
+    """
+    suffixes = [tl.position_suffix(fraction) for fraction in fractions]
+
+    for i, frame_file in enumerate(frame_files[:-1]):
+        frame_name = os.path.splitext(fs.frame_name(frame_file))[0]
+        if any(f"{frame_name}_{suffix}" not in existing_stems for suffix in suffixes):
+            return i
+
+    return max(len(frame_files) - 1, 0)
+
+
+def video_interpolation_levels(video_folder: str, interpolation_factor: int, target_fps: float) -> int:
+    """
+    Returns the number of bisection levels needed for a video, based on the frame rate of its
+    source video and the requested interpolation factor or target frame rate.
+    """
+    source_fps, output_fps = tl.resolve_frame_rates(video_folder, ii.find_source_frame_rate(video_folder),
+                                                    interpolation_factor, target_fps)
+
+    return max(1, tl.interpolation_levels(source_fps, output_fps))
+
+
+def source_frames(input_store: fs.FrameStore) -> tuple:
+    """
+    Returns the sorted references of the source frames of a video, leaving out frames generated by
+    an earlier run, and the names without extension of every frame in its store.
+    """
+    all_frames = input_store.names()
+    stems = {os.path.splitext(f)[0] for f in all_frames}
+    frame_files = [input_store.reference(f) for f in all_frames
+                   if not tl.is_generated_frame(os.path.splitext(f)[0], stems)]
+
+    return frame_files, stems
+
+
+def interpolate_video(interpolator: Interpolator, video_folder: str, frame_files: list[str], stems: set,
+                      video_output_path: str, inference_params: dict, mean: np.ndarray, std: np.ndarray) -> tuple:
+    """
+    Generates the frames between every pair of consecutive source frames of one video, resuming at
+    the first pair whose generated frames are missing.
+
+    Frames are decoded ahead by a FrameReader and generated frames are encoded and written by a
+    FrameWriter, so I/O and JPEG work overlap with inference while frames stay in order.
+
+    :param frame_files: Sorted references of the source frames of the video (see FrameStore).
+    :param stems: Names without extension of every frame in the video folder.
+    :param video_output_path: Directory to save the generated frames of the video.
+    :return: Number of frames generated and the mean occupancy of the reader and writer queues.
+    """
+    batch_size = max(1, inference_params['batch_size'])
+
+    img_height, img_width, num_channels = cd.load_image_shape(frame_files[0])
+
+    levels = video_interpolation_levels(video_folder, inference_params['interpolation_factor'],
+                                        inference_params['target_fps'])
+    fractions = [k / 2 ** levels for k in range(1, 2 ** levels)]
+    existing = stems | {os.path.splitext(f)[0] for f in fs.frame_store_at(video_output_path).names()}
+    j = first_incomplete_pair(frame_files, existing, fractions)
+
+    first_frames, second_frames, frame_names = [], [], []
+    pair_counts = {pd.MOTION: 0, pd.STATIC: 0, pd.CUT: 0}
+    first_signature = None
+
+    reader = FrameReader(frame_files[j:],
+                         lambda frame_file: cd.load_and_preprocess_image(frame_file, img_height, img_width,
+                                                                         num_channels, mean, std),
+                         inference_params['read_workers'], inference_params['queue_size'])
+    frames = iter(reader)
+    try:
+        second_frame = next(frames, None)
+
+        with FrameWriter(fs.frame_store_at(video_output_path), inference_params['write_workers'],
+                         inference_params['queue_size']) as writer:
+            for i in range(j, len(frame_files) - 1):
+                first_frame, second_frame = second_frame, next(frames)
+                frame_name = os.path.splitext(fs.frame_name(frame_files[i]))[0]
+
+                pair_type = pd.MOTION
+                if inference_params['pair_detection']:
+                    if first_signature is None:
+                        first_signature = pd.frame_signature(first_frame, mean, std)
+                    second_signature = pd.frame_signature(second_frame, mean, std)
+                    pair_type = pd.classify_pair(first_signature, second_signature,
+                                                 inference_params['static_pair_threshold'],
+                                                 inference_params['scene_cut_threshold'])
+                    first_signature = second_signature
+
+                pair_counts[pair_type] += 1
+                if pair_type != pd.MOTION:
+                    copy_source_frame(frame_files[i], frame_name, fractions, writer)
+                    profiling.advance(len(fractions))
+                    continue
+
+                first_frames.append(first_frame)
+                second_frames.append(second_frame)
+                frame_names.append(frame_name)
+
+                if len(frame_names) == batch_size:
+                    save_interpolated_batch(interpolator, first_frames, second_frames, frame_names, levels, mean, std,
+                                            writer)
+                    profiling.advance(len(frame_names) * len(fractions))
+                    first_frames, second_frames, frame_names = [], [], []
+
+            if frame_names:
+                save_interpolated_batch(interpolator, first_frames, second_frames, frame_names, levels, mean, std,
+                                        writer)
+    finally:
+        # Stops the decoding threads also when inference fails.
+        frames.close()
+
+    print(f"{video_folder}: {len(fractions)} frames per pair, {pair_counts[pd.MOTION]} pairs interpolated, "
+          f"{pair_counts[pd.STATIC]} static pairs copied, {pair_counts[pd.CUT]} scene cuts skipped, "
+          f"{reader.occupancy.samples} source frames decoded, read queue {reader.occupancy.summary()}, "
+          f"write queue {writer.occupancy.summary()}.")
+
+    occupancy = {
+        "read_queue_occupancy": reader.occupancy.mean,
+        "write_queue_occupancy": writer.occupancy.mean,
+    }
+
+    return (len(frame_files) - 1 - j) * len(fractions), occupancy
 
 
 def generate_video_frames(input_dir: str, model_path: str, output_dir: str) -> None:
     """
-    Generates frames using a trained model and saves them to the output directory.
+    Generates frames using the configured interpolator and saves them to the output directory.
+
+    Consecutive frame pairs are gathered into batches of ``inference_batch_size`` (see setup.json)
+    and each batch is passed to the interpolator in one call. Each frame is decoded exactly once per
+    run, ahead of inference by ``generation_read_workers`` threads, and generated frames are encoded
+    and written by ``generation_write_workers`` threads. Both queues hold up to
+    ``generation_queue_size`` frames.
+
+    With ``tiled_inference`` enabled, frames whose resolution differs from the trained one are split
+    into overlapping tiles of the trained size that are batched through the model and blended back.
+
+    The number of frames generated per pair follows ``interpolation_factor`` or ``target_fps``:
+    every pair is bisected recursively until the generated frames are at least as dense as the
+    output frame rate.
+
+    With ``pair_detection`` enabled, each pair is first compared on a downscaled copy: pairs without
+    motion and pairs crossing a scene cut get copies of their first frame instead of interpolated frames.
+
+    Every video is recorded as a telemetry event (see utilities/telemetry.py), including the mean
+    occupancy of the reader and writer queues.
 
     :param input_dir: Directory containing input video frames.
-    :param model_path: Path to the trained model.
+    :param model_path: Path to the trained model, unused by the optical flow interpolators.
     :param output_dir: Directory to save generated frames.
     """
 
-    model = tf.keras.models.load_model(model_path)
+    inference_params = setup.get_inference_params()
     mean, std = utils.load_mean_std_file()
+    interpolator = load_interpolator(model_path, mean, std)
 
-    for video_folder in os.listdir(input_dir):
+    for video_folder in fs.list_videos(input_dir):
         video_input_path = os.path.join(input_dir, video_folder)
         video_output_path = os.path.join(output_dir, video_folder)
 
-        os.makedirs(video_output_path, exist_ok=True)
-
-        frame_files = sorted(
-            [os.path.join(video_input_path, fname) for fname in os.listdir(video_input_path) if fname.endswith(".jpg")]
-        )
-
-        img_height, img_width, num_channels = cv2.imread(frame_files[0]).shape
+        input_store = fs.frame_store_at(video_input_path)
+        frame_files, stems = source_frames(input_store)
 
         if not frame_files:
             continue
 
-        j = max(len(os.listdir(video_output_path)) - 1, 0)
-
-        first_frame = cd.load_and_preprocess_image(frame_files[j], img_height, img_width, num_channels, mean, std)
-        first_frame_name = os.path.splitext(os.path.basename(frame_files[j]))[0]
-
-        for i in range(j, len(frame_files) - 1):
-            second_frame = cd.load_and_preprocess_image(frame_files[i + 1], img_height, img_width, num_channels, mean,
-                                                        std)
-            predicted_frame = process_frame_pair(model, first_frame, second_frame, mean, std)
-
-            output_filename = os.path.join(video_output_path, f"{first_frame_name}_5.jpg")
-            tf.io.write_file(output_filename, tf.image.encode_jpeg(predicted_frame))
-
-            first_frame_name = os.path.splitext(os.path.basename(frame_files[i + 1]))[0]
-            first_frame = second_frame
-
-            K.clear_session()
-            gc.collect()
+        with telemetry.track_stage("generate", video_folder) as record:
+            record.frames, occupancy = interpolate_video(interpolator, video_folder, frame_files, stems,
+                                                         video_output_path, inference_params, mean, std)
+            record.details.update(occupancy)
 
-    mf.merge_subdirectories(input_dir, output_dir, input_dir)
+        fs.frame_store_at(video_output_path).move_into(input_store)
 
-    shutil.rmtree(output_dir)
+    shutil.rmtree(output_dir, ignore_errors=True)
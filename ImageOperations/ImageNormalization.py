@@ -1,29 +1,190 @@
+import hashlib
+import io
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from PIL import Image
 
+import FolderOperations.FrameStore as fs
+
 
-def compute_dataset_mean_std(image_paths: list[str]) -> (np.ndarray, np.ndarray):
+def compute_image_stats(image_path: str) -> tuple:
     """
-    Computes the mean and standard deviation for all the images in a dataset.
+    Computes the per-channel pixel count, mean and sum of squared deviations (M2) of one image.
+
+    :param image_path: Path to the image, or a frame store reference.
+    :return: Tuple of (count, mean, m2).
+    """
+    img = Image.open(io.BytesIO(fs.read_frame(image_path))).convert("RGB")
+    img_array = np.array(img, dtype=np.float64).reshape(-1, 3) / 255.0
+
+    mean = img_array.mean(axis=0)
+    m2 = ((img_array - mean) ** 2).sum(axis=0)
+
+    return img_array.shape[0], mean, m2
+
+
+def merge_stats(stats_a: tuple, stats_b: tuple) -> tuple:
+    """
+    Merges two (count, mean, m2) partial statistics with Chan's parallel update.
+
+    :param stats_a: First partial statistics.
+    :param stats_b: Second partial statistics.
+    :return: Statistics of the union of both samples.
+    """
+    count_a, mean_a, m2_a = stats_a
+    count_b, mean_b, m2_b = stats_b
+
+    if count_a == 0:
+        return stats_b
+    if count_b == 0:
+        return stats_a
+
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / count
+
+    return count, mean, m2
+
+
+def empty_stats() -> tuple:
+    """Returns the neutral element of merge_stats."""
+    return 0, np.zeros(3), np.zeros(3)
+
+
+def stats_to_mean_std(stats: tuple) -> (np.ndarray, np.ndarray):
+    """
+    Converts (count, mean, m2) statistics to the dataset mean and population standard deviation.
+    """
+    count, mean, m2 = stats
+    return mean, np.sqrt(m2 / count)
+
+
+def _compute_chunk_stats(image_paths: list[str]) -> tuple:
+    """Process pool worker that folds a chunk of images into a single partial statistic."""
+    stats = empty_stats()
+    for img_path in image_paths:
+        stats = merge_stats(stats, compute_image_stats(img_path))
+    return stats
+
+
+def compute_images_stats(image_paths: list[str], num_workers: int = 1) -> tuple:
+    """
+    Computes (count, mean, m2) over a list of images in a single pass, optionally across processes.
 
     :param image_paths: List of file paths to the images.
+    :param num_workers: Number of worker processes.
+    :return: Tuple of (count, mean, m2).
+    """
+    if num_workers <= 1 or len(image_paths) < 2:
+        return _compute_chunk_stats(image_paths)
+
+    chunk_size = -(-len(image_paths) // num_workers)
+    chunks = [image_paths[i:i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+
+    stats = empty_stats()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for chunk_stats in executor.map(_compute_chunk_stats, chunks):
+            stats = merge_stats(stats, chunk_stats)
+
+    return stats
+
+
+def sample_image_paths(image_paths: list[str], max_frames: int = 0) -> list[str]:
+    """
+    Picks at most ``max_frames`` evenly strided images from a sorted list, 0 keeps every image.
+    """
+    image_paths = sorted(image_paths)
+
+    if max_frames <= 0 or len(image_paths) <= max_frames:
+        return image_paths
+
+    stride = -(-len(image_paths) // max_frames)
+    return image_paths[::stride]
+
+
+def fingerprint_images(image_paths: list[str], max_frames: int = 0) -> str:
+    """
+    Fingerprints a set of images by their names, sizes and modification times plus the sampling setting.
+    """
+    digest = hashlib.sha1(f"max_frames={max_frames},weighted".encode())
+
+    for img_path in sorted(image_paths):
+        digest.update(f"{fs.frame_name(img_path)}:{fs.frame_fingerprint(img_path)}".encode())
+
+    return digest.hexdigest()
+
+
+def compute_video_stats(video_name: str, image_paths: list[str], cache_dir: str, num_workers: int = 1,
+                        max_frames: int = 0) -> tuple:
+    """
+    Returns the (count, mean, m2) statistics of one video's frames, reusing a cached result
+    if the frames have not changed since it was computed.
+
+    When only a sample of the frames is read, count and m2 are scaled up to every frame of the
+    video, so merging videos weights each by its length rather than by its sample size.
+
+    :param video_name: Name of the video the frames belong to.
+    :param image_paths: List of file paths to the video's frames.
+    :param cache_dir: Directory holding the cached per-video statistics.
+    :param num_workers: Number of worker processes.
+    :param max_frames: Maximum number of frames sampled from the video, 0 uses every frame.
+    :return: Tuple of (count, mean, m2).
+    """
+    fingerprint = fingerprint_images(image_paths, max_frames)
+    cache_file = os.path.join(cache_dir, f"stats_{video_name}.pkl")
+
+    if os.path.isfile(cache_file):
+        with open(cache_file, "rb") as f:
+            cached_fingerprint, stats = pickle.load(f)
+        if cached_fingerprint == fingerprint:
+            return stats
+
+    sampled_paths = sample_image_paths(image_paths, max_frames)
+    count, mean, m2 = compute_images_stats(sampled_paths, num_workers)
+    weight = len(image_paths) / len(sampled_paths)
+    stats = count * weight, mean, m2 * weight
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file, "wb") as f:
+        pickle.dump((fingerprint, stats), f)
+
+    return stats
+
+
+def compute_videos_mean_std(video_image_paths: dict, cache_dir: str, num_workers: int = 1,
+                            max_frames: int = 0) -> (np.ndarray, np.ndarray):
+    """
+    Computes the dataset mean and standard deviation by merging cached per-video statistics.
+
+    :param video_image_paths: Mapping of video name to the file paths of its frames.
+    :param cache_dir: Directory holding the cached per-video statistics.
+    :param num_workers: Number of worker processes.
+    :param max_frames: Maximum number of frames sampled per video, 0 uses every frame.
     :return: Tuple containing mean and standard deviation of the dataset.
     """
-    sum_mean = np.zeros(3)
-    sum_sq_mean = np.zeros(3)
-    num_images = len(image_paths)
+    stats = empty_stats()
 
-    for img_path in image_paths:
-        img = Image.open(img_path).convert("RGB")
-        img_array = np.array(img, dtype=np.float32) / 255.0
+    for video_name, image_paths in video_image_paths.items():
+        if image_paths:
+            video_stats = compute_video_stats(video_name, image_paths, cache_dir, num_workers, max_frames)
+            stats = merge_stats(stats, video_stats)
 
-        sum_mean += np.mean(img_array, axis=(0, 1))
-        sum_sq_mean += np.mean(img_array ** 2, axis=(0, 1))
+    return stats_to_mean_std(stats)
 
-    mean = sum_mean / num_images
-    std = np.sqrt(sum_sq_mean / num_images - mean ** 2)
 
-    return mean, std
+def compute_dataset_mean_std(image_paths: list[str], num_workers: int = 1) -> (np.ndarray, np.ndarray):
+    """
+    Computes the mean and standard deviation for all the images in a dataset.
+
+    :param image_paths: List of file paths to the images.
+    :param num_workers: Number of worker processes.
+    :return: Tuple containing mean and standard deviation of the dataset.
+    """
+    return stats_to_mean_std(compute_images_stats(image_paths, num_workers))
 
 
 def normalize_image(image: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+import ImageOperations.ImageNormalization as im
+
+FLOW_METHODS = ("dis", "farneback")
+
+
+class Interpolator:
+    """
+    Generates the frame halfway between two frames.
+
+    Frames are exchanged in the normalized space the model is trained on, so generated frames can
+    be fed back as inputs for the next bisection level whichever implementation produced them.
+    """
+
+    def interpolate(self, first_frames: np.ndarray, second_frames: np.ndarray) -> np.ndarray:
+        """
+        :param first_frames: Normalized frames of shape (N, H, W, C).
+        :param second_frames: Normalized frames of shape (N, H, W, C).
+        :return: Normalized float32 midpoint frames of shape (N, H, W, C).
+        """
+        raise NotImplementedError
+
+
+def compute_flow(first_gray: np.ndarray, second_gray: np.ndarray, method: str = "dis") -> np.ndarray:
+    """
+    Computes dense optical flow from the first to the second grayscale frame.
+
+    :param method: "dis" (DIS, medium preset) or "farneback".
+    :return: Flow field of shape (H, W, 2) in pixels.
+    """
+    if method == "dis":
+        return cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_MEDIUM).calc(first_gray, second_gray, None)
+    if method == "farneback":
+        return cv2.calcOpticalFlowFarneback(first_gray, second_gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+
+    raise ValueError(f"Unknown optical flow method '{method}', expected one of {FLOW_METHODS}.")
+
+
+def warp(image: np.ndarray, flow: np.ndarray) -> np.ndarray:
+    """
+    Backward-warps an image: every output pixel x samples the image at x + flow(x).
+    """
+    height, width = flow.shape[:2]
+    grid_x, grid_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+
+    return cv2.remap(image, grid_x + flow[..., 0], grid_y + flow[..., 1], cv2.INTER_LINEAR,
+                     borderMode=cv2.BORDER_REPLICATE)
+
+
+def interpolate_midpoint(first_image: np.ndarray, second_image: np.ndarray, method: str = "dis") -> np.ndarray:
+    """
+    Synthesizes the midpoint of two float32 RGB images in [0, 1] from bidirectional optical flow.
+
+    The flows from the midpoint to both frames are approximated from the forward and backward flows,
+    both frames are warped to the midpoint, and they are blended with weights that fall off where
+    the forward and backward flows disagree, i.e. where a pixel is occluded in the other frame.
+    """
+    first_gray = cv2.cvtColor((first_image * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+    second_gray = cv2.cvtColor((second_image * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+
+    forward_flow = compute_flow(first_gray, second_gray, method)
+    backward_flow = compute_flow(second_gray, first_gray, method)
+
+    flow_to_first = 0.25 * (backward_flow - forward_flow)
+    flow_to_second = -flow_to_first
+
+    forward_error = np.linalg.norm(forward_flow + warp(backward_flow, forward_flow), axis=-1)
+    backward_error = np.linalg.norm(backward_flow + warp(forward_flow, backward_flow), axis=-1)
+
+    first_weight = np.exp(-warp(forward_error, flow_to_first))[..., np.newaxis]
+    second_weight = np.exp(-warp(backward_error, flow_to_second))[..., np.newaxis]
+
+    blended = (first_weight * warp(first_image, flow_to_first) + second_weight * warp(second_image, flow_to_second))
+
+    return blended / (first_weight + second_weight + 1e-6)
+
+
+class OpticalFlowInterpolator(Interpolator):
+    """
+    CPU interpolator based on OpenCV optical flow, for previews and low priority jobs.
+    """
+
+    def __init__(self, mean: np.ndarray, std: np.ndarray, method: str = "dis"):
+        if method not in FLOW_METHODS:
+            raise ValueError(f"Unknown optical flow method '{method}', expected one of {FLOW_METHODS}.")
+
+        self.mean = mean
+        self.std = std
+        self.method = method
+
+    def interpolate(self, first_frames: np.ndarray, second_frames: np.ndarray) -> np.ndarray:
+        midpoints = []
+        for first_frame, second_frame in zip(first_frames, second_frames):
+            first_image = im.denormalize_image(first_frame, self.mean, self.std).astype(np.float32)
+            second_image = im.denormalize_image(second_frame, self.mean, self.std).astype(np.float32)
+            midpoint = interpolate_midpoint(first_image, second_image, self.method)
+            midpoints.append(im.normalize_image(midpoint, self.mean, self.std))
+
+        return np.stack(midpoints).astype(np.float32)
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+import ImageOperations.ImageNormalization as im
+
+STATIC = "static"
+CUT = "cut"
+MOTION = "motion"
+
+
+def frame_signature(frame: np.ndarray, mean: np.ndarray, std: np.ndarray, width: int = 64,
+                    bins: int = 32) -> tuple:
+    """
+    Computes a cheap summary of a normalized frame used to compare it with its neighbours.
+
+    The frame is downscaled before it is denormalized, so the cost does not depend on the frame resolution.
+
+    :param frame: Normalized RGB frame of shape (H, W, C).
+    :param mean: The mean values of the dataset.
+    :param std: The standard deviation values of the dataset.
+    :param width: Width of the downscaled frame.
+    :param bins: Number of histogram bins.
+    :return: Tuple of (downscaled grayscale frame as float32 in [0, 255], normalized histogram).
+    """
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(np.ascontiguousarray(frame, dtype=np.float32), (width, height), interpolation=cv2.INTER_AREA)
+    small = (im.denormalize_image(small.reshape(height, width, -1), mean, std) * 255).astype(np.float32)
+
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.shape[-1] == 3 else small[..., 0]
+    histogram = cv2.calcHist([gray], [0], None, [bins], [0, 256])
+
+    return gray, cv2.normalize(histogram, histogram).flatten()
+
+
+def classify_pair(first_signature: tuple, second_signature: tuple, static_threshold: float = 1.0,
+                  cut_threshold: float = 0.5) -> str:
+    """
+    Classifies a frame pair from the signatures of its frames.
+
+    :param static_threshold: Mean absolute grayscale difference (0-255) below which the frames are identical.
+    :param cut_threshold: Bhattacharyya histogram distance (0-1) above which the pair is a scene cut.
+    :return: STATIC if nothing moves, CUT if the pair crosses a hard cut, MOTION otherwise.
+    """
+    first_gray, first_histogram = first_signature
+    second_gray, second_histogram = second_signature
+
+    if float(np.mean(np.abs(first_gray - second_gray))) < static_threshold:
+        return STATIC
+
+    if cv2.compareHist(first_histogram, second_histogram, cv2.HISTCMP_BHATTACHARYYA) > cut_threshold:
+        return CUT
+
+    return MOTION
@@ -1,8 +1,14 @@
 from tensorflow.keras import backend as K
 import gc
+import os
+import cv2
 import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
+import FolderOperations.FrameStore as fs
+
 VALID_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
 
 def is_valid_image(filename: str) -> bool:
@@ -10,15 +16,13 @@ def is_valid_image(filename: str) -> bool:
     return filename.lower().endswith(VALID_EXTENSIONS)
 
 
-def resize_image(input_path: Path, output_path: Path, scale_factor: float) -> None:
+def resize_image_data(image_data: bytes, scale_factor: float) -> bytes:
     """
-    Resizes a single image and saves it to the output path.
+    Resizes an encoded image with TensorFlow (LANCZOS3) and returns it encoded as JPEG.
 
-    :param input_path: Path to the input image file.
-    :param output_path: Path where the resized image will be saved.
+    :param image_data: Encoded input image.
     :param scale_factor: Factor by which the image will be resized.
     """
-    image_data = tf.io.read_file(str(input_path))
     img = tf.image.decode_image(image_data, channels=3)
 
     orig_size = tf.cast(tf.shape(img)[:2], tf.float32)
@@ -27,43 +31,98 @@ def resize_image(input_path: Path, output_path: Path, scale_factor: float) -> No
     img_resized = tf.image.resize(img, new_size, method=tf.image.ResizeMethod.LANCZOS3, antialias=True)
     img_resized = tf.cast(img_resized, tf.uint8)
 
-    encoded_image = tf.io.encode_jpeg(img_resized)
-    tf.io.write_file(str(output_path), encoded_image)
+    return tf.io.encode_jpeg(img_resized).numpy()
+
+
+def resize_image_data_opencv(image_data: bytes, scale_factor: float, interpolation: int = cv2.INTER_AREA) -> bytes:
+    """
+    Resizes an encoded image with OpenCV and returns it encoded as JPEG.
+
+    :param image_data: Encoded input image.
+    :param scale_factor: Factor by which the image will be resized.
+    :param interpolation: OpenCV interpolation flag used for resizing.
+    """
+    img = fs.decode_image(image_data)
+
+    height, width = img.shape[:2]
+    new_size = (int(width * scale_factor), int(height * scale_factor))
 
+    return fs.encode_image(cv2.resize(img, new_size, interpolation=interpolation))
 
-def batch_resize_images(input_folder: str, output_folder: str, scale_factor: float = 0.5) -> None:
+
+def resize_image(input_path: Path, output_path: Path, scale_factor: float) -> None:
     """
-    Resizes all images in a folder by a given scale factor and stores them in the output folder.
+    Resizes a single image and saves it to the output path.
+
+    :param input_path: Path to the input image file.
+    :param output_path: Path where the resized image will be saved.
+    :param scale_factor: Factor by which the image will be resized.
+    """
+    Path(output_path).write_bytes(resize_image_data(Path(input_path).read_bytes(), scale_factor))
+
+
+RESIZE_BACKENDS = {
+    "tensorflow": resize_image_data,
+    "opencv": resize_image_data_opencv,
+    "opencv_lanczos": partial(resize_image_data_opencv, interpolation=cv2.INTER_LANCZOS4),
+}
+
+
+def batch_resize_images(input_folder: str, output_folder: str, scale_factor: float = 0.5,
+                        backend: str = "tensorflow", num_workers: int = 1, skip_existing: bool = False) -> None:
+    """
+    Resizes all images of a video's frame store by a given scale factor and stores them in the
+    frame store of the output folder (see FrameStore).
 
     :param input_folder: Path to the folder containing images.
     :param output_folder: Path to the folder where resized images will be saved.
     :param scale_factor: Factor by which images will be resized.
+    :param backend: Name of the resize backend in RESIZE_BACKENDS.
+    :param num_workers: Number of threads resizing images concurrently.
+    :param skip_existing: Skip images that already have a resized copy in the output folder.
     """
-    input_folder = Path(input_folder)
-    output_folder = Path(output_folder)
-    output_folder.mkdir(parents=True, exist_ok=True)
+    if backend not in RESIZE_BACKENDS:
+        raise ValueError(f"Unknown resize backend '{backend}'. Choose one of {sorted(RESIZE_BACKENDS)}.")
+
+    resize = RESIZE_BACKENDS[backend]
+
+    input_store = fs.frame_store_at(input_folder)
+    output_store = fs.frame_store_at(output_folder)
+
+    existing_files = set(output_store.names()) if skip_existing else set()
+    image_files = [image_file for image_file in input_store.names()
+                   if is_valid_image(image_file) and image_file not in existing_files]
 
-    for image_file in input_folder.iterdir():
-        if image_file.is_file() and is_valid_image(image_file.name):
-            output_path = output_folder / image_file.name
-            resize_image(image_file, output_path, scale_factor)
+    def resize_frame(image_file):
+        output_store.write(image_file, resize(input_store.read(image_file), scale_factor))
 
+    if num_workers <= 1:
+        for image_file in image_files:
+            resize_frame(image_file)
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            list(executor.map(resize_frame, image_files))
 
-def resize_images_in_subfolders(input_folder: str, output_folder: str, scale_factor: float = 0.5) -> None:
+    # Frames resized again on a re-run replace their earlier copies.
+    output_store.compact()
+
+
+def resize_images_in_subfolders(input_folder: str, output_folder: str, scale_factor: float = 0.5,
+                                backend: str = "tensorflow", num_workers: int = 1) -> None:
     """
     Recursively resizes images in all subdirectories of a given folder.
 
     :param input_folder: Path to the folder containing multiple image directories.
     :param output_folder: Path where all the resized images will be stored in respective subdirectories.
     :param scale_factor: Factor by which images will be resized.
+    :param backend: Name of the resize backend in RESIZE_BACKENDS.
+    :param num_workers: Number of threads resizing images concurrently.
     """
-    input_folder = Path(input_folder)
-    output_folder = Path(output_folder)
-
-    for subfolder in input_folder.iterdir():
-        if subfolder.is_dir():
-            batch_resize_images(str(subfolder), str(output_folder / subfolder.name), scale_factor)
-            print(f"{subfolder.name} resized.")
+    for video_name in fs.list_videos(input_folder):
+        batch_resize_images(os.path.join(input_folder, video_name), os.path.join(output_folder, video_name),
+                            scale_factor, backend, num_workers)
+        print(f"{video_name} resized.")
 
+        if backend == "tensorflow":
             K.clear_session()
             gc.collect()
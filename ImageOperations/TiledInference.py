@@ -0,0 +1,137 @@
+from typing import Callable
+
+import numpy as np
+
+
+def tile_starts(length: int, tile_size: int, overlap: int) -> list[int]:
+    """
+    Returns the start offsets of overlapping tiles covering a dimension.
+
+    Tiles advance by ``tile_size - overlap`` and the last tile is aligned with the end, so every
+    pixel is covered and no tile leaves the frame.
+
+    :param length: Size of the dimension being tiled.
+    :param tile_size: Size of a tile along the dimension.
+    :param overlap: Minimum number of pixels shared by neighbouring tiles.
+    :return: Sorted list of start offsets.
+    """
+    if length <= tile_size:
+        return [0]
+
+    step = tile_size - overlap
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+
+    return starts
+
+
+def feather_weights(tile_height: int, tile_width: int, overlap: int) -> np.ndarray:
+    """
+    Builds the blending weights of a tile: 1 in the middle, ramping down linearly over
+    ``overlap`` pixels towards each edge. Weights never reach 0, so frame borders covered by a
+    single tile keep their values after normalization.
+
+    :return: Array of shape (tile_height, tile_width, 1).
+    """
+    def ramp(size: int) -> np.ndarray:
+        weights = np.ones(size, dtype=np.float32)
+        width = min(overlap, size // 2)
+        if width > 0:
+            edge = np.arange(1, width + 1, dtype=np.float32) / (width + 1)
+            weights[:width] = edge
+            weights[-width:] = edge[::-1]
+        return weights
+
+    return np.outer(ramp(tile_height), ramp(tile_width))[..., np.newaxis]
+
+
+def pad_to_tile(frames: np.ndarray, tile_height: int, tile_width: int) -> np.ndarray:
+    """
+    Edge-pads a batch of frames that is smaller than a tile in either dimension.
+    """
+    pad_height = max(tile_height - frames.shape[1], 0)
+    pad_width = max(tile_width - frames.shape[2], 0)
+
+    if pad_height == 0 and pad_width == 0:
+        return frames
+
+    return np.pad(frames, ((0, 0), (0, pad_height), (0, pad_width), (0, 0)), mode="edge")
+
+
+def split_tiles(frames: np.ndarray, tile_height: int, tile_width: int, overlap: int) -> tuple:
+    """
+    Splits a batch of frames into overlapping tiles.
+
+    :param frames: Array of shape (N, H, W, C), at least one tile in each dimension.
+    :return: Tuple of (tiles of shape (N * T, tile_height, tile_width, C), list of (frame, top, left)).
+    """
+    _, height, width, _ = frames.shape
+    positions = [(n, top, left)
+                 for n in range(len(frames))
+                 for top in tile_starts(height, tile_height, overlap)
+                 for left in tile_starts(width, tile_width, overlap)]
+
+    tiles = np.stack([frames[n, top:top + tile_height, left:left + tile_width] for n, top, left in positions])
+
+    return tiles, positions
+
+
+def blend_tiles(tiles: np.ndarray, positions: list[tuple], frames_shape: tuple, overlap: int) -> np.ndarray:
+    """
+    Blends predicted tiles back into full frames with feathered seams.
+
+    :param tiles: Array of shape (N * T, tile_height, tile_width, C).
+    :param positions: List of (frame, top, left) returned by split_tiles.
+    :param frames_shape: Shape (N, H, W, C) of the padded frames.
+    :param overlap: Overlap used when splitting.
+    :return: Float32 array of shape frames_shape.
+    """
+    _, tile_height, tile_width, _ = tiles.shape
+    weights = feather_weights(tile_height, tile_width, overlap)
+
+    blended = np.zeros(frames_shape, dtype=np.float32)
+    weight_sum = np.zeros((*frames_shape[:3], 1), dtype=np.float32)
+
+    for tile, (n, top, left) in zip(tiles, positions):
+        blended[n, top:top + tile_height, left:left + tile_width] += tile * weights
+        weight_sum[n, top:top + tile_height, left:left + tile_width] += weights
+
+    return blended / weight_sum
+
+
+def predict_tiled(predict: Callable[[np.ndarray, np.ndarray], np.ndarray], first_frames: np.ndarray,
+                  second_frames: np.ndarray, tile_height: int, tile_width: int, overlap: int = 32,
+                  tile_batch_size: int = 16) -> np.ndarray:
+    """
+    Runs frame pairs of any resolution through a model trained on a fixed tile size.
+
+    Both frames of every pair are split at the same positions, the tiles of all pairs are run
+    through the model in batches of ``tile_batch_size`` and the predictions are blended back,
+    so memory use is bounded by the tile batch rather than the frame resolution.
+
+    :param predict: Function mapping batches of first and second tiles to predicted tiles.
+    :param first_frames: Array of shape (N, H, W, C).
+    :param second_frames: Array of shape (N, H, W, C).
+    :param tile_height: Height the model was trained on.
+    :param tile_width: Width the model was trained on.
+    :param overlap: Minimum overlap between neighbouring tiles in pixels.
+    :param tile_batch_size: Number of tiles per model call.
+    :return: Float32 predictions of shape (N, H, W, C).
+    """
+    if overlap >= min(tile_height, tile_width):
+        raise ValueError(f"Tile overlap {overlap} must be smaller than the tile size {tile_height}x{tile_width}.")
+
+    _, height, width, _ = first_frames.shape
+    first_frames = pad_to_tile(first_frames, tile_height, tile_width)
+    second_frames = pad_to_tile(second_frames, tile_height, tile_width)
+
+    first_tiles, positions = split_tiles(first_frames, tile_height, tile_width, overlap)
+    second_tiles, _ = split_tiles(second_frames, tile_height, tile_width, overlap)
+
+    tile_batch_size = max(1, tile_batch_size)
+    predicted_tiles = np.concatenate([predict(first_tiles[i:i + tile_batch_size], second_tiles[i:i + tile_batch_size])
+                                      for i in range(0, len(first_tiles), tile_batch_size)])
+
+    blended = blend_tiles(predicted_tiles, positions, first_frames.shape, overlap)
+
+    return blended[:, :height, :width]
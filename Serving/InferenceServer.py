@@ -0,0 +1,278 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import tensorflow as tf
+
+import ImageOperations.GenerateFrames as gen
+import ImageOperations.ImageNormalization as im
+import VideoOperations.StreamingEnhancement as se
+import utilities.utils as utils
+import setup
+
+
+class ServerMetrics:
+    """
+    Thread-safe counters for queue depth, batch sizes and request latency.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests_total = 0
+        self.batches_total = 0
+        self.frames_total = 0
+
+    def record_batch(self, batch_size: int, latencies: list[float]) -> None:
+        with self._lock:
+            self.batches_total += 1
+            self.frames_total += batch_size
+            self.requests_total += len(latencies)
+            self._latencies.extend(latencies)
+
+    def snapshot(self, queue_depth: int) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+            return {
+                "queue_depth": queue_depth,
+                "requests_total": self.requests_total,
+                "batches_total": self.batches_total,
+                "mean_batch_size": self.frames_total / self.batches_total if self.batches_total else 0.0,
+                "latency_ms_mean": float(latencies.mean()),
+                "latency_ms_p50": float(np.percentile(latencies, 50)),
+                "latency_ms_p95": float(np.percentile(latencies, 95)),
+            }
+
+
+class FrameBatcher:
+    """
+    Collects normalized frame pairs from concurrent callers and runs them through the model in
+    dynamically sized batches.
+
+    A batch is dispatched as soon as ``max_batch_size`` pairs are queued or the oldest pair has
+    waited ``max_wait_ms``.
+    """
+
+    def __init__(self, model: tf.keras.models.Model, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.input_shape = tuple(model.inputs[0].shape[1:])
+        self.metrics = ServerMetrics()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, first_frame: np.ndarray, second_frame: np.ndarray) -> Future:
+        """
+        Queues one normalized frame pair and returns a future holding the raw model prediction.
+        """
+        if first_frame.shape != self.input_shape or second_frame.shape != self.input_shape:
+            raise ValueError(f"Frames must have shape {self.input_shape}, got {first_frame.shape} "
+                             f"and {second_frame.shape}.")
+
+        future = Future()
+        self._queue.put((first_frame, second_frame, future, time.perf_counter()))
+        return future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            first_frames = np.stack([item[0] for item in batch])
+            second_frames = np.stack([item[1] for item in batch])
+
+            try:
+                predictions = gen.predict_batch(self.model, first_frames, second_frames)
+            except Exception as error:
+                for _, _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+
+            finished = time.perf_counter()
+            for (_, _, future, _), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+            self.metrics.record_batch(len(batch), [finished - item[3] for item in batch])
+
+
+class BatchedModel:
+    """
+    Model adapter whose predict_on_batch routes every pair through a shared FrameBatcher, so
+    frames from concurrent video jobs are merged into the same forward passes.
+    """
+
+    def __init__(self, batcher: FrameBatcher):
+        self.batcher = batcher
+        self.inputs = batcher.model.inputs
+
+    def predict_on_batch(self, inputs: list) -> np.ndarray:
+        first_frames, second_frames = (np.asarray(frames) for frames in inputs)
+        futures = [self.batcher.submit(first, second) for first, second in zip(first_frames, second_frames)]
+        return np.stack([future.result() for future in futures])
+
+
+def load_warm_model(model_path: str, max_batch_size: int) -> tf.keras.models.Model:
+    """
+    Loads the model once and traces its predict function for single pairs and full batches.
+    """
+    inference_params = setup.get_inference_params()
+    model = gen.load_inference_model(model_path, setup.get_model_params()['mixed_precision'],
+                                     inference_params['prefer_serving_model'])
+    input_shape = tuple(model.inputs[0].shape[1:])
+
+    for batch_size in sorted({1, max_batch_size}):
+        dummy = np.zeros((batch_size, *input_shape), dtype=np.float32)
+        model.predict_on_batch([dummy, dummy])
+
+    return model
+
+
+def create_handler(batcher: FrameBatcher, mean: np.ndarray, std: np.ndarray, inference_params: dict):
+    """
+    Builds the HTTP request handler bound to a batcher and the dataset statistics.
+
+    :param inference_params: Inference settings (see setup.get_inference_params); the batch size,
+        interpolation factor and target frame rate are the defaults of video requests, and videos
+        whose frames do not match the trained resolution are tiled as in frame generation.
+    """
+    batch_size = max(1, inference_params['batch_size'])
+    tile_overlap = inference_params['tile_overlap'] if inference_params['tiled_inference'] else None
+    batched_interpolator = gen.KerasInterpolator(BatchedModel(batcher), tile_overlap,
+                                                 inference_params['tile_batch_size'])
+
+    class InferenceRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            self._send(status, json.dumps(payload).encode(), "application/json")
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send_json(200, batcher.metrics.snapshot(batcher.queue_depth()))
+            else:
+                self._send_json(404, {"error": f"Unknown path '{self.path}'."})
+
+        def do_POST(self):
+            try:
+                if self.path == "/interpolate":
+                    self._interpolate()
+                elif self.path == "/video":
+                    self._video()
+                else:
+                    self._send_json(404, {"error": f"Unknown path '{self.path}'."})
+            except (ValueError, KeyError, OSError) as error:
+                self._send_json(400, {"error": str(error)})
+            except Exception as error:
+                # Model and TensorFlow errors raised through the batcher.
+                self._send_json(500, {"error": f"{type(error).__name__}: {error}"})
+
+        def _interpolate(self) -> None:
+            """Body: .npz with uint8 RGB 'first' and 'second' frames. Response: .npy uint8 RGB frame."""
+            frames = np.load(io.BytesIO(self._read_body()))
+            first_frame = im.normalize_image(frames["first"] / 255.0, mean, std).astype(np.float32)
+            second_frame = im.normalize_image(frames["second"] / 255.0, mean, std).astype(np.float32)
+
+            prediction = batcher.submit(first_frame, second_frame).result()
+            prediction = (im.denormalize_image(prediction, mean, std) * 255).astype(np.uint8)
+
+            buffer = io.BytesIO()
+            np.save(buffer, prediction)
+            self._send(200, buffer.getvalue(), "application/octet-stream")
+
+        def _video(self) -> None:
+            """
+            Body: JSON with 'video_path', 'output_path' and 'scale_factor', and optionally
+            'interpolation_factor' and 'target_fps' to override the configured output frame rate.
+            """
+            request = json.loads(self._read_body())
+            if tile_overlap is None:
+                frame_size = se.scaled_frame_size(request["video_path"], request["scale_factor"])
+                if frame_size[::-1] != batcher.input_shape[:2]:
+                    raise ValueError(f"Frames scaled to {frame_size[0]}x{frame_size[1]} do not match the trained "
+                                     f"{batcher.input_shape[1]}x{batcher.input_shape[0]} and tiled_inference is "
+                                     f"disabled.")
+            interpolation_factor = int(request.get("interpolation_factor", inference_params['interpolation_factor']))
+            target_fps = float(request.get("target_fps", inference_params['target_fps']))
+            start_time = time.perf_counter()
+
+            se.enhance_video_streaming(request["video_path"], batched_interpolator, request["output_path"],
+                                       request["scale_factor"], mean, std, batch_size, interpolation_factor,
+                                       target_fps)
+
+            self._send_json(200, {"output_path": request["output_path"],
+                                  "seconds": time.perf_counter() - start_time})
+
+    return InferenceRequestHandler
+
+
+def serve(model_path: str, host: str, port: int, max_batch_size: int, max_wait_ms: float) -> None:
+    """
+    Loads and warms the model once, then serves interpolation requests until interrupted.
+    """
+    model = load_warm_model(model_path, max_batch_size)
+    mean, std = utils.load_mean_std_file()
+    batcher = FrameBatcher(model, max_batch_size, max_wait_ms)
+
+    handler = create_handler(batcher, mean, std, setup.get_inference_params())
+    server = ThreadingHTTPServer((host, port), handler)
+
+    print(f"Serving {model_path} on http://{host}:{port} (max batch {max_batch_size}, max wait {max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down.")
+    finally:
+        server.server_close()
+
+
+def main():
+    params = setup.get_inference_params()
+
+    parser = argparse.ArgumentParser(description="Serve frame interpolation from a warm model.")
+    parser.add_argument("--model", default="", help="Model path, defaults to the latest trained model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=params['server_port'])
+    parser.add_argument("--max-batch-size", type=int, default=params['server_max_batch_size'])
+    parser.add_argument("--max-wait-ms", type=float, default=params['server_max_wait_ms'])
+    args = parser.parse_args()
+
+    serve(args.model or utils.load_latest_model(), args.host, args.port, args.max_batch_size, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
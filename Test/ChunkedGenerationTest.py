@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import FolderOperations.FrameStore as fs
+import ImageOperations.ChunkedGeneration as cg
+from utilities.jobqueue import FileJobQueue
+
+
+def claim_all(queue_dir):
+    job_queue = FileJobQueue(queue_dir)
+    claimed = []
+    while (job := job_queue.claim()) is not None:
+        claimed.append(job[0])
+        job_queue.complete(job[0])
+    return claimed
+
+
+class TestChunkedGeneration(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_chunks_cover_every_pair_once(self):
+        for num_frames, num_chunks in [(24, 3), (10, 4), (3, 8), (1000, 7)]:
+            chunks = cg.split_frame_range(num_frames, num_chunks)
+
+            self.assertEqual(chunks[0][0], 0)
+            self.assertEqual(chunks[-1][1], num_frames - 1)
+            for (_, last), (first, _) in zip(chunks, chunks[1:]):
+                self.assertEqual(last, first)
+
+            pairs = [pair for first, last in chunks for pair in range(first, last)]
+            self.assertEqual(pairs, list(range(num_frames - 1)))
+
+        self.assertEqual(cg.split_frame_range(1, 4), [])
+
+    def test_worker_cpu_sets_do_not_overlap(self):
+        cpu_sets = cg.worker_cpu_sets(2)
+
+        self.assertEqual(len(cpu_sets), 2)
+        if len(set(cpu_sets[0] + cpu_sets[1])) > 1:
+            self.assertFalse(set(cpu_sets[0]) & set(cpu_sets[1]))
+
+    def create_chunks(self, chunk_pairs):
+        input_store = fs.open_frame_store(self.root, "video", "jpeg_dir")
+        for i in range(5):
+            input_store.write(f"frame_video_{i:06d}.jpg", b"source")
+
+        chunk_stores = []
+        for chunk, pairs in enumerate(chunk_pairs):
+            chunk_store = fs.frame_store_at(cg.chunk_output_path(os.path.join(self.root, "generated"), "video", chunk),
+                                            "jpeg_dir")
+            for pair in pairs:
+                chunk_store.write(f"frame_video_{pair:06d}_5.jpg", b"generated")
+            chunk_stores.append(chunk_store)
+
+        return input_store, chunk_stores
+
+    def test_stitch_moves_all_chunks(self):
+        input_store, chunk_stores = self.create_chunks([[0, 1], [2, 3]])
+
+        stitched = cg.stitch_video_chunks(input_store, chunk_stores, input_store.references(), [0.5])
+
+        self.assertEqual(stitched, 4)
+        self.assertEqual(len(input_store), 9)
+        self.assertFalse(any(chunk_store.exists() for chunk_store in chunk_stores))
+
+    def test_stitch_rejects_duplicates_and_gaps(self):
+        input_store, chunk_stores = self.create_chunks([[0, 1, 2], [2, 3]])
+        with self.assertRaises(ValueError):
+            cg.stitch_video_chunks(input_store, chunk_stores, input_store.references(), [0.5])
+
+        input_store, chunk_stores = self.create_chunks([[0], [2, 3]])
+        with self.assertRaises(ValueError):
+            cg.stitch_video_chunks(input_store, chunk_stores, input_store.references(), [0.5])
+
+    def test_queue_hands_out_each_job_once(self):
+        job_queue = FileJobQueue(self.root)
+        for i in range(30):
+            job_queue.submit(f"job{i:02d}", {"index": i})
+
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            claimed = [job for jobs in executor.map(claim_all, [self.root] * 3) for job in jobs]
+
+        self.assertEqual(sorted(claimed), [f"job{i:02d}" for i in range(30)])
+        self.assertEqual(job_queue.counts(), {"pending": 0, "running": 0, "done": 30, "failed": 0})
+        self.assertFalse(job_queue.submit("job00", {"index": 0}))
+
+    def test_queue_requeues_expired_and_failed_jobs(self):
+        job_queue = FileJobQueue(self.root, lease_seconds=60)
+        job_queue.submit("chunk000", {"first": 0})
+
+        job_id, payload = job_queue.claim()
+        self.assertEqual(payload, {"first": 0})
+        self.assertIsNone(job_queue.claim())
+
+        expired = time.time() - 120
+        os.utime(os.path.join(self.root, "running", "chunk000.json"), (expired, expired))
+        self.assertEqual(job_queue.claim()[0], "chunk000")
+
+        job_queue.fail("chunk000", "ValueError: broken")
+        self.assertEqual(job_queue.read("failed", "chunk000")["error"], "ValueError: broken")
+        self.assertTrue(job_queue.submit("chunk000", {"first": 0}))
+        self.assertEqual(job_queue.counts(), {"pending": 1, "running": 0, "done": 0, "failed": 0})
+
+    def test_queue_replaces_done_job_with_other_parameters(self):
+        job_queue = FileJobQueue(self.root)
+        job_queue.submit("chunk000", {"first": 0, "input_fingerprint": "a"})
+        job_queue.complete(job_queue.claim()[0])
+
+        self.assertFalse(job_queue.submit("chunk000", {"first": 0, "input_fingerprint": "a"}))
+        self.assertTrue(job_queue.submit("chunk000", {"first": 0, "input_fingerprint": "b"}))
+        self.assertEqual(job_queue.counts(), {"pending": 1, "running": 0, "done": 0, "failed": 0})
+        self.assertEqual(job_queue.read("pending", "chunk000")["input_fingerprint"], "b")
+
+    def test_chunk_fingerprint_follows_source_frames(self):
+        input_store, _ = self.create_chunks([])
+        frame_files = input_store.references()
+        fingerprint = cg.chunk_fingerprint(input_store, frame_files)
+
+        self.assertEqual(cg.chunk_fingerprint(input_store, frame_files), fingerprint)
+        self.assertNotEqual(cg.chunk_fingerprint(input_store, frame_files[:-1]), fingerprint)
+        input_store.write("frame_video_000004.jpg", b"changed")
+        self.assertNotEqual(cg.chunk_fingerprint(input_store, frame_files), fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 import tensorflow as tf
@@ -61,5 +63,21 @@ class TestImageProcessing(unittest.TestCase):
         cd.preprocess_dataset("input", "output", "processed_input", "processed_output", "mean_std.pkl", 64, 64, 3)
         mock_save.assert_called()
 
+    def test_convert_npz_shard(self):
+        pixels = np.random.randint(0, 256, (4, 8, 8, 3), dtype=np.uint8)
+        normalized = (pixels / 255.0 - self.mean) / self.std
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            npz_path = os.path.join(temp_dir, "testData_video_000000.npz")
+            np.savez_compressed(npz_path, output=normalized)
+
+            npy_path = cd.convert_npz_shard(npz_path, "output", self.mean, self.std)
+
+            self.assertFalse(os.path.exists(npz_path))
+            shard = cd.load_shard(npy_path)
+            self.assertIsInstance(shard, np.memmap)
+            np.testing.assert_array_equal(shard, pixels)
+            np.testing.assert_allclose(cd.normalize_shard(shard, self.mean, self.std), normalized, atol=1e-5)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import FolderOperations.DataManifest as dm
+
+
+class TestDataManifest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.test_dir.name, "video.mp4")
+        self.manifest_path = os.path.join(self.test_dir.name, "metadata", "manifest.json")
+
+        with open(self.video_path, "wb") as f:
+            f.write(b"video content")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_new_video_is_reset(self):
+        manifest = dm.load_manifest(self.manifest_path)
+        entry, reset = dm.get_video_entry(manifest, self.video_path, 0.25)
+
+        self.assertTrue(reset)
+        self.assertFalse(dm.is_complete(entry, create_training_dataset=False))
+
+    def test_completed_stages_survive_reload(self):
+        manifest = dm.load_manifest(self.manifest_path)
+        dm.get_video_entry(manifest, self.video_path, 0.25)
+
+        for stage in dm.STAGES:
+            if stage != "dataset":
+                dm.mark_stage(manifest, self.manifest_path, "video", stage, frame_count=10)
+
+        manifest = dm.load_manifest(self.manifest_path)
+        entry, reset = dm.get_video_entry(manifest, self.video_path, 0.25)
+
+        self.assertFalse(reset)
+        self.assertEqual(entry["frame_count"], 10)
+        self.assertTrue(dm.is_complete(entry, create_training_dataset=False))
+        self.assertFalse(dm.is_complete(entry, create_training_dataset=True))
+
+    def test_changed_video_or_scale_factor_is_reset(self):
+        manifest = dm.load_manifest(self.manifest_path)
+        dm.get_video_entry(manifest, self.video_path, 0.25)
+        dm.mark_stage(manifest, self.manifest_path, "video", "extracted")
+
+        _, reset = dm.get_video_entry(manifest, self.video_path, 0.5)
+        self.assertTrue(reset)
+
+        dm.mark_stage(manifest, self.manifest_path, "video", "extracted")
+        with open(self.video_path, "ab") as f:
+            f.write(b" appended")
+
+        entry, reset = dm.get_video_entry(manifest, self.video_path, 0.5)
+        self.assertTrue(reset)
+        self.assertFalse(entry["stages"]["extracted"])
+
+    def test_unchanged_video_is_not_rehashed(self):
+        manifest = dm.load_manifest(self.manifest_path)
+        dm.get_video_entry(manifest, self.video_path, 0.25)
+        dm.mark_stage(manifest, self.manifest_path, "video", "extracted")
+
+        with patch.object(dm, "hash_video", wraps=dm.hash_video) as hash_video:
+            _, reset = dm.get_video_entry(manifest, self.video_path, 0.25)
+            self.assertFalse(reset)
+            hash_video.assert_not_called()
+
+            stat = os.stat(self.video_path)
+            os.utime(self.video_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            entry, reset = dm.get_video_entry(manifest, self.video_path, 0.25)
+            self.assertFalse(reset)
+            self.assertTrue(entry["stages"]["extracted"])
+            hash_video.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import CreatingModel.Model as ml
+from CreatingModel.ExportModel import export_serving_model, ServingModel
+from ImageOperations.GenerateFrames import predict_batch
+
+
+class TestExportModel(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.export_dir = os.path.join(self.temp_dir, "serving")
+        self.model = ml.create_image_translation_model(16, 24, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_serving_model_matches_keras_model(self):
+        export_serving_model(self.model, self.export_dir, 16, 24, 3)
+        serving_model = ServingModel(self.export_dir)
+
+        self.assertEqual(tuple(serving_model.inputs[0].shape), (None, 16, 24, 3))
+
+        rng = np.random.default_rng(0)
+        first_frames = rng.normal(size=(3, 16, 24, 3)).astype(np.float32)
+        second_frames = rng.normal(size=(3, 16, 24, 3)).astype(np.float32)
+
+        expected = predict_batch(self.model, first_frames, second_frames)
+        actual = predict_batch(serving_model, first_frames, second_frames)
+
+        self.assertEqual(actual.dtype, np.float32)
+        np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ import cv2
 import tempfile
 import numpy as np
 from VideoOperations import ExtractingFrames as ef
+import FolderOperations.DataFlow as df
+import FolderOperations.FrameStore as fs
 
 
 class TestExtractFrames(unittest.TestCase):
@@ -41,6 +43,32 @@ class TestExtractFrames(unittest.TestCase):
         frame_files = [f for f in os.listdir(video_output_path) if f.endswith('.jpg')]
         self.assertGreater(len(frame_files), 0, "No frames were extracted")
 
+    def test_extract_frames_parallel_segments(self):
+        sequential_folder = os.path.join(self.test_dir.name, "sequential")
+        ef.save_video_frames(self.video_path, sequential_folder)
+        ef.save_videos_frames_parallel([self.video_path], self.output_folder, num_workers=2, segment_frames=2)
+
+        video_name = "test_video"
+        sequential_files = sorted(os.listdir(os.path.join(sequential_folder, video_name)))
+        parallel_files = sorted(os.listdir(os.path.join(self.output_folder, video_name)))
+
+        self.assertEqual(parallel_files, sequential_files)
+        self.assertEqual(parallel_files[-1], f"frame_{video_name}_000004.jpg")
+
+    def test_resume_after_out_of_order_segments(self):
+        video_name = "test_video"
+        frame_store = fs.open_frame_store(self.output_folder, video_name, "jpeg_dir")
+        for i in (0, 1, 3, 4):
+            frame_store.write(f"frame_{video_name}_{i:06d}.jpg", b"frame")
+
+        start_frame = df.resume_frame_index(os.path.join(self.output_folder, video_name))
+        self.assertEqual(start_frame, 2)
+
+        frame_count, _ = ef.save_video_segment(self.video_path, self.output_folder, start_frame)
+        self.assertEqual(start_frame + frame_count, 5)
+        self.assertEqual(os.listdir(frame_store.path).count(f"frame_{video_name}_000003.jpg"), 1)
+        self.assertFalse([f for f in os.listdir(frame_store.path) if f.endswith(".tmp")])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import random
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+import FolderOperations.FrameStore as fs
+from ImageOperations.FramePipeline import FrameReader, FrameWriter, QueueOccupancy
+
+
+class RecordingStore(fs.FrameStore):
+    def __init__(self):
+        self.written = []
+
+    def write(self, name, data):
+        self.written.append((name, data))
+
+
+class TestFramePipeline(unittest.TestCase):
+    def test_reader_keeps_order_and_bounds_lookahead(self):
+        frame_files = [f"frame_video_{i:06d}.jpg" for i in range(30)]
+        in_flight = []
+        lock = threading.Lock()
+        active = [0]
+
+        def loader(frame_file):
+            with lock:
+                active[0] += 1
+                in_flight.append(active[0])
+            time.sleep(random.uniform(0, 0.005))
+            with lock:
+                active[0] -= 1
+            return frame_file
+
+        reader = FrameReader(frame_files, loader, num_workers=4, queue_size=3)
+
+        self.assertEqual(list(reader), frame_files)
+        self.assertLessEqual(max(in_flight), 3)
+        self.assertEqual(reader.occupancy.samples, 30)
+        self.assertLessEqual(reader.occupancy.mean, 3)
+
+    def test_writer_writes_in_submission_order(self):
+        frame_store = RecordingStore()
+        frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(20)]
+
+        with FrameWriter(frame_store, num_workers=4, queue_size=2) as writer:
+            for i, frame in enumerate(frames):
+                writer.submit(f"frame_{i:02d}.jpg", frame)
+            writer.submit_encoded("frame_copy.jpg", b"copied")
+
+        self.assertEqual([name for name, _ in frame_store.written],
+                         [f"frame_{i:02d}.jpg" for i in range(20)] + ["frame_copy.jpg"])
+        self.assertEqual(frame_store.written[-1][1], b"copied")
+        self.assertEqual(fs.decode_image(frame_store.written[5][1]).shape, (4, 4, 3))
+        self.assertLessEqual(writer.occupancy.mean, 2)
+
+    def test_writer_raises_write_errors(self):
+        class FailingStore(fs.FrameStore):
+            def write(self, name, data):
+                raise OSError("disk full")
+
+        writer = FrameWriter(FailingStore())
+        writer.submit_encoded("frame_0.jpg", b"data")
+
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_writer_keeps_error_of_the_block(self):
+        class FailingStore(fs.FrameStore):
+            def write(self, name, data):
+                raise OSError("disk full")
+
+        with self.assertRaises(RuntimeError):
+            with FrameWriter(FailingStore()) as writer:
+                writer.submit_encoded("frame_0.jpg", b"data")
+                raise RuntimeError("inference failed")
+
+    def test_reader_stops_when_closed_early(self):
+        loaded = []
+        frames = iter(FrameReader(range(100), lambda i: loaded.append(i) or i, num_workers=1, queue_size=4))
+
+        self.assertEqual(next(frames), 0)
+        frames.close()
+
+        self.assertLessEqual(len(loaded), 5)
+
+    def test_writer_writes_to_container_store(self):
+        with tempfile.TemporaryDirectory() as root:
+            frame_store = fs.open_frame_store(root, "video", "container")
+            with FrameWriter(frame_store) as writer:
+                for i in range(5):
+                    writer.submit_encoded(f"frame_{i}.jpg", bytes([i]))
+
+            self.assertEqual([frame_store.read(f"frame_{i}.jpg") for i in range(5)], [bytes([i]) for i in range(5)])
+
+    def test_occupancy_summary(self):
+        occupancy = QueueOccupancy(4)
+        for size in (0, 4, 2):
+            occupancy.sample(size)
+
+        self.assertEqual(occupancy.mean, 2)
+        self.assertAlmostEqual(occupancy.full_fraction, 1 / 3)
+        self.assertEqual(occupancy.summary(), "2.0/4 (33% full)")
+
+
+if __name__ == '__main__':
+    unittest.main()
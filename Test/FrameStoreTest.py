@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import FolderOperations.FrameStore as fs
+
+
+def append_frames(root_dir, start):
+    frame_store = fs.ContainerStore(root_dir, "video")
+    for i in range(start, start + 20):
+        frame_store.write(f"frame_video_{i:06d}.jpg", bytes([i]) * (i + 1))
+
+
+class TestFrameStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_backends_behave_alike(self):
+        image = np.random.default_rng(0).integers(0, 255, (12, 16, 3), dtype=np.uint8)
+
+        for backend in fs.FRAME_STORE_BACKENDS:
+            frame_store = fs.open_frame_store(self.root, f"video_{backend}", backend)
+            frame_store.write("frame_v_000001.jpg", b"second")
+            frame_store.write("frame_v_000000.jpg", b"first")
+            frame_store.write("frame_v_000001.jpg", b"replaced")
+            frame_store.write_image("frame_v_000002.jpg", image)
+
+            self.assertEqual(frame_store.names(), ["frame_v_000000.jpg", "frame_v_000001.jpg", "frame_v_000002.jpg"])
+            self.assertEqual(frame_store.frame(1), b"replaced")
+            self.assertEqual(fs.read_frame(frame_store.reference("frame_v_000000.jpg")), b"first")
+            self.assertEqual(fs.frame_name(frame_store.reference("frame_v_000000.jpg")), "frame_v_000000.jpg")
+            self.assertEqual(frame_store.read_image("frame_v_000002.jpg").shape, image.shape)
+            self.assertIn("frame_v_000001.jpg", frame_store)
+            self.assertEqual(fs.list_videos(self.root, backend), [f"video_{backend}"])
+
+            frame_store.remove()
+            self.assertEqual(len(frame_store), 0)
+            self.assertEqual(fs.list_videos(self.root, backend), [])
+
+    def test_container_ignores_incomplete_index_line(self):
+        frame_store = fs.ContainerStore(self.root, "video")
+        frame_store.write("frame_video_000000.jpg", b"complete")
+
+        with open(frame_store.index_path, "ab") as f:
+            f.write(b"frame_video_000001.jpg 8 100")
+
+        self.assertEqual(fs.ContainerStore(self.root, "video").names(), ["frame_video_000000.jpg"])
+
+    def test_concurrent_appends_from_processes(self):
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            list(executor.map(append_frames, [self.root] * 3, [0, 20, 40]))
+
+        frame_store = fs.ContainerStore(self.root, "video")
+        self.assertEqual(len(frame_store), 60)
+        for i in range(60):
+            self.assertEqual(frame_store.read(f"frame_video_{i:06d}.jpg"), bytes([i]) * (i + 1))
+
+    def test_compact_keeps_latest_frames(self):
+        frame_store = fs.ContainerStore(self.root, "video")
+        for i in range(5):
+            frame_store.write(f"frame_video_{i:06d}.jpg", b"old" * 10)
+        for i in range(5):
+            frame_store.write(f"frame_video_{i:06d}.jpg", bytes([i]) * 4)
+        other_store = fs.ContainerStore(self.root, "video")
+        self.assertEqual(other_store.frame(0), bytes([0]) * 4)
+
+        self.assertEqual(frame_store.compact(), 150)
+        self.assertEqual(os.path.getsize(frame_store.path), 20)
+        self.assertEqual(frame_store.compact(), 0)
+
+        for store in (frame_store, other_store, fs.ContainerStore(self.root, "video")):
+            self.assertEqual(store.names(), [f"frame_video_{i:06d}.jpg" for i in range(5)])
+            self.assertEqual([store.frame(i) for i in range(5)], [bytes([i]) * 4 for i in range(5)])
+
+    def test_frame_index_follows_new_frames(self):
+        frame_store = fs.ContainerStore(self.root, "video")
+        frame_store.write("frame_video_000002.jpg", b"2")
+        self.assertEqual(frame_store.frame(0), b"2")
+
+        frame_store.write("frame_video_000000.jpg", b"0")
+        fs.ContainerStore(self.root, "video").write("frame_video_000001.jpg", b"1")
+
+        self.assertEqual([frame_store.frame(i) for i in range(3)], [b"0", b"1", b"2"])
+
+    def test_move_into_other_backend(self):
+        source = fs.open_frame_store(os.path.join(self.root, "generated"), "video", "jpeg_dir")
+        destination = fs.open_frame_store(self.root, "video", "container")
+        source.write("frame_v_000000_5.jpg", b"midpoint")
+
+        source.move_into(destination)
+
+        self.assertFalse(source.exists())
+        self.assertEqual(destination.read("frame_v_000000_5.jpg"), b"midpoint")
+
+
+if __name__ == '__main__':
+    unittest.main()
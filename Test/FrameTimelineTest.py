@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+import VideoOperations.FrameTimeline as tl
+from ImageOperations.GenerateFrames import interpolate_pairs, KerasInterpolator
+
+
+class FakeInput:
+    shape = (None, 2, 2, 1)
+    dtype = "float32"
+
+
+class AveragingModel:
+    inputs = [FakeInput()]
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_on_batch(self, inputs):
+        first_frames, second_frames = inputs
+        self.batch_sizes.append(len(first_frames))
+        return (np.asarray(first_frames) + np.asarray(second_frames)) / 2
+
+
+class TestFrameTimeline(unittest.TestCase):
+    def test_resolve_frame_rates(self):
+        self.assertEqual(tl.resolve_frame_rates("video", 24, 2), (24, 48))
+        self.assertEqual(tl.resolve_frame_rates("video", 24, 2, 60), (24, 60))
+        self.assertEqual(tl.resolve_frame_rates("video", 0, 4, 60), (1, 4))
+
+        source_fps, output_fps = tl.resolve_frame_rates("video", 0, 2, 60)
+        self.assertEqual(tl.segment_fractions(0, tl.interpolation_levels(source_fps, output_fps), source_fps,
+                                              output_fps), [0.0, 0.5])
+
+    def test_interpolation_levels(self):
+        self.assertEqual(tl.interpolation_levels(24, 48), 1)
+        self.assertEqual(tl.interpolation_levels(24, 96), 2)
+        self.assertEqual(tl.interpolation_levels(24, 60), 2)
+        self.assertEqual(tl.interpolation_levels(30, 30), 0)
+
+    def test_suffixes_sort_in_position_order(self):
+        fractions = [k / 8 for k in range(1, 8)]
+        names = [f"frame_v_000001_{tl.position_suffix(f)}.jpg" for f in fractions]
+
+        self.assertEqual(tl.position_suffix(0.5), "5")
+        self.assertEqual(tl.position_suffix(0.125), "125")
+        self.assertEqual(sorted(names + ["frame_v_000001.jpg"]), ["frame_v_000001.jpg"] + names)
+
+    def test_build_timeline(self):
+        files = ["frame_v_000002.jpg", "frame_v_000001_75.jpg", "frame_v_000001.jpg", "frame_v_000001_25.jpg",
+                 "frame_v_000001_5.jpg"]
+
+        timeline = tl.build_timeline(files)
+
+        self.assertEqual([position for position, _ in timeline], [0, 0.25, 0.5, 0.75, 1])
+        self.assertEqual(timeline[-1][1], "frame_v_000002.jpg")
+
+    def test_resample_uses_every_frame_for_power_of_two(self):
+        timeline = [(k / 4, f"f{k}") for k in range(9)]
+
+        self.assertEqual(tl.resample_timeline(timeline, 24, 96), [f"f{k}" for k in range(9)])
+
+    def test_resample_to_target_fps(self):
+        timeline = [(k / 4, k / 4) for k in range(4 * 4 + 1)]
+
+        frames = tl.resample_timeline(timeline, 24, 60)
+
+        self.assertEqual(len(frames), 11)
+        for m, position in enumerate(frames):
+            self.assertLessEqual(abs(position - m * 24 / 60), 1 / 8)
+
+    def test_segments_match_resampled_timeline(self):
+        num_frames, levels = 5, 2
+        timeline = [(k / 4, k / 4) for k in range(4 * (num_frames - 1) + 1)]
+        expected = tl.resample_timeline(timeline, 24, 60)
+
+        streamed = [pair + fraction
+                    for pair in range(num_frames - 1)
+                    for fraction in tl.segment_fractions(pair, levels, 24, 60)]
+
+        self.assertEqual(streamed, expected[:len(streamed)])
+        self.assertEqual(len(streamed), len(expected) - 1)
+
+    def test_interpolate_pairs_reuses_midpoints(self):
+        model = AveragingModel()
+        first_frames = np.zeros((3, 2, 2, 1), dtype=np.float32)
+        second_frames = np.full((3, 2, 2, 1), 8, dtype=np.float32)
+
+        frames = interpolate_pairs(KerasInterpolator(model), first_frames, second_frames, levels=3)
+
+        self.assertEqual(model.batch_sizes, [3, 6, 12])
+        for k in range(9):
+            np.testing.assert_allclose(frames[k / 8], np.full((3, 2, 2, 1), k))
+
+
+if __name__ == '__main__':
+    unittest.main()
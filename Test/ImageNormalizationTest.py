@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 from unittest.mock import patch
@@ -22,6 +24,56 @@ class TestImageProcessing(unittest.TestCase):
         self.assertEqual(std.shape, (3,))
         self.assertTrue(np.all(std >= 0))  # Standard deviation should not be negative
 
+    def test_merge_stats_matches_full_sample(self):
+        pixels_a = np.random.rand(50, 3)
+        pixels_b = np.random.rand(80, 3)
+
+        def stats(pixels):
+            mean = pixels.mean(axis=0)
+            return len(pixels), mean, ((pixels - mean) ** 2).sum(axis=0)
+
+        merged_mean, merged_std = im.stats_to_mean_std(im.merge_stats(stats(pixels_a), stats(pixels_b)))
+        all_pixels = np.concatenate([pixels_a, pixels_b])
+
+        np.testing.assert_allclose(merged_mean, all_pixels.mean(axis=0))
+        np.testing.assert_allclose(merged_std, all_pixels.std(axis=0))
+
+    def test_video_stats_are_cached(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_paths = []
+            for i in range(3):
+                image_path = os.path.join(temp_dir, f"frame_video_{i:06d}.png")
+                Image.fromarray(np.random.randint(0, 256, (10, 10, 3), dtype=np.uint8)).save(image_path)
+                image_paths.append(image_path)
+
+            cache_dir = os.path.join(temp_dir, "stats")
+            mean, std = im.compute_videos_mean_std({"video": image_paths}, cache_dir)
+
+            all_pixels = np.concatenate([np.array(Image.open(p), dtype=np.float64).reshape(-1, 3) / 255.0
+                                         for p in image_paths])
+            np.testing.assert_allclose(mean, all_pixels.mean(axis=0))
+            np.testing.assert_allclose(std, all_pixels.std(axis=0))
+
+            with patch.object(im, "compute_images_stats") as mock_compute:
+                im.compute_videos_mean_std({"video": image_paths}, cache_dir)
+                mock_compute.assert_not_called()
+
+    def test_sampled_videos_are_weighted_by_length(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_image_paths = {}
+            for video, num_frames, value in (("long", 40, 50), ("short", 4, 200)):
+                video_image_paths[video] = []
+                for i in range(num_frames):
+                    image_path = os.path.join(temp_dir, f"frame_{video}_{i:06d}.png")
+                    Image.fromarray(np.full((4, 4, 3), value, dtype=np.uint8)).save(image_path)
+                    video_image_paths[video].append(image_path)
+
+            mean, std = im.compute_videos_mean_std(video_image_paths, os.path.join(temp_dir, "stats"), max_frames=4)
+
+            all_pixels = np.array([50] * 40 + [200] * 4) / 255.0
+            np.testing.assert_allclose(mean, np.full(3, all_pixels.mean()))
+            np.testing.assert_allclose(std, np.full(3, all_pixels.std()))
+
     def test_normalize_image(self):
         image = np.random.rand(100, 100, 3).astype(np.float32)
         mean = np.array([0.5, 0.5, 0.5])
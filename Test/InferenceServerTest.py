@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import cv2
+import numpy as np
+from Serving.InferenceServer import FrameBatcher, BatchedModel, create_handler
+
+INFERENCE_PARAMS = {"batch_size": 4, "interpolation_factor": 2, "target_fps": 0, "tiled_inference": False,
+                    "tile_overlap": 2, "tile_batch_size": 4}
+
+
+class FakeInput:
+    shape = (None, 4, 6, 3)
+    dtype = "float32"
+
+
+class FakeModel:
+    inputs = [FakeInput()]
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_on_batch(self, inputs):
+        first_frames, second_frames = inputs
+        self.batch_sizes.append(len(first_frames))
+        return (first_frames + second_frames) / 2
+
+
+class TestFrameBatcher(unittest.TestCase):
+    def setUp(self):
+        self.model = FakeModel()
+        self.batcher = FrameBatcher(self.model, max_batch_size=8, max_wait_ms=200)
+
+    def test_concurrent_pairs_share_a_batch(self):
+        results = {}
+
+        def request(i):
+            first = np.full((4, 6, 3), i, dtype=np.float32)
+            second = np.full((4, 6, 3), i + 2, dtype=np.float32)
+            results[i] = self.batcher.submit(first, second).result()
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(6):
+            np.testing.assert_array_equal(results[i], np.full((4, 6, 3), i + 1))
+        self.assertLess(len(self.model.batch_sizes), 6)
+        self.assertEqual(self.batcher.metrics.snapshot(0)["requests_total"], 6)
+
+    def test_batched_model_keeps_order(self):
+        first_frames = np.stack([np.full((4, 6, 3), i, dtype=np.float32) for i in range(3)])
+        predictions = BatchedModel(self.batcher).predict_on_batch([first_frames, first_frames])
+
+        np.testing.assert_array_equal(predictions, first_frames)
+
+    def test_wrong_shape_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.batcher.submit(np.zeros((2, 2, 3)), np.zeros((2, 2, 3)))
+
+
+class TestInferenceServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.batcher = FrameBatcher(FakeModel(), max_batch_size=8, max_wait_ms=1)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def start_server(self, inference_params):
+        server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                     create_handler(self.batcher, np.full(3, 0.5), np.full(3, 0.25), inference_params))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def write_video(self, width, height, num_frames=5):
+        video_path = os.path.join(self.test_dir.name, f"video_{width}x{height}.avi")
+        video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"XVID"), 10, (width, height))
+        for i in range(num_frames):
+            video_writer.write(np.full((height, width, 3), i * 40, dtype=np.uint8))
+        video_writer.release()
+        return video_path
+
+    def post_video(self, url, video_path, **options):
+        output_path = os.path.join(self.test_dir.name, "output.avi")
+        body = json.dumps({"video_path": video_path, "output_path": output_path, "scale_factor": 0.5, **options})
+        urllib.request.urlopen(urllib.request.Request(f"{url}/video", data=body.encode()), timeout=60)
+
+        video_capture = cv2.VideoCapture(output_path)
+        frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_capture.release()
+        return frame_count
+
+    def test_video_follows_configured_and_requested_frame_rate(self):
+        url = self.start_server({**INFERENCE_PARAMS, "interpolation_factor": 4})
+        video_path = self.write_video(12, 8)
+
+        self.assertEqual(self.post_video(url, video_path), 17)
+        self.assertEqual(self.post_video(url, video_path, interpolation_factor=2), 9)
+
+    def test_video_of_other_resolution_is_tiled_or_rejected(self):
+        video_path = self.write_video(20, 12)
+
+        url = self.start_server({**INFERENCE_PARAMS, "tiled_inference": True})
+        self.assertEqual(self.post_video(url, video_path), 9)
+
+        url = self.start_server(INFERENCE_PARAMS)
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post_video(url, video_path)
+        self.assertEqual(context.exception.code, 400)
+
+    def test_model_errors_return_500(self):
+        class FailingModel(FakeModel):
+            def predict_on_batch(self, inputs):
+                raise RuntimeError("out of memory")
+
+        self.batcher = FrameBatcher(FailingModel(), max_batch_size=8, max_wait_ms=1)
+        url = self.start_server(INFERENCE_PARAMS)
+        video_path = self.write_video(12, 8)
+
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post_video(url, video_path)
+        self.assertEqual(context.exception.code, 500)
+        self.assertIn("out of memory", json.loads(context.exception.read())["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
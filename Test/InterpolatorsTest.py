@@ -0,0 +1,43 @@
+import unittest
+import cv2
+import numpy as np
+from ImageOperations.Interpolators import OpticalFlowInterpolator
+
+
+class TestOpticalFlowInterpolator(unittest.TestCase):
+    def setUp(self):
+        self.mean = np.full(3, 0.5)
+        self.std = np.full(3, 0.25)
+
+        rng = np.random.default_rng(0)
+        texture = cv2.GaussianBlur(rng.uniform(0, 1, (72, 112, 3)).astype(np.float32), (0, 0), 2)
+        self.scene = (texture - texture.min()) / (texture.max() - texture.min())
+
+    def normalize(self, image):
+        return ((image - self.mean) / self.std).astype(np.float32)
+
+    def denormalize(self, frame):
+        return frame * self.std + self.mean
+
+    def test_midpoint_follows_motion(self):
+        first = self.scene[:, 8:104]
+        second = self.scene[:, 4:100]
+        expected = self.scene[:, 6:102]
+
+        for method in ("dis", "farneback"):
+            interpolator = OpticalFlowInterpolator(self.mean, self.std, method)
+            midpoint = self.denormalize(interpolator.interpolate(self.normalize(first)[np.newaxis],
+                                                                 self.normalize(second)[np.newaxis])[0])
+
+            self.assertEqual(midpoint.shape, first.shape)
+            flow_error = np.abs(midpoint - expected)[8:-8, 8:-8].mean()
+            blend_error = np.abs((first + second) / 2 - expected)[8:-8, 8:-8].mean()
+            self.assertLess(flow_error, blend_error / 2, method)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            OpticalFlowInterpolator(self.mean, self.std, "raft")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+from ImageOperations.PairDetection import frame_signature, classify_pair, STATIC, CUT, MOTION
+
+
+class TestPairDetection(unittest.TestCase):
+    def setUp(self):
+        self.mean = np.full(3, 0.5)
+        self.std = np.full(3, 0.25)
+
+        rng = np.random.default_rng(0)
+        self.scene = rng.uniform(0.2, 0.8, (90, 160, 3))
+
+    def signature(self, image):
+        return frame_signature(((image - self.mean) / self.std).astype(np.float32), self.mean, self.std)
+
+    def test_identical_frames_are_static(self):
+        noisy = np.clip(self.scene + 0.001, 0, 1)
+        self.assertEqual(classify_pair(self.signature(self.scene), self.signature(noisy)), STATIC)
+
+    def test_moving_content_is_motion(self):
+        shifted = np.roll(self.scene, 8, axis=1)
+        self.assertEqual(classify_pair(self.signature(self.scene), self.signature(shifted)), MOTION)
+
+    def test_different_scene_is_cut(self):
+        dark_scene = self.scene * 0.2
+        self.assertEqual(classify_pair(self.signature(self.scene), self.signature(dark_scene)), CUT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import setup
+import utilities.profiling as profiling
+import utilities.telemetry as telemetry
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+
+        config = setup.load_config()
+        config.update({"absolute_path": self.test_dir.name, "profile_stage": "generate", "profiler": "cprofile",
+                       "profile_frames": 4})
+        config_path = os.path.join(self.test_dir.name, "setup.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+
+        self.previous_env = {name: os.environ.pop(name, None)
+                             for name in (setup.CONFIG_ENV, profiling.PROFILE_STAGE_ENV, profiling.PROFILER_ENV)}
+        os.environ[setup.CONFIG_ENV] = config_path
+        profiling._profiled_stages.clear()
+        self.profiles_dir = setup.get_paths()['profiles']
+
+    def tearDown(self):
+        for name, value in self.previous_env.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+        profiling._profiled_stages.clear()
+        self.test_dir.cleanup()
+
+    def list_profiles(self):
+        return sorted(os.listdir(self.profiles_dir)) if os.path.isdir(self.profiles_dir) else []
+
+    def test_profile_stops_after_window(self):
+        with telemetry.track_stage("generate", "video"):
+            for _ in range(3):
+                profiling.advance(2)
+                sum(range(1000))
+
+        profiles = self.list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(profiles[0].startswith("generate_video_") and profiles[0].endswith(".prof"))
+        pstats.Stats(os.path.join(self.profiles_dir, profiles[0]))
+
+    def test_only_selected_stage_is_profiled_once(self):
+        with telemetry.track_stage("encode", "video"):
+            pass
+        self.assertEqual(self.list_profiles(), [])
+
+        for video in ("first", "second"):
+            with telemetry.track_stage("generate", video):
+                profiling.advance(1)
+
+        self.assertTrue(all(name.startswith("generate_first_") for name in self.list_profiles()))
+
+    def test_profile_includes_worker_threads(self):
+        def decode_in_worker(i):
+            return sum(range(1000 + i))
+
+        with telemetry.track_stage("generate", "video"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(decode_in_worker, range(8)))
+
+        profile_file, = [name for name in self.list_profiles() if name.endswith(".prof")]
+        stats = pstats.Stats(os.path.join(self.profiles_dir, profile_file))
+        self.assertIn("decode_in_worker", {function for _, _, function in stats.stats})
+
+    def test_environment_overrides_config(self):
+        os.environ[profiling.PROFILE_STAGE_ENV] = "encode"
+
+        with telemetry.track_stage("generate", "video"):
+            pass
+        with telemetry.track_stage("encode", "video"):
+            pass
+
+        self.assertTrue(all(name.startswith("encode_video_") for name in self.list_profiles()))
+
+    def test_unknown_profiler(self):
+        with self.assertRaises(ValueError):
+            profiling.ProfileSession("generate", "", "perf", 0, self.profiles_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,20 @@ class TestImageScaling(unittest.TestCase):
         with Image.open(output_image_path) as img:
             self.assertEqual(img.size, (50, 50))
 
+    def test_image_scale_down_opencv_backend(self):
+        self.test_image.save(self.test_image_path)
+
+        sd.batch_resize_images(self.input_folder, self.output_folder, scale_factor=0.5, backend="opencv",
+                               num_workers=2)
+        output_image_path = os.path.join(self.output_folder, 'test.jpg')
+
+        with Image.open(output_image_path) as img:
+            self.assertEqual(img.size, (50, 50))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            sd.batch_resize_images(self.input_folder, self.output_folder, backend="nearest")
+
     def test_frames_scale_down(self):
         self.frame_folder = os.path.join(self.input_folder, "frames")
         os.makedirs(self.frame_folder, exist_ok=True)
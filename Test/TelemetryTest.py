@@ -0,0 +1,116 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import setup
+import utilities.telemetry as telemetry
+
+
+def track_worker_stage(config_path):
+    os.environ[setup.CONFIG_ENV] = config_path
+    with telemetry.track_stage("generate", "video.chunk001", 4):
+        pass
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.textfile = os.path.join(self.test_dir.name, "textfile", "video_enhancement.prom")
+
+        config = setup.load_config()
+        config.update({"absolute_path": self.test_dir.name, "telemetry": True, "prometheus_textfile": self.textfile})
+        self.config_path = os.path.join(self.test_dir.name, "setup.json")
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+
+        self.previous_config = os.environ.get(setup.CONFIG_ENV)
+        os.environ[setup.CONFIG_ENV] = self.config_path
+        telemetry._latest.clear()
+
+    def tearDown(self):
+        if self.previous_config is None:
+            os.environ.pop(setup.CONFIG_ENV, None)
+        else:
+            os.environ[setup.CONFIG_ENV] = self.previous_config
+        telemetry._latest.clear()
+        self.test_dir.cleanup()
+
+    def read_events(self):
+        with open(setup.get_paths()['telemetry_file'], "r") as f:
+            return [json.loads(line) for line in f]
+
+    def test_stage_event_is_written(self):
+        data_path = os.path.join(self.test_dir.name, "data.bin")
+
+        with telemetry.track_stage("resize", "video") as record:
+            with open(data_path, "wb") as f:
+                f.write(b"\0" * 100000)
+            record.frames = 10
+
+        event, = self.read_events()
+        self.assertEqual((event["stage"], event["video"], event["status"], event["frames"]), ("resize", "video", "ok", 10))
+        self.assertGreaterEqual(event["bytes_written"], 100000)
+        self.assertGreater(event["frames_per_sec"], 0)
+        self.assertGreater(event["peak_memory_mb"], 0)
+
+    def test_failed_stage_is_recorded(self):
+        with self.assertRaises(RuntimeError):
+            with telemetry.track_stage("train"):
+                raise RuntimeError("out of memory")
+
+        self.assertEqual(self.read_events()[0]["status"], "error")
+
+    def test_prometheus_textfile_keeps_latest_event_per_stage(self):
+        for frames in (5, 7):
+            with telemetry.track_stage("generate", "video", frames):
+                pass
+        with telemetry.track_stage("encode", "video", 3):
+            pass
+
+        with open(self.textfile, "r") as f:
+            lines = f.read().splitlines()
+
+        self.assertIn('video_enhancement_stage_frames{stage="generate",video="video",status="ok"} 7', lines)
+        self.assertIn('video_enhancement_stage_frames{stage="encode",video="video",status="ok"} 3', lines)
+        self.assertIn("# TYPE video_enhancement_stage_seconds gauge", lines)
+        self.assertEqual(len(self.read_events()), 3)
+
+    def test_prometheus_textfile_merges_worker_processes(self):
+        with telemetry.track_stage("extract", "", 10):
+            pass
+
+        worker = multiprocessing.get_context("spawn").Process(target=track_worker_stage, args=(self.config_path,))
+        worker.start()
+        worker.join()
+
+        with open(self.textfile, "r") as f:
+            lines = f.read().splitlines()
+
+        self.assertIn('video_enhancement_stage_frames{stage="extract",video="",status="ok"} 10', lines)
+        self.assertIn('video_enhancement_stage_frames{stage="generate",video="video.chunk001",status="ok"} 4', lines)
+
+    def test_prometheus_label_values_are_escaped(self):
+        with telemetry.track_stage("generate", 'my "clip"\\take\n2', 1):
+            pass
+
+        with open(self.textfile, "r") as f:
+            lines = f.read().splitlines()
+
+        self.assertIn('video_enhancement_stage_frames{stage="generate",video="my \\"clip\\"\\\\take\\n2",status="ok"} 1',
+                      lines)
+
+    def test_nested_stage_keeps_outer_peak_memory(self):
+        with patch.object(telemetry, "reset_peak_memory") as reset_peak_memory:
+            with telemetry.track_stage("train"):
+                with telemetry.track_stage("export"):
+                    pass
+            with telemetry.track_stage("encode"):
+                pass
+
+        self.assertEqual(reset_peak_memory.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from ImageOperations.TiledInference import tile_starts, feather_weights, predict_tiled
+
+
+def average(first_tiles, second_tiles):
+    return (first_tiles + second_tiles) / 2
+
+
+class TestTiledInference(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.first_frames = rng.normal(size=(2, 50, 70, 3)).astype(np.float32)
+        self.second_frames = rng.normal(size=(2, 50, 70, 3)).astype(np.float32)
+
+    def test_tile_starts_cover_the_dimension(self):
+        starts = tile_starts(70, 24, 8)
+
+        self.assertEqual(starts[0], 0)
+        self.assertEqual(starts[-1] + 24, 70)
+        self.assertTrue(all(b - a <= 24 - 8 for a, b in zip(starts, starts[1:])))
+        self.assertEqual(tile_starts(20, 24, 8), [0])
+
+    def test_feather_weights_are_positive(self):
+        weights = feather_weights(16, 24, 4)
+
+        self.assertEqual(weights.shape, (16, 24, 1))
+        self.assertGreater(weights.min(), 0)
+        self.assertEqual(weights[8, 12, 0], 1)
+
+    def test_tiled_prediction_matches_full_frame(self):
+        calls = []
+
+        def predict(first_tiles, second_tiles):
+            self.assertEqual(first_tiles.shape[1:], (16, 24, 3))
+            calls.append(len(first_tiles))
+            return average(first_tiles, second_tiles)
+
+        predictions = predict_tiled(predict, self.first_frames, self.second_frames, 16, 24, overlap=6,
+                                    tile_batch_size=5)
+
+        self.assertEqual(predictions.shape, self.first_frames.shape)
+        np.testing.assert_allclose(predictions, average(self.first_frames, self.second_frames), atol=1e-5)
+        self.assertTrue(all(size <= 5 for size in calls))
+
+    def test_frames_smaller_than_tile_are_padded(self):
+        predictions = predict_tiled(average, self.first_frames[:, :10, :12], self.second_frames[:, :10, :12],
+                                    16, 24, overlap=6)
+
+        self.assertEqual(predictions.shape, (2, 10, 12, 3))
+        np.testing.assert_allclose(predictions, average(self.first_frames, self.second_frames)[:, :10, :12],
+                                   atol=1e-5)
+
+    def test_overlap_must_be_smaller_than_tile(self):
+        with self.assertRaises(ValueError):
+            predict_tiled(average, self.first_frames, self.second_frames, 16, 24, overlap=16)
+
+
+if __name__ == '__main__':
+    unittest.main()
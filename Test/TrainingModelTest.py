@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+import numpy as np
+import tensorflow as tf
+import CreatingModel.TrainingModel as tm
+
+
+def train_mirrored(shard_pairs, weights_path, results):
+    import tensorflow as tf
+    import CreatingModel.Model as ml
+
+    tm.configure_logical_devices(2)
+    strategy = tm.create_distribution_strategy("mirrored")
+
+    with strategy.scope():
+        model = ml.create_image_translation_model(8, 12, 3)
+        model.compile(optimizer='adam', loss='mse')
+
+    dataset = tm.create_distributed_dataset(strategy, shard_pairs, 8, 12, 3, global_batch_size=4, shuffle_buffer=4,
+                                            cycle_length=2, mean=np.full(3, 0.5), std=np.full(3, 0.2))
+    history = model.fit(dataset, epochs=1, steps_per_epoch=3, verbose=0)
+    model.save_weights(weights_path)
+
+    results["replicas"] = strategy.num_replicas_in_sync
+    results["loss"] = float(history.history["loss"][-1])
+
+
+class TestTrainingDataset(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.shard_pairs = []
+
+        for i in range(3):
+            train_file = os.path.join(self.test_dir.name, f"trainData_video_{i:06d}.npy")
+            test_file = os.path.join(self.test_dir.name, f"testData_video_{i:06d}.npy")
+            np.save(train_file, np.random.randint(0, 256, (5, 2, 8, 12, 3), dtype=np.uint8))
+            np.save(test_file, np.random.randint(0, 256, (4, 8, 12, 3), dtype=np.uint8))
+            self.shard_pairs.append((train_file, test_file))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_dataset_streams_every_shard(self):
+        mean = np.array([0.5, 0.5, 0.5])
+        std = np.array([0.2, 0.2, 0.2])
+        dataset = tm.create_training_dataset(self.shard_pairs, 8, 12, 3, batch_size=5, shuffle_buffer=4,
+                                             cycle_length=2, mean=mean, std=std)
+
+        num_examples = 0
+        for (first_frames, second_frames), targets in dataset:
+            self.assertEqual(first_frames.shape[1:], (8, 12, 3))
+            self.assertEqual(second_frames.shape, first_frames.shape)
+            self.assertEqual(targets.shape, first_frames.shape)
+            self.assertEqual(targets.dtype, "float32")
+            self.assertLessEqual(float(np.max(targets)), (1 - 0.5) / 0.2 + 1e-5)
+            num_examples += targets.shape[0]
+
+        self.assertEqual(num_examples, 12)
+
+    def test_pipelines_read_disjoint_shards(self):
+        mean = np.array([0.5, 0.5, 0.5])
+        std = np.array([0.2, 0.2, 0.2])
+
+        for num_pipelines in (2, 4):
+            targets = []
+            for index in range(num_pipelines):
+                dataset = tm.create_training_dataset(self.shard_pairs, 8, 12, 3, batch_size=1, shuffle_buffer=4,
+                                                     cycle_length=2, mean=mean, std=std,
+                                                     num_pipelines=num_pipelines, pipeline_index=index)
+                targets.extend(target.numpy().tobytes() for _, target in dataset)
+
+            self.assertEqual(len(targets), 12)
+            self.assertEqual(len(set(targets)), 12)
+
+    def test_mirrored_training_on_logical_cpus(self):
+        # Logical devices must be configured before TensorFlow initializes, so train in a fresh process.
+        context = multiprocessing.get_context("spawn")
+        results = context.Manager().dict()
+        weights_path = os.path.join(self.test_dir.name, "mirrored.weights.h5")
+
+        process = context.Process(target=train_mirrored, args=(self.shard_pairs, weights_path, results))
+        process.start()
+        process.join()
+
+        self.assertEqual(results.get("replicas"), 2)
+        self.assertTrue(np.isfinite(results["loss"]))
+
+        import CreatingModel.Model as ml
+        model = ml.create_image_translation_model(8, 12, 3)
+        model.load_weights(weights_path)
+
+    def test_seeded_dataset_resumes_at_step(self):
+        mean = np.array([0.5, 0.5, 0.5])
+        std = np.array([0.2, 0.2, 0.2])
+
+        def batches(skip_steps):
+            dataset = tm.create_training_dataset(self.shard_pairs, 8, 12, 3, batch_size=2, shuffle_buffer=4,
+                                                 cycle_length=2, mean=mean, std=std, seed=7, deterministic=True)
+            return [targets.numpy() for _, targets in dataset.skip(skip_steps)]
+
+        full_epoch = batches(0)
+        resumed = batches(2)
+
+        self.assertEqual(len(resumed), len(full_epoch) - 2)
+        for expected, actual in zip(full_epoch[2:], resumed):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_checkpoint_restores_training_state(self):
+        def build_model():
+            inputs = [tf.keras.Input((8, 12, 3)), tf.keras.Input((8, 12, 3))]
+            outputs = tf.keras.layers.Conv2D(3, 1)(tf.keras.layers.Concatenate()(inputs))
+            model = tf.keras.Model(inputs, outputs)
+            model.compile(optimizer='adam', loss='mse')
+            return model
+
+        checkpoint_dir = os.path.join(self.test_dir.name, "checkpoints")
+        model = build_model()
+        checkpoint = tm.create_training_checkpoint(model)
+        manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=2)
+
+        dataset = tm.create_training_dataset(self.shard_pairs, 8, 12, 3, batch_size=2, shuffle_buffer=4,
+                                             cycle_length=2, mean=np.full(3, 0.5), std=np.full(3, 0.2),
+                                             deterministic=True)
+        model.fit(dataset.take(3), callbacks=[tm.CheckpointCallback(checkpoint, manager, every_steps=1)], verbose=0)
+        manager.save()
+        checkpoint.rng.uniform([], maxval=10, dtype=tf.int64)
+
+        self.assertEqual(len(manager.checkpoints), 2)
+
+        restored_model = build_model()
+        restored = tm.create_training_checkpoint(restored_model, seed=0)
+        restored.restore(manager.latest_checkpoint)
+
+        self.assertEqual(int(restored.step), 3)
+        self.assertEqual(int(restored_model.optimizer.iterations), int(model.optimizer.iterations))
+        for expected, actual in zip(model.get_weights(), restored_model.get_weights()):
+            np.testing.assert_array_equal(expected, actual)
+        for expected, actual in zip(model.optimizer.variables, restored_model.optimizer.variables):
+            np.testing.assert_array_equal(expected.numpy(), actual.numpy())
+
+        # The generator is restored to its state at the last save, before the draw above.
+        self.assertFalse(np.array_equal(restored.rng.state.numpy(), checkpoint.rng.state.numpy()))
+        self.assertTrue(np.array_equal(restored.rng.state.numpy(),
+                                       tf.random.Generator.from_seed(42).state.numpy()))
+
+    def test_shards_fingerprint_tracks_shard_files(self):
+        fingerprint = tm.shards_fingerprint(self.shard_pairs)
+
+        self.assertEqual(fingerprint, tm.shards_fingerprint(list(self.shard_pairs)))
+        self.assertNotEqual(fingerprint, tm.shards_fingerprint(self.shard_pairs[:2]))
+
+    def test_archive_checkpoints_keeps_earlier_run(self):
+        checkpoints_dir = os.path.join(self.test_dir.name, "checkpoints")
+        self.assertEqual(tm.archive_checkpoints(checkpoints_dir), "")
+
+        os.makedirs(os.path.join(checkpoints_dir, "workers", "worker_1"))
+        with open(os.path.join(checkpoints_dir, "checkpoint"), "w") as f:
+            f.write("ckpt-3")
+
+        archive_dir = tm.archive_checkpoints(checkpoints_dir)
+
+        self.assertFalse(os.path.exists(checkpoints_dir))
+        self.assertTrue(os.path.isfile(os.path.join(archive_dir, "checkpoint")))
+        self.assertTrue(os.path.isdir(os.path.join(archive_dir, "workers", "worker_1")))
+
+    def test_unknown_distribution_strategy(self):
+        with self.assertRaises(ValueError):
+            tm.create_distribution_strategy("parameter_server")
+
+    def test_split_validation_shards(self):
+        train_shards, validation_shards = tm.split_validation_shards(self.shard_pairs, 0.34)
+
+        self.assertEqual(len(train_shards), 2)
+        self.assertEqual(len(validation_shards), 1)
+        self.assertSetEqual(set(train_shards + validation_shards), set(self.shard_pairs))
+
+
+if __name__ == "__main__":
+    unittest.main()
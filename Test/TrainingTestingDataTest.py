@@ -1,7 +1,6 @@
 import os
 import shutil
 import unittest
-import pickle
 import FolderOperations.SeparateData as ttd
 from PIL import Image
 
@@ -48,19 +47,21 @@ class TestImageSeparation(unittest.TestCase):
         for i in range(0, 5):
             create_dummy_image(os.path.join(self.source_folder, 'video1', f'frame_video_{i:06d}.jpg'))
 
-        ttd.process_image_directories(self.source_folder, self.input_train_folder, self.output_train_folder, self.output_pickle_path)
+        triplets_dir = os.path.join(self.test_dir, 'triplets')
+        ttd.process_image_directories(self.source_folder, triplets_dir)
 
-        train_files = os.listdir(os.path.join(self.input_train_folder, 'video1'))
-        test_files = os.listdir(os.path.join(self.output_train_folder, 'video1'))
+        self.assertEqual(len(os.listdir(os.path.join(self.source_folder, 'video1'))), 5)  # Frames are not moved
+        self.assertEqual(ttd.load_triplets(ttd.triplets_file(triplets_dir, 'video1')),
+                         [['frame_video_000000.jpg', 'frame_video_000001.jpg', 'frame_video_000002.jpg'],
+                          ['frame_video_000002.jpg', 'frame_video_000003.jpg', 'frame_video_000004.jpg']])
 
-        self.assertEqual(len(train_files), 3)
-        self.assertEqual(len(test_files), 2)
-        self.assertTrue(os.path.exists(self.output_pickle_path))
-
-        with open(self.output_pickle_path, 'rb') as f:
-            data = pickle.load(f)
-        self.assertEqual(len(data), 2)  # Expecting mean and std
+    def test_triplets_skip_gaps_and_generated_frames(self):
+        files = ['frame_video_000000.jpg', 'frame_video_000001.jpg', 'frame_video_000002.jpg',
+                 'frame_video_000003.jpg', 'frame_video_000005.jpg', 'frame_video_000006.jpg',
+                 'frame_video_000000_5.jpg', 'stats.pkl']
 
+        self.assertEqual(ttd.build_triplets(files),
+                         [['frame_video_000000.jpg', 'frame_video_000001.jpg', 'frame_video_000002.jpg']])
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,72 @@
 import cv2
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import FolderOperations.FrameStore as fs
+
+
+def count_video_frames(video_path: str) -> int:
+    """
+    Returns the number of frames reported by the container of a video file.
+
+    :param video_path: Path to the video file.
+    :return: Frame count, or 0 if the video could not be opened.
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        return 0
+
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_capture.release()
+
+    return max(frame_count, 0)
+
+
+def save_video_segment(video_path: str, output_folder: str, start_frame: int = 0, end_frame: int = None) -> tuple:
+    """
+    Extracts the frames ``[start_frame, end_frame)`` of a video and stores them in the video's frame
+    store in an output directory (see FrameStore).
+
+    The decoder seeks straight to ``start_frame``, and frames keep their position in the whole video
+    in their file name, so segments extracted by separate workers line up with a sequential extraction.
+    If ``end_frame`` is None, frames are read until the end of the video.
+
+    :param video_path: Path to the input video file.
+    :param output_folder: Directory where extracted frames will be stored.
+    :param start_frame: Index of the first frame to extract.
+    :param end_frame: Index one past the last frame to extract.
+    :return: Tuple of the number of frames saved and the extraction speed in frames/sec.
+    """
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    frame_store = fs.open_frame_store(output_folder, video_name)
+
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        print(f"Error: Could not open video '{video_path}'.")
+        return 0, 0.0
+
+    if start_frame > 0:
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    start_time = time.perf_counter()
+    frame_count = 0
+    while end_frame is None or start_frame + frame_count < end_frame:
+        success, frame = video_capture.read()
+        if not success:
+            break
+
+        frame_filename = f"frame_{video_name}_{start_frame + frame_count:06d}.jpg"
+        frame_store.write_image(frame_filename, frame)
+
+        frame_count += 1
+
+    video_capture.release()
+
+    elapsed = time.perf_counter() - start_time
+    frames_per_sec = frame_count / elapsed if elapsed > 0 else 0.0
+
+    return frame_count, frames_per_sec
 
 
 def save_video_frames(video_path: str, output_folder: str) -> None:
@@ -20,24 +87,82 @@ def save_video_frames(video_path: str, output_folder: str) -> None:
 
     video_name = os.path.splitext(os.path.basename(video_path))[0]
     video_output_dir = os.path.join(output_folder, video_name)
-    os.makedirs(video_output_dir, exist_ok=True)
 
-    video_capture = cv2.VideoCapture(video_path)
-    if not video_capture.isOpened():
-        print(f"Error: Could not open video '{video_path}'.")
-        return
+    frame_count, frames_per_sec = save_video_segment(video_path, output_folder)
 
-    frame_count = 0
-    while True:
-        success, frame = video_capture.read()
-        if not success:
-            break
+    print(f"Extraction completed: {frame_count} frames saved in '{video_output_dir}' "
+          f"({frames_per_sec:.1f} frames/sec).")
 
-        frame_filename = f"frame_{video_name}_{frame_count:06d}.jpg"
-        frame_path = os.path.join(video_output_dir, frame_filename)
-        cv2.imwrite(frame_path, frame)
 
-        frame_count += 1
+def split_video_segments(video_path: str, segment_frames: int, start_frame: int = 0) -> list[tuple]:
+    """
+    Splits a video from ``start_frame`` onwards into ``(start_frame, end_frame)`` segments of at most
+    ``segment_frames`` frames.
 
-    video_capture.release()
-    print(f"Extraction completed: {frame_count} frames saved in '{video_output_dir}'.")
+    The last segment is left open-ended so that frames beyond the reported frame count are not lost.
+
+    :param video_path: Path to the video file.
+    :param segment_frames: Maximum number of frames per segment, 0 disables splitting.
+    :param start_frame: Index of the first frame to extract.
+    :return: List of segments covering the rest of the video.
+    """
+    total_frames = count_video_frames(video_path)
+
+    if segment_frames <= 0 or total_frames - start_frame <= segment_frames:
+        return [(start_frame, None)]
+
+    starts = list(range(start_frame, total_frames, segment_frames))
+    return [(start, start + segment_frames) for start in starts[:-1]] + [(starts[-1], None)]
+
+
+def _extract_segment(video_path: str, output_folder: str, start_frame: int, end_frame: int) -> tuple:
+    """Process pool worker that extracts one segment and reports its speed."""
+    frame_count, frames_per_sec = save_video_segment(video_path, output_folder, start_frame, end_frame)
+    segment_end = "end" if end_frame is None else end_frame
+    print(f"Worker {os.getpid()}: '{os.path.basename(video_path)}' frames {start_frame}-{segment_end}, "
+          f"{frame_count} frames at {frames_per_sec:.1f} frames/sec.")
+
+    return video_path, frame_count
+
+
+def save_videos_frames_parallel(video_paths: list[str], output_folder: str, num_workers: int = 1,
+                                segment_frames: int = 0, start_frames: dict = None) -> dict:
+    """
+    Extracts the frames of several videos across a pool of worker processes.
+
+    Videos longer than ``segment_frames`` are split into seek-based segments decoded by separate
+    workers. Frame file names are identical to the ones written by save_video_frames.
+
+    :param video_paths: Paths to the input video files.
+    :param output_folder: Directory where extracted frames will be stored.
+    :param num_workers: Number of worker processes.
+    :param segment_frames: Maximum number of frames decoded by one worker, 0 disables splitting.
+    :param start_frames: Optional mapping of video path to the first frame to extract, used to resume.
+    :return: Mapping of video path to the number of frames saved.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    start_frames = start_frames or {}
+
+    tasks = []
+    for video_path in video_paths:
+        if not os.path.isfile(video_path):
+            print(f"Error: Video file '{video_path}' does not exist.")
+            continue
+
+        for start_frame, end_frame in split_video_segments(video_path, segment_frames,
+                                                           start_frames.get(video_path, 0)):
+            tasks.append((video_path, output_folder, start_frame, end_frame))
+
+    frame_counts = {}
+    if not tasks:
+        return frame_counts
+
+    with ProcessPoolExecutor(max_workers=max(1, num_workers)) as executor:
+        for video_path, frame_count in executor.map(_extract_segment, *zip(*tasks)):
+            frame_counts[video_path] = frame_counts.get(video_path, 0) + frame_count
+
+    for video_path, frame_count in frame_counts.items():
+        video_name = os.path.splitext(os.path.basename(video_path))[0]
+        print(f"Extraction completed: {frame_count} frames saved in '{os.path.join(output_folder, video_name)}'.")
+
+    return frame_counts
@@ -0,0 +1,153 @@
+import bisect
+import math
+import os
+
+
+def output_frame_rate(source_fps: float, interpolation_factor: int, target_fps: float = 0) -> float:
+    """
+    Returns the frame rate of the enhanced video: ``target_fps`` if it is set, otherwise the
+    source frame rate multiplied by ``interpolation_factor``.
+    """
+    return target_fps if target_fps > 0 else source_fps * interpolation_factor
+
+
+def resolve_frame_rates(video_name: str, source_fps: float, interpolation_factor: int,
+                        target_fps: float = 0) -> tuple:
+    """
+    Returns the source and output frame rates of a video. If the container reports no frame rate,
+    the source is taken as 1 fps and the output as ``interpolation_factor`` times that, since
+    ``target_fps`` cannot be related to the source frames.
+    """
+    if source_fps <= 0:
+        source_fps = 1
+        if target_fps > 0:
+            print(f"Warning: Source frame rate of '{video_name}' unknown, interpolating "
+                  f"{interpolation_factor}x instead of targeting {target_fps} fps.")
+            target_fps = 0
+
+    return source_fps, output_frame_rate(source_fps, interpolation_factor, target_fps)
+
+
+def interpolation_levels(source_fps: float, output_fps: float) -> int:
+    """
+    Returns the number of bisection levels needed so that the generated frames are at least as
+    dense as the output frame rate. Level L places frames at every multiple of 1 / 2**L between
+    two source frames.
+    """
+    if source_fps <= 0 or output_fps <= source_fps:
+        return 0
+
+    return math.ceil(math.log2(output_fps / source_fps) - 1e-9)
+
+
+def bisection_levels(levels: int) -> list[list[tuple[float, float, float]]]:
+    """
+    Lists the midpoints generated at each bisection level as (left, right, middle) positions
+    between 0 and 1. Every left and right position is a source frame or a midpoint of an earlier
+    level, so each level only depends on frames that already exist.
+    """
+    schedule = []
+    for level in range(1, levels + 1):
+        step = 1 / 2 ** (level - 1)
+        schedule.append([(k * step, (k + 1) * step, (k + 0.5) * step) for k in range(2 ** (level - 1))])
+
+    return schedule
+
+
+def position_suffix(fraction: float) -> str:
+    """
+    Returns the file name suffix of a generated frame at a position between 0 and 1, made of the
+    decimal digits of the fraction: 0.5 -> "5", 0.25 -> "25", 0.125 -> "125".
+
+    Dyadic fractions have finite decimal expansions without trailing zeros, so the suffixes sort
+    lexicographically in the same order as the positions, and after the source frame itself.
+    """
+    return f"{fraction:.20f}".split(".")[1].rstrip("0")
+
+
+def build_timeline(frame_files: list[str]) -> list[tuple[float, str]]:
+    """
+    Orders source and generated frames by their position in the video.
+
+    Source frames get integer positions in sorted order. A generated frame named
+    ``<source frame>_<suffix>.jpg`` is placed at the position of its source frame plus the
+    fraction encoded by the suffix.
+
+    :param frame_files: Frame file names or paths.
+    :return: List of (position, frame file) sorted by position.
+    """
+    stems = {os.path.splitext(os.path.basename(f))[0]: f for f in frame_files}
+    source_stems = sorted(stem for stem in stems if not is_generated_frame(stem, stems))
+    source_positions = {stem: index for index, stem in enumerate(source_stems)}
+
+    timeline = [(float(source_positions[stem]), stems[stem]) for stem in source_stems]
+    for stem, frame_file in stems.items():
+        if stem not in source_positions:
+            source_stem, suffix = stem.rsplit("_", 1)
+            timeline.append((source_positions[source_stem] + float(f"0.{suffix}"), frame_file))
+
+    return sorted(timeline)
+
+
+def is_generated_frame(stem: str, stems) -> bool:
+    """
+    Checks whether a frame name is a generated frame, i.e. another frame name followed by a suffix.
+    """
+    parts = stem.rsplit("_", 1)
+    return len(parts) == 2 and parts[1].isdigit() and parts[0] in stems
+
+
+def resample_timeline(timeline: list[tuple[float, str]], source_fps: float, output_fps: float) -> list[str]:
+    """
+    Picks the frame nearest to every output timestamp.
+
+    Output frames are spaced ``source_fps / output_fps`` source frames apart and cover the video
+    from its first to its last source frame. When the output rate is the source rate times a power
+    of two, every frame of a fully bisected timeline is used exactly once.
+
+    :param timeline: List of (position, frame file) returned by build_timeline.
+    :param source_fps: Frame rate of the source video.
+    :param output_fps: Frame rate of the output video.
+    :return: Frame files in output order.
+    """
+    if not timeline:
+        return []
+
+    positions = [position for position, _ in timeline]
+    step = source_fps / output_fps
+    num_output_frames = math.floor(positions[-1] / step + 1e-9) + 1
+
+    frames = []
+    for m in range(num_output_frames):
+        frames.append(timeline[nearest_index(positions, m * step)][1])
+
+    return frames
+
+
+def nearest_index(positions: list[float], position: float) -> int:
+    """
+    Returns the index of the sorted position closest to ``position``, preferring the earlier one on ties.
+    """
+    index = bisect.bisect_left(positions, position)
+    if index == 0:
+        return 0
+    if index == len(positions) or position - positions[index - 1] <= positions[index] - position:
+        return index - 1
+
+    return index
+
+
+def segment_fractions(pair_index: int, levels: int, source_fps: float, output_fps: float) -> list[float]:
+    """
+    Returns, for the output timestamps falling between source frames ``pair_index`` and
+    ``pair_index + 1``, the nearest bisection position as a fraction of the pair. A fraction of
+    1 refers to the second frame of the pair.
+
+    Used by the streaming writer, which only holds one pair and its midpoints at a time.
+    """
+    step = source_fps / output_fps
+    first = math.ceil(pair_index / step - 1e-9)
+    last = math.ceil((pair_index + 1) / step - 1e-9)
+    divisions = 2 ** levels
+
+    return [math.ceil((m * step - pair_index) * divisions - 0.5) / divisions for m in range(first, last)]
@@ -2,45 +2,64 @@ import os
 import math
 import cv2
 
+import FolderOperations.FrameStore as fs
+import VideoOperations.FrameTimeline as tl
+import utilities.telemetry as telemetry
 import setup
 
 
-def create_video_from_images(input_directory: str, output_video_path: str, frame_rate: int) -> None:
+def create_video_from_images(input_directory: str, output_video_path: str, frame_rate: float,
+                             source_frame_rate: float = 0) -> int:
     """
-    Creates a video from image frames stored in the specified directory.
+    Creates a video from the frames in the frame store of the specified directory (see FrameStore).
+
+    Source and generated frames are placed on a timeline by their names (see FrameTimeline). If the
+    source frame rate is given, the frame nearest to every output timestamp is written, so any
+    output frame rate is supported; otherwise every frame is written in timeline order.
 
     :param input_directory: Directory containing image frames (.jpg) to be combined.
     :param output_video_path: Path to save the generated video file.
     :param frame_rate: Frame rate for the output video.
+    :param source_frame_rate: Frame rate of the video the source frames were extracted from.
+    :return: Number of frames written to the video.
     """
-    frame_files = sorted([f for f in os.listdir(input_directory) if f.endswith(".jpg")])
+    frame_store = fs.frame_store_at(input_directory)
+    timeline = tl.build_timeline(frame_store.names())
+
+    if source_frame_rate > 0:
+        frame_files = tl.resample_timeline(timeline, source_frame_rate, frame_rate)
+    else:
+        frame_files = [frame_file for _, frame_file in timeline]
 
     if not frame_files:
         print("Error: No image frames found in the specified directory.")
-        return
+        return 0
 
-    first_frame = cv2.imread(os.path.join(input_directory, frame_files[0]))
+    first_frame = frame_store.read_image(frame_files[0])
     if first_frame is None:
         print("Error: Could not read the first frame.")
-        return
+        return 0
 
     height, width, _ = first_frame.shape
     fourcc = cv2.VideoWriter_fourcc(*"XVID")
     video_writer = cv2.VideoWriter(output_video_path, fourcc, frame_rate, (width, height))
+    frames_written = 0
 
     for frame_file in frame_files:
-        frame_path = os.path.join(input_directory, frame_file)
-        frame = cv2.imread(frame_path)
+        frame = frame_store.read_image(frame_file)
 
         if frame is None:
             print(f"Warning: Skipping unreadable frame {frame_file}")
             continue
 
         video_writer.write(frame)
+        frames_written += 1
 
     video_writer.release()
     print(f"Video saved successfully at: {output_video_path}")
 
+    return frames_written
+
 
 def extract_video_frame_rate(video_path: str) -> int:
     """
@@ -75,21 +94,34 @@ def _find_matching_video(folder: str, videos: list[str], video_dir: str) -> str:
     return ""
 
 
+def find_source_frame_rate(folder: str) -> int:
+    """
+    Returns the frame rate of the original video a frame folder was extracted from, or 0 if no
+    matching video is found.
+    """
+    video_dir = setup.get_paths()["vid_dir"]
+    video_path = _find_matching_video(folder, os.listdir(video_dir), video_dir)
+
+    return extract_video_frame_rate(video_path) if video_path else 0
+
+
 def enhance_videos_frame_rate(input_dir: str, output_dir: str) -> None:
     """
-    Generates videos from image frames at twice the original video frame rate.
+    Generates videos from image frames at a higher frame rate.
 
     For each folder in the input directory (each representing a set of image frames),
     the function finds the corresponding original video, extracts its frame rate,
-    and then creates a new video using the images at double that frame rate.
+    and then creates a new video at ``target_fps``, or ``interpolation_factor`` times the
+    original frame rate if no target is set (see setup.json).
 
     :param input_dir: Directory containing subfolders of image frames (.jpg) to be combined.
     :param output_dir: Directory where the generated video files will be saved.
     """
     paths = setup.get_paths()
+    inference_params = setup.get_inference_params()
     video_dir = paths["vid_dir"]
     videos = os.listdir(video_dir)
-    folders = os.listdir(input_dir)
+    folders = fs.list_videos(input_dir)
 
     for folder in folders:
         video_path = _find_matching_video(folder, videos, video_dir)
@@ -97,11 +129,15 @@ def enhance_videos_frame_rate(input_dir: str, output_dir: str) -> None:
             print(f"Warning: No matching video found for folder '{folder}'. Skipping.")
             continue
 
-        vid_frame_rate = extract_video_frame_rate(video_path)
+        vid_frame_rate, output_frame_rate = tl.resolve_frame_rates(folder, extract_video_frame_rate(video_path),
+                                                                   inference_params['interpolation_factor'],
+                                                                   inference_params['target_fps'])
         output_path = os.path.join(output_dir, f"{folder}.mp4")
 
-        create_video_from_images(
-            os.path.join(input_dir, folder),
-            output_path,
-            frame_rate=2 * vid_frame_rate
-        )
+        with telemetry.track_stage("encode", folder) as record:
+            record.frames = create_video_from_images(
+                os.path.join(input_dir, folder),
+                output_path,
+                frame_rate=output_frame_rate,
+                source_frame_rate=vid_frame_rate
+            )
@@ -0,0 +1,172 @@
+import os
+
+import cv2
+import numpy as np
+
+import ImageOperations.GenerateFrames as gen
+import ImageOperations.ImageNormalization as im
+from ImageOperations.Interpolators import Interpolator
+import VideoOperations.FrameTimeline as tl
+import VideoOperations.InterpolatedImages as ii
+import utilities.utils as utils
+import setup
+
+
+def prepare_frame(frame: np.ndarray, frame_size: tuple, mean: np.ndarray, std: np.ndarray) -> tuple:
+    """
+    Resizes a decoded BGR frame and returns it together with its normalized RGB model input.
+
+    :param frame: Frame as returned by cv2.VideoCapture.read.
+    :param frame_size: Target (width, height) of the frame.
+    :param mean: The mean values of the dataset.
+    :param std: The standard deviation values of the dataset.
+    :return: Tuple of the resized BGR frame and the normalized RGB frame.
+    """
+    resized_frame = cv2.resize(frame, frame_size, interpolation=cv2.INTER_AREA)
+    rgb_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+
+    return resized_frame, im.normalize_image(rgb_frame, mean, std).astype(np.float32)
+
+
+def scaled_frame_size(video_path: str, scale_factor: float) -> tuple:
+    """
+    Returns the (width, height) the frames of a video are scaled to before interpolation.
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        raise ValueError(f"Could not open video '{video_path}'.")
+
+    width = video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)
+    height = video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    video_capture.release()
+
+    return int(width * scale_factor), int(height * scale_factor)
+
+
+def write_frame_batch(interpolator: Interpolator, video_writer: cv2.VideoWriter, original_frames: list,
+                      first_frames: list, second_frames: list, mean: np.ndarray, std: np.ndarray,
+                      first_pair_index: int = 0, levels: int = 1, source_fps: float = 1,
+                      output_fps: float = 2) -> None:
+    """
+    Interpolates a batch of frame pairs by recursive bisection and writes, for every output timestamp
+    falling within a pair, the nearest original or generated frame.
+
+    :param original_frames: Resized BGR frames of the pairs, plus the second frame of the last pair.
+    :param first_pair_index: Index of the first pair of the batch in the video.
+    :param levels: Number of bisection levels.
+    :param source_fps: Frame rate of the source video.
+    :param output_fps: Frame rate of the output video.
+    """
+    interpolated = gen.interpolate_pairs(interpolator, np.stack(first_frames), np.stack(second_frames), levels)
+
+    for pair, original_frame in enumerate(original_frames[:-1]):
+        for fraction in tl.segment_fractions(first_pair_index + pair, levels, source_fps, output_fps):
+            if fraction == 0:
+                video_writer.write(original_frame)
+            elif fraction == 1:
+                video_writer.write(original_frames[pair + 1])
+            else:
+                predicted_frame = gen.denormalize_frames(interpolated[fraction][pair], mean, std)
+                video_writer.write(cv2.cvtColor(predicted_frame, cv2.COLOR_RGB2BGR))
+
+
+def enhance_video_streaming(video_path: str, interpolator: Interpolator, output_video_path: str,
+                            scale_factor: float, mean: np.ndarray, std: np.ndarray, batch_size: int = 8,
+                            interpolation_factor: int = 2, target_fps: float = 0) -> None:
+    """
+    Raises the frame rate of a video without writing any intermediate frames to disk.
+
+    Frames are decoded with cv2.VideoCapture, scaled down and interpolated in memory, and the original
+    and generated frames are sent in order straight into the VideoWriter.
+
+    :param video_path: Path to the input video file.
+    :param interpolator: Interpolator generating the midpoint frames.
+    :param output_video_path: Path to save the enhanced video file.
+    :param scale_factor: Factor by which the frames are scaled down before interpolation.
+    :param mean: The mean values of the dataset.
+    :param std: The standard deviation values of the dataset.
+    :param batch_size: Number of frame pairs passed to the interpolator in one call.
+    :param interpolation_factor: Output frame rate as a multiple of the source frame rate.
+    :param target_fps: Output frame rate, overrides interpolation_factor if greater than 0.
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        print(f"Error: Could not open video '{video_path}'.")
+        return
+
+    success, frame = video_capture.read()
+    if not success:
+        print(f"Error: Could not read the first frame of '{video_path}'.")
+        video_capture.release()
+        return
+
+    height, width = frame.shape[:2]
+    frame_size = (int(width * scale_factor), int(height * scale_factor))
+
+    source_fps, output_fps = tl.resolve_frame_rates(os.path.basename(video_path),
+                                                    ii.extract_video_frame_rate(video_path),
+                                                    interpolation_factor, target_fps)
+    levels = max(1, tl.interpolation_levels(source_fps, output_fps))
+
+    fourcc = cv2.VideoWriter_fourcc(*"XVID")
+    video_writer = cv2.VideoWriter(output_video_path, fourcc, output_fps, frame_size)
+
+    first_original, first_frame = prepare_frame(frame, frame_size, mean, std)
+    original_frames, first_frames, second_frames = [], [], []
+    frame_count = 1
+
+    while True:
+        success, frame = video_capture.read()
+        if not success:
+            break
+
+        second_original, second_frame = prepare_frame(frame, frame_size, mean, std)
+
+        original_frames.append(first_original)
+        first_frames.append(first_frame)
+        second_frames.append(second_frame)
+
+        if len(original_frames) == batch_size:
+            write_frame_batch(interpolator, video_writer, original_frames + [second_original], first_frames, second_frames,
+                              mean, std, frame_count - batch_size, levels, source_fps, output_fps)
+            original_frames, first_frames, second_frames = [], [], []
+
+        first_original, first_frame = second_original, second_frame
+        frame_count += 1
+
+    if original_frames:
+        write_frame_batch(interpolator, video_writer, original_frames + [first_original], first_frames, second_frames,
+                          mean, std, frame_count - 1 - len(original_frames), levels, source_fps, output_fps)
+
+    last_position = (frame_count - 1) * output_fps / source_fps
+    if abs(last_position - round(last_position)) < 1e-9:
+        video_writer.write(first_original)
+
+    video_capture.release()
+    video_writer.release()
+    print(f"Video saved successfully at: {output_video_path} ({frame_count} source frames processed in memory)")
+
+
+def enhance_videos_streaming(video_dir: str, model_path: str, output_dir: str, scale_factor: float) -> None:
+    """
+    Streams every video in a directory through the configured interpolator, raising its frame rate to ``target_fps`` or
+    ``interpolation_factor`` times the source frame rate (see setup.json).
+
+    :param video_dir: Directory containing the original video files.
+    :param model_path: Path to the trained model, unused by the optical flow interpolators.
+    :param output_dir: Directory where the enhanced video files will be saved.
+    :param scale_factor: Factor by which the frames are scaled down before interpolation.
+    """
+    inference_params = setup.get_inference_params()
+    mean, std = utils.load_mean_std_file()
+    interpolator = gen.load_interpolator(model_path, mean, std)
+    batch_size = max(1, inference_params['batch_size'])
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for video in os.listdir(video_dir):
+        video_name = os.path.splitext(video)[0]
+        output_path = os.path.join(output_dir, f"{video_name}.mp4")
+
+        enhance_video_streaming(os.path.join(video_dir, video), interpolator, output_path, scale_factor, mean, std,
+                                batch_size, inference_params['interpolation_factor'], inference_params['target_fps'])
@@ -1,9 +1,11 @@
 import sys
 import FolderOperations.DataFlow as df
 import CreatingModel.TrainingModel as tm
+import ImageOperations.ChunkedGeneration as cg
 import ImageOperations.GenerateFrames as gen
 import utilities.utils as utils
 import VideoOperations.InterpolatedImages as ii
+import VideoOperations.StreamingEnhancement as se
 import setup
 
 
@@ -19,6 +21,9 @@ def main():
     paths = setup.get_paths()
     values = setup.get_values()
 
+    # Logical devices can only be set up before the data flow initializes TensorFlow.
+    tm.configure_logical_devices(setup.get_model_params()["logical_cpu_devices"])
+
     vid_dir = paths["vid_dir"]
     frames_dir = paths["frames_dir"]
     intermediate_frames_dir = paths["intermediate_frames_dir"]
@@ -51,7 +56,11 @@ def main():
             vid_dir, frames_dir, scale_down_frames_dir,
             input_train_frames_dir, output_train_frames_dir,
             input_training_dataset, output_training_dataset,
-            batch_size, scale_down_factor, create_training_dataset=create_training_flag
+            batch_size, scale_down_factor, create_training_dataset=create_training_flag,
+            extraction_workers=values["extraction_workers"],
+            extraction_segment_frames=values["extraction_segment_frames"],
+            resize_backend=values["resize_backend"],
+            resize_workers=values["resize_workers"]
         )
         if not success:
             sys.exit("Data flow failed. Exiting.")
@@ -93,20 +102,31 @@ def main():
             print("Invalid input. Please enter a number from 1 to 5.")
 
     print("\n[3/4] Loading the Model...")
-    if model_path == "":
-        model_path = utils.load_latest_model()
-    if not model_path:
-        print("No model found. Exiting.")
-        sys.exit(1)
-    print(f"Model loaded successfully: {model_path}")
-
-    print("\n[4/4] Generating Video Frames...")
-    gen.generate_video_frames(scale_down_frames_dir, model_path, intermediate_frames_dir)
-    print("Video frames generated successfully.")
-
-    print("\nEnhancing video frame rate...")
-    ii.enhance_videos_frame_rate(scale_down_frames_dir, enhanced_videos)
-    print("Video enhancement completed successfully.")
+    if setup.get_inference_params()["interpolator"] != "keras":
+        print("Using optical flow interpolation, no model needed.")
+    else:
+        if model_path == "":
+            model_path = utils.load_latest_model()
+        if not model_path:
+            print("No model found. Exiting.")
+            sys.exit(1)
+        print(f"Model loaded successfully: {model_path}")
+
+    if values["streaming_mode"]:
+        print("\n[4/4] Streaming videos through the model...")
+        se.enhance_videos_streaming(vid_dir, model_path, enhanced_videos, scale_down_factor)
+        print("Video enhancement completed successfully.")
+    else:
+        print("\n[4/4] Generating Video Frames...")
+        if setup.get_inference_params()["chunks"] > 1:
+            cg.generate_video_frames_chunked(scale_down_frames_dir, model_path, intermediate_frames_dir)
+        else:
+            gen.generate_video_frames(scale_down_frames_dir, model_path, intermediate_frames_dir)
+        print("Video frames generated successfully.")
+
+        print("\nEnhancing video frame rate...")
+        ii.enhance_videos_frame_rate(scale_down_frames_dir, enhanced_videos)
+        print("Video enhancement completed successfully.")
 
     print("\nAll operations completed successfully!")
 
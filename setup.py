@@ -1,15 +1,27 @@
 import json
 import os
 
+CONFIG_ENV = "VIDEO_ENHANCEMENT_CONFIG"
 
-def get_paths(config_file: str = "setup.json") -> dict:
+
+def load_config(config_file: str = None) -> dict:
     """
-    Return all the paths present in the configuration file.
+    Reads the configuration file. Without an explicit file, the path in the VIDEO_ENHANCEMENT_CONFIG
+    environment variable is used if set, otherwise setup.json next to this script.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_file = config_file or os.environ.get(CONFIG_ENV, "setup.json")
 
     with open(os.path.join(script_dir, config_file), "r") as f:
-        data = json.load(f)
+        return json.load(f)
+
+
+def get_paths(config_file: str = None) -> dict:
+    """
+    Return all the paths present in the configuration file.
+    """
+    data = load_config(config_file)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
 
     absolute_path = script_dir if len(data['absolute_path']) == 0 else data['absolute_path']
     root = os.path.join(absolute_path, data["root_dir"])
@@ -27,51 +39,106 @@ def get_paths(config_file: str = "setup.json") -> dict:
         "output_training_dataset": os.path.join(root, data["output_training_dataset"]),
         "enhanced_videos": os.path.join(root, data["enhanced_videos_dir"]),
         "models": os.path.join(root, data["trained_models"]),
+        "serving_models": os.path.join(root, data["serving_models_dir"]),
+        "checkpoints": os.path.join(root, data["checkpoints_dir"]),
         "dataset_dimensions": os.path.join(root, data["metadata_dir"], "dimensions"),
-        "mean_std_file": os.path.join(root, data["metadata_dir"], f'{data["mean_std_file"]}.pkl')
+        "stats_cache": os.path.join(root, data["metadata_dir"], "stats"),
+        "manifest_file": os.path.join(root, data["metadata_dir"], "manifest.json"),
+        "mean_std_file": os.path.join(root, data["metadata_dir"], f'{data["mean_std_file"]}.pkl'),
+        "telemetry_file": os.path.join(root, data["metadata_dir"], "telemetry.jsonl"),
+        "profiles": os.path.join(root, data["metadata_dir"], "profiles"),
+        "triplets": os.path.join(root, data["metadata_dir"], "triplets"),
+        "generation_jobs": os.path.join(root, data["metadata_dir"], "generation_jobs")
     }
 
     return paths
 
 
-def get_values(config_file: str = "setup.json") -> dict:
+def get_values(config_file: str = None) -> dict:
     """
     Return all the values present in the configuration file.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    with open(os.path.join(script_dir, config_file), "r") as f:
-        data = json.load(f)
+    data = load_config(config_file)
 
     values = {
         "batch_size": data["storing_batch_size_percent_int"],
         "scale_down_factor": data["scale_down_factor"],
+        "streaming_mode": data["streaming_mode"],
+        "frame_store": data["frame_store"],
+        "extraction_workers": data["extraction_workers"],
+        "extraction_segment_frames": data["extraction_segment_frames"],
+        "resize_backend": data["resize_backend"],
+        "resize_workers": data["resize_workers"],
+        "stats_workers": data["stats_workers"],
+        "stats_sample_frames": data["stats_sample_frames"],
+        "telemetry": data["telemetry"],
+        "prometheus_textfile": data["prometheus_textfile"],
+        "profile_stage": data["profile_stage"],
+        "profiler": data["profiler"],
+        "profile_frames": data["profile_frames"],
     }
 
     return values
 
-def get_model_params(config_file: str = "setup.json") -> dict:
+def get_model_params(config_file: str = None) -> dict:
     """
     Return all the model parameters present in the configuration file.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    with open(os.path.join(script_dir, config_file), "r") as f:
-        data = json.load(f)
+    data = load_config(config_file)
 
     params = {
         "batch_size": data["batch_size_model"],
         "num_epochs": data["num_epochs_model"],
         "validation_split": data["validation_split_model"],
+        "shuffle_buffer": data["shuffle_buffer_model"],
+        "shard_cycle_length": data["shard_cycle_length_model"],
+        "mixed_precision": data["mixed_precision"],
+        "distribution_strategy": data["distribution_strategy"],
+        "logical_cpu_devices": data["logical_cpu_devices"],
+        "checkpoint_every_steps": data["checkpoint_every_steps"],
+        "checkpoints_to_keep": data["checkpoints_to_keep"],
+        "checkpoint_async": data["checkpoint_async"],
+    }
+
+    return params
+
+
+def get_inference_params(config_file: str = None) -> dict:
+    """
+    Return all the inference parameters present in the configuration file.
+    """
+    data = load_config(config_file)
+
+    params = {
+        "batch_size": data["inference_batch_size"],
+        "read_workers": data["generation_read_workers"],
+        "write_workers": data["generation_write_workers"],
+        "queue_size": data["generation_queue_size"],
+        "chunks": data["generation_chunks"],
+        "worker_threads": data["generation_worker_threads"],
+        "job_lease_seconds": data["generation_job_lease_seconds"],
+        "interpolator": data["interpolator"],
+        "prefer_serving_model": data["prefer_serving_model"],
+        "tiled_inference": data["tiled_inference"],
+        "tile_overlap": data["tile_overlap"],
+        "tile_batch_size": data["tile_batch_size"],
+        "interpolation_factor": data["interpolation_factor"],
+        "target_fps": data["target_fps"],
+        "pair_detection": data["pair_detection"],
+        "static_pair_threshold": data["static_pair_threshold"],
+        "scene_cut_threshold": data["scene_cut_threshold"],
+        "server_port": data["server_port"],
+        "server_max_batch_size": data["server_max_batch_size"],
+        "server_max_wait_ms": data["server_max_wait_ms"],
     }
 
     return params
 
 
-def setup(config_file: str = "setup.json") -> None:
+def setup(config_file: str = None) -> None:
     """
     Creates the necessary directories which are not present from the configuration file.
     """
     paths = get_paths(config_file)
     for path in paths:
-        if path != "mean_std_file": os.makedirs(paths[path], exist_ok=True)
+        if path not in ("mean_std_file", "manifest_file", "telemetry_file"): os.makedirs(paths[path], exist_ok=True)
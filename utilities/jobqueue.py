@@ -0,0 +1,170 @@
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+JOB_STATES = ("pending", "running", "done", "failed")
+
+
+class FileJobQueue:
+    """
+    Job queue kept as one JSON file per job in ``pending``, ``running``, ``done`` and ``failed``
+    subdirectories of a queue directory. Workers claim a job by renaming its file from pending to
+    running, which only one of them can win, so any process that sees the directory can work on the
+    queue, including processes on other machines sharing the filesystem.
+
+    A running job whose file has not been touched for ``lease_seconds`` is considered abandoned by a
+    crashed worker and is moved back to pending.
+    """
+
+    def __init__(self, queue_dir: str, lease_seconds: float = 600):
+        self.queue_dir = queue_dir
+        self.lease_seconds = lease_seconds
+
+        for state in JOB_STATES:
+            os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.queue_dir, state, f"{job_id}.json")
+
+    def jobs(self, state: str) -> list[str]:
+        """Returns the ids of the jobs in a state, sorted."""
+        return sorted(name[:-len(".json")] for name in os.listdir(os.path.join(self.queue_dir, state))
+                      if name.endswith(".json"))
+
+    def counts(self) -> dict:
+        return {state: len(self.jobs(state)) for state in JOB_STATES}
+
+    def read(self, state: str, job_id: str) -> dict:
+        with open(self._path(state, job_id), "r") as f:
+            return json.load(f)
+
+    def submit(self, job_id: str, payload: dict) -> bool:
+        """
+        Adds a job unless a job with the same id and payload is already queued, running or done.
+        A job with the same id but another payload, e.g. left by an interrupted run with other
+        inputs or settings, is discarded and replaced.
+
+        :return: True if the job was added.
+        """
+        for state in ("pending", "running", "done"):
+            try:
+                existing = self.read(state, job_id)
+            except FileNotFoundError:
+                continue
+
+            if {key: existing.get(key) for key in payload} == json.loads(json.dumps(payload)):
+                return False
+
+            print(f"Job {job_id} was {state} with other parameters, queuing it again.")
+            try:
+                os.remove(self._path(state, job_id))
+            except FileNotFoundError:
+                pass
+
+        temp_path = os.path.join(self.queue_dir, f".{job_id}.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, self._path("pending", job_id))
+
+        failed_path = self._path("failed", job_id)
+        if os.path.isfile(failed_path):
+            os.remove(failed_path)
+
+        return True
+
+    def claim(self) -> tuple:
+        """
+        Moves the first pending job to running.
+
+        :return: (job id, payload), or None if no job is pending.
+        """
+        self.requeue_expired()
+
+        for job_id in self.jobs("pending"):
+            try:
+                os.rename(self._path("pending", job_id), self._path("running", job_id))
+            except FileNotFoundError:
+                # Claimed by another worker in the meantime.
+                continue
+
+            self.heartbeat(job_id)
+            return job_id, self.read("running", job_id)
+
+        return None
+
+    def heartbeat(self, job_id: str) -> None:
+        """Renews the lease of a running job."""
+        try:
+            os.utime(self._path("running", job_id))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def keep_alive(self, job_id: str):
+        """Renews the lease of a running job from a background thread while the block runs."""
+        stopped = threading.Event()
+
+        def renew():
+            while not stopped.wait(max(self.lease_seconds / 3, 0.1)):
+                self.heartbeat(job_id)
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def _finish(self, job_id: str, state: str, **details) -> None:
+        running_path = self._path("running", job_id)
+        try:
+            payload = self.read("running", job_id)
+        except FileNotFoundError:
+            # The lease expired and the job was requeued, its new owner finishes it.
+            return
+
+        payload.update(details, worker=f"{socket.gethostname()}:{os.getpid()}", finished=time.time())
+        with open(running_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(running_path, self._path(state, job_id))
+
+    def complete(self, job_id: str) -> None:
+        self._finish(job_id, "done")
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", error=error)
+
+    def requeue_expired(self) -> list[str]:
+        """
+        Moves running jobs whose lease expired back to pending.
+
+        :return: Ids of the requeued jobs.
+        """
+        requeued = []
+        now = time.time()
+
+        for job_id in self.jobs("running"):
+            try:
+                if now - os.path.getmtime(self._path("running", job_id)) < self.lease_seconds:
+                    continue
+                os.rename(self._path("running", job_id), self._path("pending", job_id))
+            except FileNotFoundError:
+                continue
+
+            print(f"Lease of job {job_id} expired, requeued.")
+            requeued.append(job_id)
+
+        return requeued
+
+    def clear(self) -> None:
+        """Removes every job."""
+        for state in JOB_STATES:
+            for job_id in self.jobs(state):
+                try:
+                    os.remove(self._path(state, job_id))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,142 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+import setup
+
+PROFILE_STAGE_ENV = "VIDEO_ENHANCEMENT_PROFILE_STAGE"
+PROFILER_ENV = "VIDEO_ENHANCEMENT_PROFILER"
+PROFILERS = ("cprofile", "tensorflow")
+
+_session = None
+_profiled_stages = set()
+
+
+class ProfileSession:
+    """
+    Profiles one run of a stage until the stage finishes or ``window_frames`` frames have been processed.
+
+    cProfile only sees the thread that enables it, so every thread started while the session is
+    active, such as the decoding and encoding threads of the frame pipeline, gets its own profiler,
+    and the profiles of all threads are merged into one report.
+    """
+
+    def __init__(self, stage: str, video: str, profiler: str, window_frames: int, output_dir: str):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}', expected one of {PROFILERS}.")
+
+        name = "_".join(part for part in (stage, video, time.strftime('%Y%m%d_%H%M%S')) if part)
+        self.stage = stage
+        self.profiler = profiler
+        self.window_frames = window_frames
+        self.output_path = os.path.join(output_dir, name)
+        self.frames = 0
+        self.active = False
+        self._profile = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, frame, event, arg) -> None:
+        """Profile hook of new threads: replaces itself with a profiler for the thread."""
+        profile = cProfile.Profile()
+        with self._lock:
+            if not self.active:
+                return
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+
+        if self.profiler == "cprofile":
+            self._profile = cProfile.Profile()
+            threading.setprofile(self._profile_thread)
+            self._profile.enable()
+        else:
+            import tensorflow as tf
+            tf.profiler.experimental.start(self.output_path)
+
+        self.active = True
+
+    def advance(self, frames: int) -> None:
+        """
+        Counts processed frames and stops profiling once the window is full.
+        """
+        if not self.active:
+            return
+
+        self.frames += frames
+        if 0 < self.window_frames <= self.frames:
+            self.stop()
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self.active:
+                return
+            self.active = False
+
+        if self.profiler == "cprofile":
+            threading.setprofile(None)
+            self._profile.disable()
+            with open(f"{self.output_path}.txt", "w") as f:
+                stats = pstats.Stats(self._profile, *self._thread_profiles, stream=f)
+                stats.dump_stats(f"{self.output_path}.prof")
+                stats.sort_stats("cumulative").print_stats(50)
+            output = f"{self.output_path}.prof"
+        else:
+            import tensorflow as tf
+            tf.profiler.experimental.stop()
+            output = self.output_path
+
+        threads = f", {len(self._thread_profiles)} worker threads" if self._thread_profiles else ""
+        print(f"Profile of {self.stage} ({self.frames} frames{threads}) written to {output}")
+
+
+def profiling_config() -> tuple:
+    """
+    Returns the stage to profile, the profiler and the window in frames. The environment variables
+    VIDEO_ENHANCEMENT_PROFILE_STAGE and VIDEO_ENHANCEMENT_PROFILER override setup.json.
+    """
+    values = setup.get_values()
+
+    return (os.environ.get(PROFILE_STAGE_ENV, values['profile_stage']),
+            os.environ.get(PROFILER_ENV, values['profiler']),
+            values['profile_frames'])
+
+
+@contextmanager
+def profile_stage(stage: str, video: str = ""):
+    """
+    Profiles the stage if it is the configured one. Only the first run of the stage in a process is
+    profiled, so for stages that run per video only the first video is captured.
+
+    :param stage: Name of the stage, as recorded by telemetry.
+    :param video: Name of the video the stage works on.
+    """
+    global _session
+
+    profiled_stage, profiler, window_frames = profiling_config()
+    if stage != profiled_stage or stage in _profiled_stages or _session is not None:
+        yield
+        return
+
+    _profiled_stages.add(stage)
+    _session = ProfileSession(stage, video, profiler, window_frames, setup.get_paths()['profiles'])
+    _session.start()
+    try:
+        yield
+    finally:
+        _session.stop()
+        _session = None
+
+
+def advance(frames: int) -> None:
+    """
+    Reports frames processed by the running stage, ending its profile once the window is full.
+    Stages that do not report progress are profiled until they finish.
+    """
+    if _session is not None:
+        _session.advance(frames)
@@ -0,0 +1,259 @@
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+import setup
+import utilities.profiling as profiling
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_lock = threading.Lock()
+_latest = {}
+_active_stages = 0
+
+METRICS = (
+    ("seconds", "Wall time of the last run of the stage in seconds."),
+    ("frames", "Frames processed by the last run of the stage."),
+    ("frames_per_sec", "Throughput of the last run of the stage in frames per second."),
+    ("bytes_read", "Bytes read by the pipeline process during the last run of the stage."),
+    ("bytes_written", "Bytes written by the pipeline process during the last run of the stage."),
+    ("peak_memory_mb", "Peak resident memory of the pipeline process during the last run of the stage."),
+)
+
+
+def read_io_counters() -> tuple:
+    """
+    Returns the (read, written) byte counters of this process, or zeros where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def reset_peak_memory() -> bool:
+    """
+    Resets the peak resident memory of this process so the next reading covers only the current stage.
+    Only supported on Linux; returns False elsewhere, where the process lifetime peak is reported.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_memory_mb() -> float:
+    """
+    Returns the peak resident memory of this process in MB.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def enter_stage() -> None:
+    """
+    Counts a stage as running. The peak memory is only reset when no other stage is running, so a
+    nested stage does not discard the peak of the stage around it; the nested stage then reports
+    the peak since the outer stage started.
+    """
+    global _active_stages
+
+    with _lock:
+        if _active_stages == 0:
+            reset_peak_memory()
+        _active_stages += 1
+
+
+def exit_stage() -> None:
+    global _active_stages
+
+    with _lock:
+        _active_stages -= 1
+
+
+class StageRecord:
+    """
+    Measurements of one run of a pipeline stage. Code inside the stage sets ``frames`` once it
+    knows how many frames it processed, and may add stage specific values to ``details``, which
+    are written to the event log only.
+    """
+
+    def __init__(self, stage: str, video: str = "", frames: int = 0):
+        self.stage = stage
+        self.video = video
+        self.frames = frames
+        self.status = "ok"
+        self.details = {}
+        self._start_time = time.perf_counter()
+        self._start_io = read_io_counters()
+
+    def event(self) -> dict:
+        seconds = time.perf_counter() - self._start_time
+        bytes_read, bytes_written = (end - start for end, start in zip(read_io_counters(), self._start_io))
+
+        return {
+            "timestamp": time.time(),
+            "stage": self.stage,
+            "video": self.video,
+            "status": self.status,
+            "seconds": seconds,
+            "frames": self.frames,
+            "frames_per_sec": self.frames / seconds if seconds > 0 else 0.0,
+            "bytes_read": bytes_read,
+            "bytes_written": bytes_written,
+            "peak_memory_mb": read_peak_memory_mb(),
+            **self.details,
+        }
+
+
+def write_event(event: dict, events_file: str) -> None:
+    """
+    Appends an event as one JSON line.
+    """
+    os.makedirs(os.path.dirname(events_file), exist_ok=True)
+
+    with open(events_file, "a") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def escape_label_value(value: str) -> str:
+    """
+    Escapes backslashes, double quotes and line feeds in a label value as the Prometheus text format requires.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_prometheus(latest: dict) -> str:
+    """
+    Renders the latest event of every stage and video as Prometheus gauges.
+    """
+    lines = []
+    for metric, help_text in METRICS:
+        name = f"video_enhancement_stage_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for (stage, video), event in sorted(latest.items()):
+            labels = ",".join(f'{label}="{escape_label_value(value)}"'
+                              for label, value in (("stage", stage), ("video", video), ("status", event["status"])))
+            lines.append(f"{name}{{{labels}}} {event[metric]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_atomically(path: str, text: str) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(text)
+
+    os.replace(temp_path, path)
+
+
+def merge_latest_events(parts_dir: str, own_part: str) -> dict:
+    """
+    Merges the latest events stored by every process, keeping the newest event of every stage and
+    video. Part files of finished processes whose events have all been superseded are removed.
+    """
+    latest, owners = {}, {}
+    part_files = sorted(name for name in os.listdir(parts_dir) if name.endswith(".json"))
+
+    for part_file in part_files:
+        try:
+            with open(os.path.join(parts_dir, part_file), "r") as f:
+                events = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for event in events:
+            key = (event["stage"], event["video"])
+            if key not in latest or event["timestamp"] >= latest[key]["timestamp"]:
+                latest[key] = event
+                owners[key] = part_file
+
+    for part_file in set(part_files) - set(owners.values()) - {own_part}:
+        os.remove(os.path.join(parts_dir, part_file))
+
+    return latest
+
+
+def write_prometheus_textfile(textfile: str) -> None:
+    """
+    Atomically rewrites the textfile read by the node-exporter textfile collector.
+
+    Every process keeps its latest events in ``<textfile>.parts/<pid>.json``, and the textfile is
+    rendered from all of them, so worker processes such as the chunked generation workers add
+    their metrics instead of replacing those of the pipeline process.
+    """
+    parts_dir = f"{textfile}.parts"
+    own_part = f"{os.getpid()}.json"
+    os.makedirs(parts_dir, exist_ok=True)
+
+    with open(f"{textfile}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            write_atomically(os.path.join(parts_dir, own_part), json.dumps(list(_latest.values())))
+            write_atomically(textfile, format_prometheus(merge_latest_events(parts_dir, own_part)))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def emit(event: dict) -> None:
+    """
+    Records a finished stage in the JSON-lines event log and, if configured, the Prometheus textfile.
+    """
+    values = setup.get_values()
+    if not values['telemetry']:
+        return
+
+    with _lock:
+        write_event(event, setup.get_paths()['telemetry_file'])
+
+        if values['prometheus_textfile']:
+            _latest[(event["stage"], event["video"])] = event
+            write_prometheus_textfile(values['prometheus_textfile'])
+
+
+@contextmanager
+def track_stage(stage: str, video: str = "", frames: int = 0):
+    """
+    Measures a pipeline stage and emits a telemetry event when it finishes, also if it fails.
+    The stage is profiled if it is the one selected in the profiling configuration.
+
+    Usage::
+
+        with track_stage("resize", video_name) as record:
+            record.frames = resize(...)
+
+    :param stage: Name of the stage.
+    :param video: Name of the video the stage works on, empty for stages covering all videos.
+    :param frames: Number of frames processed, if already known.
+    """
+    enter_stage()
+    record = StageRecord(stage, video, frames)
+    try:
+        with profiling.profile_stage(stage, video):
+            yield record
+    except BaseException:
+        record.status = "error"
+        raise
+    finally:
+        exit_stage()
+        emit(record.event())